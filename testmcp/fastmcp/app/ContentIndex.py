@@ -0,0 +1,315 @@
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.etree import ElementTree
+
+from ZipCache import ZipDirectoryCache
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    # pypdf 가 없으면 pdf 내용은 색인하지 않음 (파일 이름 검색은 그대로 됨)
+    PdfReader = None
+
+
+logger = logging.getLogger("search_docs.content")
+
+
+# 스키마가 바뀌면 올림 - 색인은 캐시이므로 버전이 다르면 지우고 다시 만듦
+SCHEMA_VERSION = 1
+
+# trigram 토크나이저 - 형태소 분석 없이 한글/영문 모두 세 글자 이상 부분 문자열로 찾음 (대소문자 무시)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    path_in_zip TEXT NOT NULL DEFAULT '',
+    folder TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    error TEXT,
+    UNIQUE (path, path_in_zip)
+);
+CREATE INDEX IF NOT EXISTS docs_folder ON docs (folder);
+CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body, tokenize='trigram');
+"""
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _docx_text(source):
+    # python-docx 로 여는 것보다 document.xml 만 직접 읽는 편이 훨씬 빠름
+    with zipfile.ZipFile(source) as z:
+        root = ElementTree.fromstring(z.read("word/document.xml"))
+    return "\n".join("".join(t.text or "" for t in p.iter(_W + "t")) for p in root.iter(_W + "p"))
+
+
+def _xlsx_text(source):
+    texts = []
+    with zipfile.ZipFile(source) as z:
+        names = set(z.namelist())
+        if "xl/sharedStrings.xml" in names:
+            root = ElementTree.fromstring(z.read("xl/sharedStrings.xml"))
+            texts.extend("".join(t.text or "" for t in si.iter(_S + "t")) for si in root.iter(_S + "si"))
+        for name in sorted(n for n in names if n.startswith("xl/worksheets/") and n.endswith(".xml")):
+            # 공유 문자열이 아닌 셀 안의 문자열 (inlineStr)
+            with z.open(name) as f:
+                for _, elem in ElementTree.iterparse(f):
+                    if elem.tag == _S + "is":
+                        texts.append("".join(t.text or "" for t in elem.iter(_S + "t")))
+                    elif elem.tag == _S + "row":
+                        elem.clear()
+    return "\n".join(texts)
+
+
+def _pdf_text(source):
+    return "\n".join(page.extract_text() or "" for page in PdfReader(source).pages)
+
+
+_EXTRACTORS = {"docx": _docx_text, "xlsx": _xlsx_text}
+if PdfReader is not None:
+    _EXTRACTORS["pdf"] = _pdf_text
+
+
+def content_types():
+    """내용을 색인할 수 있는 확장자들"""
+    return tuple(_EXTRACTORS)
+
+
+def _extract_batch(tasks, max_bytes, max_chars):
+    """
+    문서들의 텍스트를 추출합니다 (프로세스 풀에서 실행).
+    tasks: [(path, path_in_zip, ext, member)] - zip 안의 문서는 member(ZipMember) 의 offset 으로 바로 읽음
+    Returns [(path, path_in_zip, text, error)]
+    """
+    results = []
+    for path, path_in_zip, ext, member in tasks:
+        try:
+            if member is None:
+                if os.path.getsize(path) > max_bytes:
+                    raise ValueError(f"larger than {max_bytes} bytes")
+                source = path
+            else:
+                data = ZipDirectoryCache.read(path, member, max_bytes)
+                if data is None:
+                    raise ValueError(f"larger than {max_bytes} bytes")
+                source = io.BytesIO(data)
+            text = unicodedata.normalize("NFC", _EXTRACTORS[ext](source))[:max_chars]
+            results.append((path, path_in_zip, text, None))
+        except Exception as e:
+            # 손상/암호화된 문서 등 - 파일이 다시 바뀔 때까지 건너뜀
+            results.append((path, path_in_zip, "", f"{type(e).__name__}: {str(e)}"))
+    return results
+
+
+def _match_phrase(keyword):
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def _like_pattern(keyword):
+    return "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class ContentIndex:
+    """
+    search_docs 의 내용 검색용 전문 색인 (SQLite FTS5, trigram 토크나이저).
+
+    update() 는 catalog 의 파일 목록을 받아 새로 생겼거나 크기/mtime 이 바뀐 문서만 텍스트를 추출하고,
+    사라진 문서는 색인에서 지웁니다. 추출은 프로세스 풀에서 batch_size 개씩 나눠 병렬로 하고,
+    zip 안의 문서는 ZipDirectoryCache 의 member offset 으로 zip 을 다시 파싱하지 않고 읽습니다.
+    검색은 세 글자 이상 키워드는 FTS5 MATCH 로, 더 짧은 키워드는 찾은 문서 안에서 LIKE 로 확인합니다.
+
+    _lock 은 SQLite 연결을 쓰는 동안만 잡습니다 - 추출하는 동안에는 풀어 두어 검색이 기다리지 않고,
+    update() 끼리는 _update_lock 으로 하나씩 실행해 같은 문서를 두 번 추출하지 않습니다.
+    """
+
+    def __init__(self, db_path, zip_cache, workers=None, max_file_mb=50.0, max_chars=2_000_000, batch_size=8):
+        self.db_path = db_path
+        self.zip_cache = zip_cache
+        self.workers = workers or os.cpu_count() or 1
+        self.max_bytes = int(max_file_mb * 1024 * 1024)
+        self.max_chars = max_chars
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._conn = None
+        self._pool = None
+        self._updates = 0
+        self._searches = 0
+        self._extracted = 0
+        self._extract_errors = 0
+        self._extract_seconds = 0.0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                if version:
+                    logger.info(f"Rebuilding content index (schema {version} -> {SCHEMA_VERSION})")
+                conn.executescript("DROP TABLE IF EXISTS content; DROP TABLE IF EXISTS docs;")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def update(self, folders, entries):
+        """
+        folders 의 전체 파일 목록 entries(DocCatalog.search 결과) 에 맞춰 색인을 갱신합니다.
+        entries 에 없는 문서는 지웁니다. Returns the number of documents extracted.
+        """
+        types = content_types()
+        entries = [e for e in entries if (e["ext"] or "").lower() in types]
+        with self._update_lock:
+            with self._lock:
+                conn = self._connect()
+                self._updates += 1
+                known = {}
+                for folder in folders:
+                    for r in conn.execute("SELECT path, path_in_zip, id, size, mtime_ns FROM docs WHERE folder = ?",
+                                          (folder,)):
+                        known[(r[0], r[1])] = r[2:]
+
+                stale = {}
+                for e in entries:
+                    key = (e["path"], e["path_in_zip"])
+                    old = known.pop(key, None)
+                    if old is None or old[1:] != (e["size"], e["mtime_ns"]):
+                        stale[key] = e
+                # 남은 known 은 폴더에서 사라진 문서
+                for file_id, _, _ in known.values():
+                    conn.execute("DELETE FROM content WHERE rowid = ?", (file_id,))
+                    conn.execute("DELETE FROM docs WHERE id = ?", (file_id,))
+                conn.commit()
+
+            # 추출은 잠금 없이 - 결과는 batch 마다 잠깐 잠그고 씀
+            if stale:
+                self._extract(stale)
+            return len(stale)
+
+    def _tasks(self, stale):
+        tasks = []
+        members = {}
+        for (path, path_in_zip), e in sorted(stale.items()):
+            member = None
+            if path_in_zip:
+                if path not in members:
+                    try:
+                        members[path] = {m.name: m for m in self.zip_cache.members(path)}
+                    except (OSError, zipfile.BadZipFile) as ex:
+                        logger.warning(f"ZIP 파일 {path} 처리 중 오류 발생: {str(ex)}")
+                        members[path] = {}
+                member = members[path].get(path_in_zip)
+                if member is None:
+                    continue
+            tasks.append((path, path_in_zip, e["ext"].lower(), member))
+        # zip 멤버끼리 같은 batch 에 모이도록 정렬된 순서대로 자름
+        return [tasks[i:i + self.batch_size] for i in range(0, len(tasks), self.batch_size)]
+
+    def _extract(self, stale):
+        started = time.perf_counter()
+        batches = self._tasks(stale)
+        pending = list(batches)
+        if len(batches) > 1 and self.workers > 1:
+            try:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                futures = {self._pool.submit(_extract_batch, b, self.max_bytes, self.max_chars): b for b in batches}
+                for future in as_completed(futures):
+                    self._store(stale, future.result())
+                    pending.remove(futures[future])
+            except Exception as e:
+                # 프로세스 풀을 쓸 수 없으면 (예: 워커가 죽음) 남은 것은 이 프로세스에서 추출
+                logger.warning(f"Content extraction pool failed ({str(e)}); extracting in-process")
+                self.close()
+        for batch in pending:
+            self._store(stale, _extract_batch(batch, self.max_bytes, self.max_chars))
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._extract_seconds += elapsed
+        logger.info(f"Extracted text from {len(stale)} documents in {elapsed:.2f}s")
+
+    def _store(self, stale, results):
+        with self._lock:
+            conn = self._connect()
+            for path, path_in_zip, text, error in results:
+                e = stale[(path, path_in_zip)]
+                row = conn.execute("SELECT id FROM docs WHERE path = ? AND path_in_zip = ?",
+                                   (path, path_in_zip)).fetchone()
+                if row is None:
+                    file_id = conn.execute(
+                        "INSERT INTO docs (path, path_in_zip, folder, size, mtime_ns, error) VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, path_in_zip, e["folder"], e["size"], e["mtime_ns"], error),
+                    ).lastrowid
+                else:
+                    file_id = row[0]
+                    conn.execute("UPDATE docs SET size = ?, mtime_ns = ?, error = ? WHERE id = ?",
+                                 (e["size"], e["mtime_ns"], error, file_id))
+                    conn.execute("DELETE FROM content WHERE rowid = ?", (file_id,))
+                conn.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (file_id, text))
+                if error:
+                    self._extract_errors += 1
+                    logger.warning(f"Failed to extract text from {path} {path_in_zip}: {error}")
+                else:
+                    self._extracted += 1
+            conn.commit()
+
+    def search(self, folders, keywords):
+        """내용에 키워드가 모두 들어 있는 문서들. Returns a set of (path, path_in_zip)."""
+        keywords = [unicodedata.normalize("NFC", k) for k in keywords if k and k.strip()]
+        if not keywords or not folders:
+            return set()
+        clauses = [f"d.folder IN ({', '.join('?' for _ in folders)})"]
+        params = list(folders)
+        phrases = [_match_phrase(k) for k in keywords if len(k) >= 3]
+        if phrases:
+            clauses.append("content MATCH ?")
+            params.append(" AND ".join(phrases))
+        for keyword in keywords:
+            if len(keyword) < 3:
+                # trigram 으로는 찾을 수 없는 짧은 키워드
+                clauses.append("content.body LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(keyword))
+
+        with self._lock:
+            conn = self._connect()
+            self._searches += 1
+            rows = conn.execute(
+                "SELECT d.path, d.path_in_zip FROM content JOIN docs d ON d.id = content.rowid "
+                f"WHERE {' AND '.join(clauses)}",
+                params,
+            ).fetchall()
+        return set(rows)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            docs, errors = conn.execute("SELECT count(*), count(error) FROM docs").fetchone()
+            return {
+                "path": self.db_path,
+                "types": list(content_types()),
+                "docs": docs,
+                "doc_errors": errors,
+                "workers": self.workers,
+                "updates": self._updates,
+                "searches": self._searches,
+                "extracted": self._extracted,
+                "extract_errors": self._extract_errors,
+                "extract_seconds": round(self._extract_seconds, 3),
+            }
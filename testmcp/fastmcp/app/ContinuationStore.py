@@ -0,0 +1,76 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from ResultCache import normalize_sql
+
+
+def paginate_sql(sql_query, offset, page_size):
+    """
+    가드를 거친 SQL (행 순서를 정하는 최상위 ORDER BY 와 행 상한 LIMIT 포함) 을 감싸서 offset 부터 page_size + 1 행만 읽는 SQL.
+    안쪽 LIMIT 이 그대로 남으므로 페이지를 넘겨도 가드의 행 상한을 넘지 않고, OFFSET 으로 다시 읽는
+    앞쪽 행도 그 상한 안으로 제한됩니다.
+    """
+    statement = sql_query.strip().rstrip(";").strip()
+    return f"SELECT * FROM (\n{statement}\n) AS page LIMIT {int(page_size) + 1} OFFSET {int(offset)}"
+
+
+class ContinuationStore:
+    """
+    search_rdb 결과의 다음 페이지를 가리키는 continuation token 저장소 (서버 메모리).
+
+    토큰은 (정규화된 SQL, offset) 의 해시라서 같은 결과에 대해 항상 같은 값이 나오고,
+    결과 캐시에서 꺼낸 응답에 들어 있는 토큰도 put() 으로 다시 살릴 수 있습니다.
+    저장하는 SQL 은 원래 SQL 이 아니라 가드가 실제로 실행한 문장이고, 최상위 ORDER BY 가 읽는 테이블의
+    기본 키를 모두 포함해서 행 순서가 하나로 정해지는 결과에만 토큰을 발급합니다 (정렬 키가 겹치는 행은
+    실행할 때마다 순서가 바뀔 수 있음). 다음 페이지는 LLM 없이 그 문장을 OFFSET 으로 감싸 실행합니다.
+    """
+
+    def __init__(self, ttl=900.0, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # token -> (sql, offset, stored_at)
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._resumed = 0
+        self._expired = 0
+
+    @staticmethod
+    def token_for(sql_query, offset):
+        digest = hashlib.sha256(f"{normalize_sql(sql_query)}\0{int(offset)}".encode("utf-8"))
+        return digest.hexdigest()[:24]
+
+    def put(self, sql_query, offset):
+        token = self.token_for(sql_query, offset)
+        with self._lock:
+            self._entries.pop(token, None)
+            self._entries[token] = (sql_query, int(offset), time.monotonic())
+            self._issued += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def get(self, token):
+        """Returns (sql, offset) or None if the token is unknown or expired."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] > self.ttl:
+                del self._entries[token]
+                self._expired += 1
+                return None
+            self._entries.move_to_end(token)
+            self._resumed += 1
+            return entry[0], entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tokens": len(self._entries),
+                "issued": self._issued,
+                "resumed": self._resumed,
+                "expired": self._expired,
+                "ttl_seconds": self.ttl,
+            }
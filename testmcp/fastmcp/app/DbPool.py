@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+
+logger = logging.getLogger("rdb_search_tool.pool")
+
+
+class PoolTimeoutError(PoolError):
+    """풀에서 제한 시간 내에 연결을 얻지 못했을 때 발생"""
+
+
+class _RetainingPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    반납된 연결을 maxconn 개까지 닫지 않고 두는 ThreadedConnectionPool.
+
+    psycopg2 는 유휴 연결이 minconn 개를 넘으면 반납 시 닫아 버리므로 minconn 을 maxconn 으로 두고,
+    처음 만들 연결 수는 warm_up() 으로 따로 정합니다.
+    """
+
+    def __init__(self, maxconn, *args, **kwargs):
+        super().__init__(0, maxconn, *args, **kwargs)
+        self.minconn = self.maxconn
+
+    def warm_up(self, count):
+        conns = [self.getconn() for _ in range(min(count, self.maxconn))]
+        for conn in conns:
+            self.putconn(conn)
+
+
+class DbPool:
+    """
+    psycopg2 연결 풀 - 최대 연결 수를 제한하고, 대여 시 상태 점검과 search_path 초기화를 수행합니다.
+
+    psycopg2.pool.ThreadedConnectionPool 은 연결이 모두 사용 중이면 즉시 PoolError 를 던지므로,
+    세마포어로 대기열을 만들어 timeout 까지 기다리도록 감쌉니다.
+    """
+
+    def __init__(self, db_config, minconn=1, maxconn=10, timeout=10.0,
+                 health_check_interval=30.0, search_path=None):
+        self.db_config = db_config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.search_path = search_path
+
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = weakref.WeakKeyDictionary()  # conn -> 마지막 반납 시각
+
+        # 모니터링용 통계
+        self._in_use = 0
+        self._waiters = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._health_failures = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def open(self):
+        """minconn 개의 연결을 미리 만들어 둡니다 (서버 시작 시 warm-up)."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = _RetainingPool(self.maxconn, **self.db_config)
+                self._pool.warm_up(self.minconn)
+                logger.info(f"Connection pool opened (min={self.minconn}, max={self.maxconn})")
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                self._last_used.clear()
+                logger.info("Connection pool closed")
+
+    def getconn(self):
+        """풀에서 연결을 빌립니다. 모든 연결이 사용 중이면 timeout 초까지 기다립니다."""
+        if self._pool is None:
+            self.open()
+
+        started = time.monotonic()
+        with self._lock:
+            self._waiters += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            waited = time.monotonic() - started
+            with self._lock:
+                self._waiters -= 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+
+        if not acquired:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self.timeout:.1f}s waiting for a database connection "
+                f"(pool size {self.maxconn})"
+            )
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        """빌린 연결을 반납합니다. 진행 중인 트랜잭션은 psycopg2 풀이 롤백합니다."""
+        try:
+            if conn.closed:
+                close = True
+            # 풀에 넣는 순간 다른 스레드가 가져갈 수 있으므로 반납 시각은 먼저 기록
+            with self._lock:
+                if close:
+                    self._last_used.pop(conn, None)
+                else:
+                    self._last_used[conn] = time.monotonic()
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def _checkout(self):
+        # 끊어진 연결은 버리고 새 연결을 받습니다 (최대 maxconn 번 시도)
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                self._reset_session(conn)
+                return conn
+            with self._lock:
+                self._health_failures += 1
+                self._last_used.pop(conn, None)
+            logger.warning("Discarding unhealthy pooled connection")
+            self._pool.putconn(conn, close=True)
+        raise PoolError("Could not obtain a healthy database connection")
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        with self._lock:
+            last_used = self._last_used.get(conn)
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+        # 오래 놀고 있던 연결만 실제로 서버에 확인합니다
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _reset_session(self, conn):
+        """이전 사용자가 바꿔 둔 세션 상태를 되돌립니다."""
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        if self.search_path:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SET search_path TO {self.search_path}")
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            avg_wait = self._total_wait / self._checkouts if self._checkouts else 0.0
+            return {
+                "open": self._pool is not None,
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._pool._pool) if self._pool is not None else 0,
+                "waiters": self._waiters,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "health_check_failures": self._health_failures,
+                "avg_wait_ms": round(avg_wait * 1000, 2),
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+            }
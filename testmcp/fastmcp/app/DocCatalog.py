@@ -0,0 +1,507 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from NameIndex import SCHEMA as NAME_INDEX_SCHEMA, NameGramIndex, normalize_name
+from ZipCache import ZipDirectoryCache
+
+
+logger = logging.getLogger("search_docs.catalog")
+
+
+# 디렉터리 mtime 해상도 (FAT/SMB 는 2초) - 스캔 직후 같은 틱 안에 바뀐 것은 mtime 으로 구분할 수 없음
+MTIME_RESOLUTION_NS = 2_000_000_000
+
+# 스키마가 바뀌면 올림 - catalog 는 캐시이므로 버전이 다르면 지우고 다시 만듦
+SCHEMA_VERSION = 2
+
+# 폴더 범위의 파일이 이보다 많으면 흔한 gram 뿐이어도 n-gram 색인을 씀 (적으면 폴더 색인으로 훑음)
+SCAN_LIMIT = 20000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    path_in_zip TEXT NOT NULL DEFAULT '',
+    dir TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    ext TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    in_zip INTEGER NOT NULL,
+    UNIQUE (path, path_in_zip)
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files (folder, name_norm);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+""" + NAME_INDEX_SCHEMA
+
+_COLUMNS = "path, path_in_zip, dir, folder, name, name_norm, ext, size, mtime_ns, in_zip"
+
+
+def _extension(name):
+    return name.split('.')[-1] if '.' in name else None
+
+
+def _file_row(path, directory, folder, name, size, mtime_ns):
+    return (path, "", directory, folder, name, normalize_name(name), _extension(name), size, mtime_ns, 0)
+
+
+def zip_member_rows(zip_cache, zip_path, directory, folder, st=None):
+    """zip 파일 안의 파일들을 catalog 행으로 (디렉터리 항목 제외)"""
+    rows = []
+    for member in zip_cache.members(zip_path, st):
+        name = os.path.basename(member.name)
+        if not name:
+            continue
+        mtime_ns = int(time.mktime(member.date_time + (0, 0, -1)) * 1_000_000_000)
+        rows.append((zip_path, member.name, directory, folder, name, normalize_name(name),
+                     _extension(name), member.size, mtime_ns, 1))
+    return rows
+
+
+class DocCatalog:
+    """
+    search_docs 용 파일 목록을 로컬 SQLite 파일에 보관하는 catalog.
+
+    폴더(MNRO)별로 경로/이름/확장자/크기/mtime 과 zip 내부 파일까지 기록해 두고, 검색은 색인 조회로 끝냅니다.
+    갱신은 디렉터리 단위 증분입니다. 디렉터리의 mtime 이 기록과 같으면 다시 나열하지 않고 (하위 디렉터리만
+    확인), 달라진 디렉터리만 scandir 합니다. zip 은 크기와 mtime 이 바뀐 경우에만 다시 엽니다.
+    제자리에서 내용만 바뀐 파일은 디렉터리 mtime 을 바꾸지 않으므로, full_rescan_interval 이 지나면
+    바뀌지 않은 디렉터리도 다시 나열합니다.
+
+    파일 이름은 NFC + casefold 로 정규화해 두고, 키워드 검색은 이름의 trigram 역색인(NameGramIndex)으로
+    후보를 좁힌 뒤 포함 여부를 확인합니다. 폴더 범위가 작으면 폴더 색인으로 바로 훑습니다.
+
+    live 가 True 이면 (DocWatcher 가 변경 이벤트를 refresh_dirs 로 넣어 주는 중) 이미 catalog 에 있는
+    폴더는 검색 때 확인하지 않고, full_rescan_interval 마다 한 번만 mtime 을 비교합니다.
+    """
+
+    def __init__(self, db_path, root_path, refresh_interval=30.0, full_rescan_interval=3600.0, zip_cache=None):
+        self.db_path = db_path
+        self.zip_cache = zip_cache or ZipDirectoryCache()
+        self.root_path = root_path
+        self.refresh_interval = refresh_interval
+        self.full_rescan_interval = full_rescan_interval
+        self.live = False
+        self.name_index = NameGramIndex()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._refreshed_at = {}  # folder -> monotonic
+        self._searches = 0
+        self._refreshes = 0
+        self._dirs_checked = 0
+        self._dirs_scanned = 0
+        self._zips_read = 0
+        self._index_searches = 0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # catalog 는 디스크에서 다시 만들 수 있으므로 커밋마다 fsync 하지 않음 (WAL 이라 파일은 깨지지 않음)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                if version:
+                    logger.info(f"Rebuilding document catalog (schema {version} -> {SCHEMA_VERSION})")
+                conn.executescript(
+                    "DROP TABLE IF EXISTS name_grams; DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS dirs;"
+                )
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _invalid_folder(folder):
+        # 루트 바로 아래의 폴더 이름 하나만 허용 - 상위 경로, 하위 경로, 드라이브/절대 경로는 거부
+        separators = {os.sep, os.altsep, "/"} - {None}
+        return (not folder or folder in (os.curdir, os.pardir) or "\0" in folder
+                or any(sep in folder for sep in separators) or os.path.splitdrive(folder)[0] != "")
+
+    def normalize_folder(self, folder):
+        """
+        요청받은 폴더 이름을 catalog 에 쓰는 형태로 바꿉니다 (잘못된 이름이면 None).
+        앞뒤 공백과 끝의 경로 구분자를 떼고, Windows 에서는 디스크에 있는 대소문자로 맞춥니다
+        ('mr24010002m' 과 'MR24010002M' 이 같은 폴더를 두 번 catalog 에 넣지 않도록).
+        """
+        folder = str(folder).strip()
+        while folder[-1:] in ("/", os.sep, os.altsep or "/"):
+            folder = folder[:-1]
+        if self._invalid_folder(folder):
+            return None
+        if os.name == "nt":
+            path = os.path.join(self.root_path, folder)
+            if os.path.isdir(path):
+                actual = os.path.basename(os.path.realpath(path))
+                if os.path.normcase(actual) == os.path.normcase(folder):
+                    folder = actual
+        return folder
+
+    def folder_path(self, folder):
+        if self._invalid_folder(folder):
+            raise ValueError(f"Invalid folder name: {folder!r}")
+        return os.path.join(self.root_path, folder)
+
+    def refresh(self, folder, force=False):
+        """
+        folder 의 catalog 를 디스크와 맞춥니다. refresh_interval 안에 이미 갱신했으면 건너뜁니다.
+        Returns False if the folder does not exist.
+        """
+        path = self.folder_path(folder)
+        with self._lock:
+            conn = self._connect()
+            now = time.monotonic()
+            last = self._refreshed_at.get(folder)
+            interval = self.full_rescan_interval if self.live else self.refresh_interval
+            if not force and last is not None and now - last < interval:
+                return conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone() is not None
+
+            if not os.path.isdir(path):
+                self._remove_tree(conn, path)
+                conn.commit()
+                self._refreshed_at.pop(folder, None)
+                return False
+
+            self._refresh_dir(conn, path, folder, None)
+            conn.commit()
+            self._refreshed_at[folder] = now
+            self._refreshes += 1
+            return True
+
+    def refresh_many(self, folders, workers=8):
+        """
+        여러 폴더를 갱신하면서 끝나는 대로 (folder, exists) 를 내보냅니다.
+        catalog 에 아직 없는 폴더(처음 검색)는 workers 개의 스레드에서 동시에 나열하고 (네트워크 공유처럼
+        I/O 대기가 긴 경우), 나열이 끝난 폴더부터 catalog 에 넣습니다. 이미 있는 폴더는 refresh() 와 같음.
+        """
+        cold = []
+        for folder in dict.fromkeys(folders):
+            with self._lock:
+                known = self._connect().execute(
+                    "SELECT 1 FROM dirs WHERE path = ?", (self.folder_path(folder),)
+                ).fetchone() is not None
+            if known:
+                yield folder, self.refresh(folder)
+            else:
+                cold.append(folder)
+
+        # 폴더마다 커밋하면 커밋이 대부분의 시간을 차지하므로 다 넣은 뒤 한 번에 커밋
+        try:
+            if len(cold) <= 1 or workers <= 1:
+                for folder in cold:
+                    yield folder, self._apply_tree(folder, self._list_tree(folder))
+                return
+            with ThreadPoolExecutor(max_workers=min(workers, len(cold)), thread_name_prefix="doc-scan") as pool:
+                futures = {pool.submit(self._list_tree, folder): folder for folder in cold}
+                for future in as_completed(futures):
+                    folder = futures[future]
+                    yield folder, self._apply_tree(folder, future.result())
+        finally:
+            if cold:
+                with self._lock:
+                    self._connect().commit()
+
+    def _list_tree(self, folder):
+        """
+        catalog 에 없는 폴더 전체를 나열합니다 (DB 를 건드리지 않으므로 스레드에서 실행).
+        Returns [(path, parent, mtime_ns, rows, subdirs, zips_read)], 폴더가 없으면 None.
+        """
+        path = self.folder_path(folder)
+        try:
+            stack = [(path, None, os.stat(path).st_mtime_ns)]
+        except OSError:
+            return None
+        listings = []
+        while stack:
+            path, parent, mtime_ns = stack.pop()
+            try:
+                rows, _, subdirs, zips_read = self._list_dir(path, folder, {})
+            except OSError:
+                if parent is None:
+                    return None
+                continue  # 나열하는 사이에 지워진 하위 디렉터리
+            listings.append((path, parent, mtime_ns, rows, subdirs, zips_read))
+            # 하위 디렉터리의 mtime 은 DirEntry 에서 (Windows 는 나열할 때 함께 받아 stat 호출이 없음)
+            stack.extend((subdir, path, subdir_mtime_ns) for subdir, subdir_mtime_ns in subdirs.items())
+        return listings
+
+    def _apply_tree(self, folder, listings):
+        path = self.folder_path(folder)
+        with self._lock:
+            conn = self._connect()
+            if listings is None:
+                self._refreshed_at.pop(folder, None)
+                return False
+            # 스레드에서 나열한 몫의 통계는 여기서 (_lock 안에서) 한 번에 더함
+            self._dirs_scanned += len(listings)
+            self._zips_read += sum(listing[-1] for listing in listings)
+            if conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone() is not None:
+                return True  # 나열하는 동안 다른 검색이 먼저 넣음
+            wall_now = time.time()
+            for dir_path, parent, mtime_ns, rows, subdirs, _ in listings:
+                self._dirs_checked += 1
+                self._apply_dir(conn, dir_path, {}, rows, set(), subdirs)
+                self._record_dir(conn, dir_path, folder, parent, mtime_ns, wall_now)
+            self._refreshed_at[folder] = time.monotonic()
+            self._refreshes += 1
+            return True
+
+    def refresh_dirs(self, paths):
+        """
+        변경 이벤트가 있었던 디렉터리들만 다시 나열합니다 (하위 디렉터리는 mtime 비교).
+        catalog 에 아직 없는 폴더의 디렉터리는 건너뜁니다 - 처음 검색될 때 통째로 읽습니다.
+        Returns the number of directories rescanned.
+        """
+        root = os.path.abspath(self.root_path)
+        refreshed = 0
+        with self._lock:
+            conn = self._connect()
+            for path in sorted(set(paths), key=len):  # 상위 디렉터리부터
+                relative = os.path.relpath(os.path.abspath(path), root)
+                if relative == os.curdir or relative.startswith(os.pardir):
+                    continue
+                folder = relative.split(os.sep)[0]
+                folder_path = self.folder_path(folder)
+                path = os.path.join(self.root_path, relative)  # catalog 에 기록된 경로 형태로
+                if conn.execute("SELECT 1 FROM dirs WHERE path = ?", (folder_path,)).fetchone() is None:
+                    if path == folder_path:
+                        # 새로 생겼거나 다시 만들어진 폴더 - 다음 검색 때 통째로 읽도록 갱신 기록을 지움
+                        self._refreshed_at.pop(folder, None)
+                    continue
+                if path == folder_path:
+                    parent = None
+                else:
+                    parent = os.path.dirname(path)
+                    if conn.execute("SELECT 1 FROM dirs WHERE path = ?", (parent,)).fetchone() is None:
+                        continue  # 부모가 아직 catalog 에 없으면 부모를 다시 나열할 때 함께 들어옴
+                self._refresh_dir(conn, path, folder, parent, force=True)
+                refreshed += 1
+                if parent is None and conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone() is None:
+                    self._refreshed_at.pop(folder, None)  # 폴더가 지워지거나 이동됨
+            conn.commit()
+        return refreshed
+
+    def known_folders(self):
+        with self._lock:
+            conn = self._connect()
+            return [r[0] for r in conn.execute("SELECT folder FROM dirs WHERE parent IS NULL")]
+
+    def _refresh_dir(self, conn, path, folder, parent, force=False):
+        self._dirs_checked += 1
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self._remove_tree(conn, path)
+            return
+
+        row = conn.execute("SELECT mtime_ns, scanned_at FROM dirs WHERE path = ?", (path,)).fetchone()
+        wall_now = time.time()
+        unchanged = (not force and row is not None and row[0] == mtime_ns
+                     and wall_now - row[1] < self.full_rescan_interval)
+        if unchanged:
+            children = [r[0] for r in conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,))]
+        else:
+            children = self._scan_dir(conn, path, folder)
+            self._record_dir(conn, path, folder, parent, mtime_ns, wall_now)
+        for child in children:
+            self._refresh_dir(conn, child, folder, path)
+
+    @staticmethod
+    def _record_dir(conn, path, folder, parent, mtime_ns, wall_now):
+        # 스캔과 같은 mtime 틱 안에서 바뀌었을 수 있으면 다음 번에 다시 나열하도록 -1 로 기록
+        recorded = mtime_ns if wall_now * 1_000_000_000 - mtime_ns > MTIME_RESOLUTION_NS else -1
+        conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, folder, parent, mtime_ns, scanned_at) VALUES (?, ?, ?, ?, ?)",
+            (path, folder, parent, recorded, wall_now),
+        )
+
+    def _scan_dir(self, conn, path, folder):
+        """디렉터리 하나를 다시 나열해서 files 행과 이름 색인을 맞추고, 하위 디렉터리 목록을 돌려줍니다."""
+        known = {
+            (r[0], r[1]): r[2:]
+            for r in conn.execute(
+                "SELECT path, path_in_zip, id, size, mtime_ns, name_norm, in_zip FROM files WHERE dir = ?", (path,)
+            )
+        }
+        rows, kept_zips, subdirs, zips_read = self._list_dir(path, folder, known)
+        self._dirs_scanned += 1  # _scan_dir 는 _lock 안에서만 호출됨
+        self._zips_read += zips_read
+        self._apply_dir(conn, path, known, rows, kept_zips, subdirs)
+        return subdirs
+
+    def _list_dir(self, path, folder, known):
+        """
+        디렉터리 하나를 scandir 로 나열합니다 (DirEntry 의 캐시된 정보 사용, DB 는 건드리지 않음).
+        known 에 크기/mtime 이 같은 zip 은 다시 열지 않고 kept_zips 로 돌려줍니다.
+        통계 카운터는 호출한 쪽에서 _lock 을 잡고 더합니다 (스레드에서도 호출되므로).
+        Returns (rows, kept_zips, subdirs, zips_read) - subdirs: {path: mtime_ns}
+        """
+        rows = []
+        zips_read = 0
+        kept_zips = set()  # 그대로인 zip - 내부 행 모두 유지
+        subdirs = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs[entry.path] = entry.stat(follow_symlinks=False).st_mtime_ns
+                        continue
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+
+                if entry.name.lower().endswith('.zip'):
+                    old = known.get((entry.path, ""))
+                    if old is not None and old[1:3] == (st.st_size, st.st_mtime_ns):
+                        # zip 이 그대로면 내부 목록도 기존 행 유지
+                        kept_zips.add(entry.path)
+                        continue
+                    zips_read += 1
+                    try:
+                        rows.extend(zip_member_rows(self.zip_cache, entry.path, path, folder, st))
+                    except (OSError, zipfile.BadZipFile) as e:
+                        logger.warning(f"ZIP 파일 {entry.path} 처리 중 오류 발생: {str(e)}")
+                    # zip 자체의 크기/mtime 을 기억하기 위한 행 (검색 결과와 이름 색인에는 나오지 않음)
+                    rows.append((entry.path, "", path, folder, entry.name, normalize_name(entry.name), "zip",
+                                 st.st_size, st.st_mtime_ns, -1))
+                else:
+                    rows.append(_file_row(entry.path, path, folder, entry.name, st.st_size, st.st_mtime_ns))
+        return rows, kept_zips, subdirs, zips_read
+
+    def _apply_dir(self, conn, path, known, rows, kept_zips, subdirs):
+        # 바뀐 행만 고치고 (이름이 같으면 색인은 그대로), 새 행은 색인에 추가, 사라진 행은 색인에서도 제거
+        added = []
+        removed = []
+        kept = set()
+        for row in rows:
+            key = (row[0], row[1])
+            if key in kept:
+                continue  # zip 안의 중복 이름
+            kept.add(key)
+            old = known.get(key)
+            if old is None:
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO files ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+                )
+                if cursor.rowcount:
+                    if row[9] >= 0:
+                        added.append((cursor.lastrowid, row[5]))
+                else:
+                    # 같은 파일이 다른 디렉터리 경로 표기로 이미 들어 있음 - 그 행을 이 디렉터리로 옮김
+                    # (경로가 같으면 이름도 같으므로 이름 색인은 그대로)
+                    conn.execute(
+                        "UPDATE files SET dir = ?, folder = ?, size = ?, mtime_ns = ? WHERE path = ? AND path_in_zip = ?",
+                        (row[2], row[3], row[7], row[8], row[0], row[1]),
+                    )
+            elif old[1:3] != (row[7], row[8]):
+                conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (row[7], row[8], old[0]))
+        for key, (file_id, _, _, name_norm, in_zip) in known.items():
+            if key not in kept and key[0] not in kept_zips:
+                if in_zip >= 0:
+                    removed.append((file_id, name_norm))
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        if added:
+            self.name_index.add(conn, added)
+        if removed:
+            self.name_index.remove(conn, removed)
+
+        # 사라진 하위 디렉터리 정리
+        for (old,) in conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,)).fetchall():
+            if old not in subdirs:
+                self._remove_tree(conn, old)
+
+    def _remove_tree(self, conn, path):
+        for (child,) in conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,)).fetchall():
+            self._remove_tree(conn, child)
+        self.name_index.remove(conn, conn.execute(
+            "SELECT id, name_norm FROM files WHERE dir = ? AND in_zip >= 0", (path,)
+        ).fetchall())
+        conn.execute("DELETE FROM files WHERE dir = ?", (path,))
+        conn.execute("DELETE FROM dirs WHERE path = ?", (path,))
+
+    def search(self, folders, keywords=None, doc_type=None):
+        """
+        catalog 에서 파일을 찾습니다. 키워드는 모두 파일 이름에 들어 있어야 하고 (NFC + 대소문자 무시),
+        doc_type 은 확장자입니다. Returns a list of (row dict) in path order.
+        """
+        keywords = [k for k in (normalize_name(k) for k in keywords or []) if k]
+        folder_clause = f"folder IN ({', '.join('?' for _ in folders)})"
+        clauses = [folder_clause, "in_zip >= 0"]
+        params = list(folders)
+        for keyword in keywords:
+            clauses.append("instr(name_norm, ?) > 0")
+            params.append(keyword)
+        if doc_type:
+            suffix = f".{normalize_name(doc_type)}"
+            clauses.append("substr(name_norm, -?) = ?")
+            params.extend([len(suffix), suffix])
+
+        with self._lock:
+            conn = self._connect()
+            self._searches += 1
+            if keywords:
+                terms = self.name_index.plan(conn, keywords)
+                if terms is not None:
+                    if terms[0][0] == 0:
+                        return []  # 색인에 없는 gram - 찾을 것이 없음
+                    # 가장 드문 gram 의 posting 이 폴더 범위보다 작을 때, 또는 흔한 gram 뿐이면 범위가 아주 클 때만
+                    df = terms[0][0]
+                    limit = df + 1 if df < self.name_index.df_cap else SCAN_LIMIT
+                    scope = conn.execute(
+                        f"SELECT count(*) FROM (SELECT 1 FROM files WHERE {folder_clause} LIMIT ?)",
+                        list(folders) + [limit],
+                    ).fetchone()[0]
+                    if scope >= limit:
+                        self._index_searches += 1
+                        sql, term_params = self.name_index.candidates_sql(terms)
+                        clauses.insert(0, f"id IN ({sql})")
+                        params = term_params + params
+            rows = conn.execute(
+                "SELECT path, path_in_zip, folder, name, ext, size, mtime_ns, in_zip FROM files "
+                f"WHERE {' AND '.join(clauses)} ORDER BY folder, path, path_in_zip",
+                params,
+            ).fetchall()
+        return [
+            {"path": r[0], "path_in_zip": r[1], "folder": r[2], "name": r[3], "ext": r[4],
+             "size": r[5], "mtime_ns": r[6], "in_zip": bool(r[7])}
+            for r in rows
+        ]
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            files, dirs = conn.execute(
+                "SELECT (SELECT count(*) FROM files WHERE in_zip >= 0), (SELECT count(*) FROM dirs)"
+            ).fetchone()
+            grams = conn.execute("SELECT count(*) FROM name_grams").fetchone()[0]
+            return {
+                "path": self.db_path,
+                "files": files,
+                "dirs": dirs,
+                "name_grams": grams,
+                "searches": self._searches,
+                "index_searches": self._index_searches,
+                "refreshes": self._refreshes,
+                "dirs_checked": self._dirs_checked,
+                "dirs_scanned": self._dirs_scanned,
+                "zips_read": self._zips_read,
+            }
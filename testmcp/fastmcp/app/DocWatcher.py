@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # watchdog 이 없으면 디렉터리 mtime 폴링으로 대신함
+    FileSystemEventHandler = object
+    Observer = None
+
+
+logger = logging.getLogger("search_docs.watcher")
+
+# 원격 변경을 알림으로 받지 못하는 네트워크 파일 시스템 (/proc/mounts 의 fstype)
+NETWORK_FS_TYPES = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p", "afs", "davfs")
+
+
+def is_network_path(path):
+    """
+    path 가 네트워크 공유에 있는지. 네트워크 공유에서는 inotify/ReadDirectoryChangesW 가 시작은 되지만
+    다른 PC 에서 바꾼 내용은 알림이 오지 않는 경우가 많습니다.
+    """
+    path = os.path.abspath(path)
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True  # UNC 경로 (\\server\share)
+        import ctypes  # Windows 에서만 필요
+        drive = os.path.splitdrive(path)[0] + "\\"
+        return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE (네트워크 드라이브 연결)
+    try:
+        with open("/proc/mounts", encoding="utf-8") as mounts:
+            entries = [line.split()[1:3] for line in mounts if len(line.split()) >= 3]
+    except OSError:
+        return False
+    # 가장 긴 마운트 지점이 path 를 담고 있는 파일 시스템
+    best, fstype = "", None
+    for mount_point, kind in entries:
+        mount_point = mount_point.replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, kind
+    return fstype is not None and fstype.startswith(NETWORK_FS_TYPES)
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed", "closed_no_write"):
+            return  # 읽기만 한 경우
+        paths = [event.src_path]
+        if getattr(event, "dest_path", ""):
+            paths.append(event.dest_path)
+        root = os.path.abspath(self.watcher.catalog.root_path)
+        dirs = []
+        for path in paths:
+            path = os.fsdecode(path)
+            if event.is_directory and event.event_type == "modified":
+                dirs.append(path)  # 디렉터리 안의 항목이 바뀜
+                continue
+            parent = os.path.dirname(path)
+            dirs.append(parent)  # 파일 변경, 디렉터리 생성/삭제/이동은 부모 디렉터리
+            if os.path.abspath(parent) == root:
+                # 루트 바로 아래 = 폴더(MNRO) 자체가 생기거나 지워지거나 이동됨. 루트는 catalog 에 없으므로
+                # 폴더 경로를 직접 넣음 (Windows 는 지워진 디렉터리를 파일 이벤트로 알리기도 함)
+                dirs.append(path)
+        self.watcher.notify(dirs)
+
+
+class DocWatcher:
+    """
+    문서 루트의 변경 이벤트를 받아 DocCatalog 에 디렉터리 단위로 반영하는 백그라운드 서비스.
+
+    watchdog 이 있으면 OS 알림(Linux inotify, Windows ReadDirectoryChangesW, macOS FSEvents)을,
+    없거나 시작에 실패하면 poll_interval 마다 catalog 에 있는 폴더의 디렉터리 mtime 을 비교하는
+    폴링을 씁니다. 대량 복사처럼 이벤트가 몰리면 debounce 초 동안 조용해질 때까지 모았다가
+    (단, 최대 max_delay 초) 바뀐 디렉터리만 한 번에 다시 나열합니다. zip 은 DocCatalog 가 크기와
+    mtime 이 바뀐 경우에만 다시 엽니다.
+
+    알림을 믿을 수 있을 때만 catalog.live 를 켜서 검색 때의 폴더 확인을 건너뜁니다. trust_events 가
+    None 이면 문서 루트가 네트워크 공유인지로 정합니다 - 네트워크 공유에서는 알림이 시작돼도 다른 PC 의
+    변경이 오지 않을 수 있으므로, 알림은 그대로 받되 검색 때 refresh_interval 확인도 계속합니다.
+    """
+
+    def __init__(self, catalog, debounce=1.0, max_delay=10.0, poll_interval=10.0, trust_events=None):
+        self.catalog = catalog
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.trust_events = trust_events
+        self.mode = None
+        self.trusted = False
+        self._observer = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._cond = threading.Condition()
+        self._pending = set()
+        self._first_event = None
+        self._last_event = None
+        self._events = 0
+        self._flushes = 0
+        self._dirs_refreshed = 0
+        self._errors = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if not os.path.isdir(self.catalog.root_path):
+            logger.warning(f"Document root {self.catalog.root_path} does not exist; watcher not started")
+            return
+
+        self._stop.clear()
+        if Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_EventHandler(self), self.catalog.root_path, recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                self.mode = type(observer).__name__
+            except OSError as e:
+                # 예: inotify watch 수 한도 초과, 네트워크 드라이브
+                logger.warning(f"File system notifications unavailable ({str(e)}); falling back to polling")
+                self._observer = None
+        if self._observer is None:
+            self.mode = "polling"
+            self.trusted = True  # 폴링은 디렉터리 mtime 을 직접 비교
+        elif self.trust_events is None:
+            self.trusted = not is_network_path(self.catalog.root_path)
+        else:
+            self.trusted = bool(self.trust_events)
+
+        self._thread = threading.Thread(target=self._run, name="doc-watcher", daemon=True)
+        self._thread.start()
+        self.catalog.live = self.trusted
+        logger.info(f"Watching {self.catalog.root_path} ({self.mode}"
+                    f"{'' if self.trusted else ', notifications not trusted - folders are still checked on search'})")
+
+    def stop(self):
+        self.catalog.live = False
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def notify(self, dirs):
+        """변경된 디렉터리들을 대기열에 넣습니다 (watchdog 스레드에서 호출)."""
+        now = time.monotonic()
+        with self._cond:
+            self._pending.update(dirs)
+            self._events += 1
+            if self._first_event is None:
+                self._first_event = now
+            self._last_event = now
+            self._cond.notify()
+
+    def _run(self):
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.is_set():
+            with self._cond:
+                now = time.monotonic()
+                if self._pending:
+                    # 마지막 이벤트 후 debounce 초, 또는 첫 이벤트 후 max_delay 초
+                    due = min(self._last_event + self.debounce, self._first_event + self.max_delay)
+                else:
+                    due = next_poll if self.mode == "polling" else None
+                if due is not None and now < due:
+                    self._cond.wait(due - now)
+                    continue
+                if due is None:
+                    self._cond.wait()
+                    continue
+                pending, self._pending = self._pending, set()
+                self._first_event = self._last_event = None
+
+            try:
+                if pending:
+                    self._flush(pending)
+                else:
+                    self._poll()
+                    next_poll = time.monotonic() + self.poll_interval
+            except Exception as e:
+                self._errors += 1
+                logger.error(f"Failed to update document catalog: {str(e)}")
+
+    def _flush(self, dirs):
+        refreshed = self.catalog.refresh_dirs(dirs)
+        self._flushes += 1
+        self._dirs_refreshed += refreshed
+        logger.info(f"Applied changes in {len(dirs)} directories ({refreshed} rescanned)")
+
+    def _poll(self):
+        for folder in self.catalog.known_folders():
+            if self._stop.is_set():
+                return
+            self.catalog.refresh(folder, force=True)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "mode": self.mode,
+                "trusted": self.trusted,
+                "running": self._thread is not None,
+                "pending_dirs": len(self._pending),
+                "events": self._events,
+                "flushes": self._flushes,
+                "dirs_refreshed": self._dirs_refreshed,
+                "errors": self._errors,
+            }
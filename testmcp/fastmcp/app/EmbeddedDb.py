@@ -0,0 +1,365 @@
+import datetime
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger("rdb_search_tool.embedded_db")
+
+
+# SQLite 에서는 스키마 이름이 항상 main
+SQLITE_SCHEMA = "main"
+
+# 스키마 지문 - 테이블/뷰 정의 전체 (SchemaCache 가 sha256 으로 해시)
+FINGERPRINT_SQL = "SELECT group_concat(type || ':' || name || ':' || coalesce(sql, ''), ';') FROM sqlite_master"
+
+# psycopg2 의 cursor.description type_code 와 같은 OID 로 맞춰서 ResultFormat 이 그대로 쓰도록 함
+_TYPE_CODES = {bool: 16, int: 20, float: 701, str: 25, bytes: 17}
+_NUMERIC_CODES = {20, 701}
+
+_SET_TIMEOUT = re.compile(r"^\s*SET\s+LOCAL\s+statement_timeout\s*=\s*(\S+?)\s*;?\s*$", re.IGNORECASE)
+_SET_TRANSACTION = re.compile(r"^\s*SET\s+TRANSACTION\b", re.IGNORECASE)
+_SET_OTHER = re.compile(r"^\s*SET\s+", re.IGNORECASE)
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+
+def _excel_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _column_type(values):
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "INTEGER"
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def build_from_excel(xlsx_path, db_path, table_name="rfq_search", primary_key="MNRO"):
+    """
+    RDB.xlsx 를 SQLite 파일로 한 번만 변환합니다. db_path 가 엑셀 파일보다 새로우면 그대로 씁니다.
+
+    첫 번째 시트는 table_name, 나머지 시트는 시트 이름을 테이블 이름으로 씁니다.
+    primary_key 컬럼이 있고 값이 유일하면 PRIMARY KEY 로 만듭니다.
+    """
+    if os.path.exists(db_path) and os.path.getmtime(db_path) >= os.path.getmtime(xlsx_path):
+        return db_path
+
+    from openpyxl import load_workbook  # 엑셀 변환할 때만 필요
+
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    workbook = load_workbook(xlsx_path, read_only=True, data_only=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        total_rows = 0
+        for sheet_index, sheet in enumerate(workbook.worksheets):
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                continue
+            columns = [str(h).strip() if h is not None else f"column_{i}" for i, h in enumerate(header)]
+            data = [[_excel_value(v) for v in row] for row in rows if any(v is not None for v in row)]
+
+            name = table_name if sheet_index == 0 else sheet.title
+            definitions = [f"{_quote(col)} {_column_type([row[i] for row in data])}" for i, col in enumerate(columns)]
+            if primary_key in columns:
+                keys = [row[columns.index(primary_key)] for row in data]
+                if None not in keys and len(set(keys)) == len(keys):
+                    definitions.append(f"PRIMARY KEY ({_quote(primary_key)})")
+            conn.execute(f"CREATE TABLE {_quote(name)} ({', '.join(definitions)})")
+            conn.executemany(
+                f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' for _ in columns)})",
+                (row[:len(columns)] + [None] * (len(columns) - len(row)) for row in data),
+            )
+            total_rows += len(data)
+        conn.commit()
+    finally:
+        conn.close()
+        workbook.close()
+
+    os.replace(tmp_path, db_path)
+    logger.info(f"Built {db_path} from {xlsx_path}: {total_rows} rows in {time.perf_counter() - started:.2f}s")
+    return db_path
+
+
+def fetch_catalog(conn, schema_name=SQLITE_SCHEMA):
+    """SchemaCache.fetch_schema_catalog 와 같은 구조의 테이블 리스트 (SQLite 판)"""
+    raw = conn.raw
+    tables = []
+    names = raw.execute(
+        "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    for name, kind in names:
+        info = raw.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+        pk = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+        columns = [{
+            "name": row[1],
+            "type": (row[2] or "text").lower(),
+            "not_null": bool(row[3]) or bool(row[5]),
+            "comment": None,
+            "pk": bool(row[5]),
+        } for row in info]
+
+        foreign_keys = {}
+        for fk in raw.execute(f"PRAGMA foreign_key_list({_quote(name)})").fetchall():
+            entry = foreign_keys.setdefault(fk[0], {"columns": [], "ref_schema": schema_name,
+                                                    "ref_table": fk[2], "ref_columns": []})
+            entry["columns"].append(fk[3])
+            entry["ref_columns"].append(fk[4])
+
+        tables.append({
+            "schema": schema_name,
+            "name": name,
+            "kind": kind,  # SchemaCache 와 같은 "table" / "view"
+            "comment": None,
+            "columns": columns,
+            "primary_key": pk,
+            "foreign_keys": list(foreign_keys.values()),
+        })
+    return tables
+
+
+class EmbeddedCursor:
+    """sqlite3 커서를 psycopg2 커서처럼 쓰기 위한 래퍼 (with 문, %s 파라미터, 이름 있는 커서 인자)"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+        self._type_codes = {}
+        self.itersize = 2000
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._cursor.close()
+
+    def execute(self, statement, params=None):
+        self._type_codes = {}
+        if self.connection.translate(statement, params):
+            return
+        if params is not None:
+            if isinstance(params, dict):
+                statement = _NAMED_PARAM.sub(r":\1", statement)
+            else:
+                statement = statement.replace("%s", "?")
+            self._cursor.execute(statement, params)
+        else:
+            self._cursor.execute(statement)
+
+    def _track(self, rows):
+        # SQLite 는 컬럼 타입이 값마다 다를 수 있으므로 읽은 모든 값을 봄 (정수 뒤에 실수가 오면 실수)
+        codes = self._type_codes
+        for row in rows:
+            for i, value in enumerate(row):
+                if value is None:
+                    continue
+                code = _TYPE_CODES.get(type(value), 25)
+                seen = codes.get(i)
+                if seen is None or seen == code:
+                    codes[i] = code
+                elif {seen, code} <= _NUMERIC_CODES:
+                    codes[i] = _TYPE_CODES[float]
+                else:
+                    codes[i] = _TYPE_CODES[str]
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._track([row])
+        return row
+
+    def fetchmany(self, size=None):
+        return self._track(self._cursor.fetchmany(size if size is not None else self.itersize))
+
+    def fetchall(self):
+        return self._track(self._cursor.fetchall())
+
+    @property
+    def description(self):
+        if self._cursor.description is None:
+            return None
+        return [(col[0], self._type_codes.get(i)) + (None,) * 5 for i, col in enumerate(self._cursor.description)]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+
+class EmbeddedConnection:
+    """
+    읽기 전용 sqlite3 연결을 psycopg2 연결처럼 감쌉니다.
+
+    PostgreSQL 세션 명령은 SQLite 에 맞게 바꿉니다.
+    - SET TRANSACTION ...          -> BEGIN (같은 트랜잭션 안의 조회는 같은 스냅샷을 봄)
+    - SET LOCAL statement_timeout  -> progress handler 로 시간이 지나면 interrupt
+    - 그 밖의 SET (search_path 등)  -> 무시
+    """
+
+    def __init__(self, db_path, mmap_size):
+        self.raw = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False,
+                                   isolation_level=None)
+        self.raw.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        self.raw.execute("PRAGMA query_only = 1")
+        self._deadline = None
+        self.closed = False
+
+    def translate(self, statement, params=None):
+        """PostgreSQL 세션 명령이면 처리하고 True"""
+        match = _SET_TIMEOUT.match(statement)
+        if match:
+            value = params[0] if match.group(1) == "%s" and params else match.group(1).strip("'")
+            timeout_ms = int(value)
+            self._set_deadline(time.monotonic() + timeout_ms / 1000 if timeout_ms > 0 else None)
+            return True
+        if _SET_TRANSACTION.match(statement):
+            if not self.raw.in_transaction:
+                self.raw.execute("BEGIN")
+            return True
+        return bool(_SET_OTHER.match(statement))
+
+    def _set_deadline(self, deadline):
+        self._deadline = deadline
+        if deadline is None:
+            self.raw.set_progress_handler(None, 0)
+        else:
+            self.raw.set_progress_handler(lambda: time.monotonic() > self._deadline, 10000)
+
+    def cursor(self, name=None):
+        return EmbeddedCursor(self)
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.commit()
+        self._set_deadline(None)
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.rollback()
+        self._set_deadline(None)
+
+    def cancel(self):
+        self.raw.interrupt()
+
+    def close(self):
+        self.raw.close()
+        self.closed = True
+
+
+class EmbeddedPool:
+    """
+    DbPool 과 같은 인터페이스(open/close/connection/stats)의 SQLite 연결 풀.
+    데이터베이스 파일은 처음 열 때 RDB.xlsx 에서 만들어지고, 이후에는 읽기 전용으로 mmap 됩니다.
+    """
+
+    def __init__(self, db_path, xlsx_path=None, table_name="rfq_search", maxconn=10,
+                 timeout=10.0, mmap_size=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.xlsx_path = xlsx_path
+        self.table_name = table_name
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._opened = False
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+
+    def open(self):
+        with self._lock:
+            if self._opened:
+                return
+            if self.xlsx_path and os.path.exists(self.xlsx_path):
+                build_from_excel(self.xlsx_path, self.db_path, self.table_name)
+            if not os.path.exists(self.db_path):
+                raise sqlite3.OperationalError(f"Embedded database {self.db_path} does not exist")
+            self._opened = True
+
+    def close(self):
+        with self._lock:
+            self._opened = False
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+    def getconn(self):
+        self.open()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise sqlite3.OperationalError(f"Timed out after {self.timeout}s waiting for an embedded connection")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = EmbeddedConnection(self.db_path, self.mmap_size)
+            except Exception:
+                self._slots.release()
+                raise
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            close = True
+        if close:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "engine": "sqlite",
+                "path": self.db_path,
+                "open": self._opened,
+                "max_size": self.maxconn,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+            }
+
@@ -0,0 +1,383 @@
+"""
+쿼리 로그 기반 인덱스 추천 - search_rdb 가 실행한 SQL 에서 조건절 컬럼과 빈도를 모으고,
+후보 인덱스를 EXPLAIN 으로 확인한 뒤 (선택적으로) 실제로 만듭니다.
+
+입력은 QueryLog 의 JSON 로그(logs/rdb_queries.jsonl) 또는 logs/rdb_search.log 입니다.
+- 등호/범위/IN/BETWEEN 조건 컬럼 -> B-tree
+- LIKE/ILIKE/정규식 조건 텍스트 컬럼 -> pg_trgm GIN (gin_trgm_ops)
+
+후보마다 트랜잭션 안에서 인덱스를 만들어 EXPLAIN ANALYZE 전/후를 비교하고 롤백합니다
+(그동안 해당 테이블 쓰기는 잠깁니다). --apply 를 주면 추천된 인덱스를 CREATE INDEX
+CONCURRENTLY 로 만들고 다시 측정합니다. 결과는 --report 파일에 JSON 한 줄로 남습니다.
+
+사용법 (fastmcp/app 에서 실행, .env 의 DB 설정 사용):
+    python IndexAdvisor.py
+    python IndexAdvisor.py --log logs/rdb_search.log --min-count 3 --apply
+"""
+import argparse
+import ast
+import json
+import logging
+import os
+import re
+import statistics
+import time
+from collections import Counter
+
+import psycopg2
+
+from QueryLog import read_query_log
+from SqlValidator import tokenize, quote_ident, fold_ident, ident_value, is_name, table_aliases
+
+
+logger = logging.getLogger("rdb_search_tool.index_advisor")
+
+
+# rdb_search.log 에서 실행된 SQL 이 남는 메시지
+_LOG_RECORD = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} - ", re.M)
+_LOG_SQL = re.compile(r" - INFO - (?:Generated SQL query|SQL cache hit|SQL query modified): (.*)", re.S)
+_LOG_BATCH_SQL = re.compile(r" - INFO - Batch SQL: (\[.*\])", re.S)
+
+_BTREE_OPERATORS = frozenset(["=", "<", ">", "<=", ">=", "in", "between"])
+_PATTERN_OPERATORS = frozenset(["like", "ilike", "~", "~*"])
+_MODIFYING = frozenset(["insert", "update", "delete", "merge", "truncate", "alter", "drop", "create", "grant", "copy"])
+_TEXT_TYPES = ("text", "character varying", "varchar", "character", "char", "citext")
+
+# 스키마의 기존 인덱스 - (테이블, 첫 번째 컬럼, 방식)
+EXISTING_INDEXES_SQL = """
+SELECT c.relname, a.attname, am.amname, coalesce(opc.opcname, '')
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_class ic ON ic.oid = i.indexrelid
+JOIN pg_am am ON am.oid = ic.relam
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+LEFT JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+WHERE n.nspname = %s
+"""
+
+
+def read_search_log(path):
+    """rdb_search.log 에서 생성/수정/캐시 적중된 SQL 을 순서대로 읽습니다 (여러 줄 SQL 포함)."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    starts = [m.start() for m in _LOG_RECORD.finditer(text)]
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        record = text[start:end].rstrip()
+        match = _LOG_SQL.search(record)
+        if match:
+            yield match.group(1).strip()
+            continue
+        match = _LOG_BATCH_SQL.search(record)
+        if match:
+            try:
+                statements = ast.literal_eval(match.group(1))
+            except (ValueError, SyntaxError):
+                continue
+            yield from (s for s in statements if isinstance(s, str))
+
+
+def read_statements(path):
+    return read_query_log(path) if path.endswith(".jsonl") else read_search_log(path)
+
+
+def _is_select(tokens):
+    words = [t[1].lower() for t in tokens if t[0] == "ident"]
+    return bool(words) and words[0] in ("select", "with") and not _MODIFYING.intersection(words)
+
+
+def predicate_columns(sql_query, tables):
+    """
+    조건절에서 비교되는 컬럼 [(table, column, method)] - method 는 "btree" 또는 "trgm".
+    SELECT 문만 보고, 함수로 감싼 컬럼(lower(col) = ...)이나 <> 비교는 인덱스로 이득이 없어 건너뜁니다.
+    """
+    tokens = [t for t in tokenize(sql_query) if t[0] not in ("ws", "comment")]
+    if not _is_select(tokens):
+        return []
+
+    columns = {t["name"]: {fold_ident(c["name"]): c for c in t["columns"]} for t in tables}
+    aliases, referenced = table_aliases(sql_query, tables)
+
+    found = []
+    for i, token in enumerate(tokens):
+        if not is_name(token) or (i + 1 < len(tokens) and tokens[i + 1][1] in (".", "(")):
+            continue
+        method = _predicate_method(tokens, i)
+        if method is None:
+            continue
+
+        name = fold_ident(ident_value(token))
+        if i > 1 and tokens[i - 1][1] == ".":
+            table = aliases.get(fold_ident(ident_value(tokens[i - 2])))
+            candidates = [table] if table else []
+        else:
+            candidates = referenced
+        for table in candidates:
+            column = columns[table].get(name)
+            if column is None:
+                continue
+            if method == "trgm" and not column["type"].lower().startswith(_TEXT_TYPES):
+                break
+            found.append((table, column["name"], method))
+            break
+    return found
+
+
+def _predicate_method(tokens, i):
+    nxt = tokens[i + 1][1].lower() if i + 1 < len(tokens) else ""
+    if nxt == "not" and i + 2 < len(tokens):
+        nxt = tokens[i + 2][1].lower()
+    if nxt in _BTREE_OPERATORS:
+        return "btree"
+    if nxt in _PATTERN_OPERATORS:
+        return "trgm"
+    # 'value' = col 처럼 리터럴이 앞에 오는 경우
+    if i > 1 and tokens[i - 1][1] in ("=", "<", ">", "<=", ">=") and tokens[i - 2][0] in ("string", "number"):
+        return "btree"
+    return None
+
+
+def index_name(table, column, method):
+    """PostgreSQL 처럼 63 바이트(UTF-8)에서 글자 단위로 자른 인덱스 이름 - 한글 한 글자는 3 바이트"""
+    name = f"{table}_{column}_{'trgm' if method == 'trgm' else 'idx'}"
+    return name.encode("utf-8")[:63].decode("utf-8", errors="ignore")
+
+
+def index_ddl(schema_name, table, column, method, concurrently=False):
+    name = quote_ident(index_name(table, column, method))
+    target = f"{quote_ident(schema_name)}.{quote_ident(table)}"
+    prefix = "CREATE INDEX CONCURRENTLY IF NOT EXISTS" if concurrently else "CREATE INDEX IF NOT EXISTS"
+    if method == "trgm":
+        return f"{prefix} {name} ON {target} USING gin ({quote_ident(column)} gin_trgm_ops)"
+    return f"{prefix} {name} ON {target} ({quote_ident(column)})"
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+class IndexAdvisor:
+    """
+    조건절 컬럼 빈도 -> 기존 인덱스 제외 -> 트랜잭션 안에서 만들어 보고 EXPLAIN ANALYZE 전/후 비교.
+
+    min_count 번 이상 조건에 나온 컬럼만 후보가 되고, 후보마다 최근 SQL samples 개로 측정합니다.
+    인덱스가 계획에 쓰이고 실행 시간이 min_speedup 배 이상 빨라지면 recommended 입니다.
+    """
+
+    def __init__(self, tables, schema_name, min_count=2, samples=5, runs=3, min_speedup=1.2,
+                 statement_timeout_ms=30000):
+        self.tables = tables
+        self.schema_name = schema_name
+        self.min_count = min_count
+        self.samples = samples
+        self.runs = runs
+        self.min_speedup = min_speedup
+        self.statement_timeout_ms = statement_timeout_ms
+
+    def mine(self, statements):
+        """조건절 컬럼 빈도와 컬럼별 예시 SQL. Returns (Counter, {(table, column, method): [sql]})"""
+        counts = Counter()
+        examples = {}
+        for sql_query in statements:
+            for key in set(predicate_columns(sql_query, self.tables)):
+                counts[key] += 1
+                bucket = examples.setdefault(key, [])
+                if sql_query not in bucket:
+                    bucket.append(sql_query)
+                    del bucket[:-self.samples]  # 최근 것만 유지
+        return counts, examples
+
+    def existing_indexes(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(EXISTING_INDEXES_SQL, (self.schema_name,))
+            rows = cursor.fetchall()
+        conn.rollback()
+        existing = set()
+        for table, column, access_method, opclass in rows:
+            if opclass in ("gin_trgm_ops", "gist_trgm_ops"):
+                existing.add((table, column, "trgm"))
+            elif access_method == "btree":
+                existing.add((table, column, "btree"))
+        return existing
+
+    def candidates(self, conn, statements):
+        counts, examples = self.mine(statements)
+        existing = self.existing_indexes(conn)
+        result = []
+        for (table, column, method), count in counts.most_common():
+            if count < self.min_count or (table, column, method) in existing:
+                continue
+            result.append({
+                "table": table,
+                "column": column,
+                "method": method,
+                "count": count,
+                "ddl": index_ddl(self.schema_name, table, column, method, concurrently=True),
+                "statements": examples[(table, column, method)],
+            })
+        return result
+
+    def _measure(self, cursor, statements):
+        """
+        statements 를 EXPLAIN ANALYZE 로 runs 번씩 실행해서 {sql: (median ms, cost, 사용한 인덱스)}.
+        실패한 SQL 은 세이브포인트로 되돌리고 빼 둡니다.
+        """
+        measured = {}
+        for sql_query in statements:
+            cursor.execute("SAVEPOINT advisor_measure")
+            try:
+                timings = []
+                for _ in range(self.runs):
+                    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql_query.strip().rstrip(';')}")
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    timings.append(plan[0]["Execution Time"])
+                indexes = {node["Index Name"] for node in _plan_nodes(plan[0]["Plan"]) if "Index Name" in node}
+                measured[sql_query] = (statistics.median(timings), plan[0]["Plan"]["Total Cost"], indexes)
+                cursor.execute("RELEASE SAVEPOINT advisor_measure")
+            except psycopg2.Error as e:
+                logger.warning(f"Skipping statement that failed to EXPLAIN: {str(e).strip()}")
+                cursor.execute("ROLLBACK TO SAVEPOINT advisor_measure")
+        return measured
+
+    def evaluate(self, conn, candidate):
+        """인덱스를 트랜잭션 안에서 만들어 전/후를 측정하고 롤백합니다. candidate 에 결과를 채워 돌려줍니다."""
+        name = index_name(candidate["table"], candidate["column"], candidate["method"])
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", (self.statement_timeout_ms,))
+                before = self._measure(cursor, candidate["statements"])
+                if candidate["method"] == "trgm":
+                    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                started = time.perf_counter()
+                cursor.execute(index_ddl(self.schema_name, candidate["table"], candidate["column"], candidate["method"]))
+                build_ms = (time.perf_counter() - started) * 1000
+                after = self._measure(cursor, list(before))
+        finally:
+            conn.rollback()
+
+        common = [sql_query for sql_query in before if sql_query in after]
+        before_ms = sum(before[s][0] for s in common)
+        after_ms = sum(after[s][0] for s in common)
+        used = any(name in after[s][2] for s in common)
+        candidate.update({
+            "measured_statements": len(common),
+            "before_ms": round(before_ms, 3),
+            "after_ms": round(after_ms, 3),
+            "before_cost": round(sum(before[s][1] for s in common), 2),
+            "after_cost": round(sum(after[s][1] for s in common), 2),
+            "build_ms": round(build_ms, 3),
+            "index_used": used,
+            "recommended": bool(common) and used and after_ms * self.min_speedup <= before_ms,
+        })
+        return candidate
+
+    def apply(self, conn, candidate):
+        """추천된 인덱스를 CONCURRENTLY 로 만들고 (테이블 잠금 없음) 다시 측정합니다."""
+        autocommit = conn.autocommit
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                if candidate["method"] == "trgm":
+                    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                started = time.perf_counter()
+                cursor.execute(candidate["ddl"])
+                candidate["build_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                cursor.execute(f"ANALYZE {quote_ident(self.schema_name)}.{quote_ident(candidate['table'])}")
+        finally:
+            conn.autocommit = autocommit
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION READ ONLY")
+                cursor.execute("SET LOCAL statement_timeout = %s", (self.statement_timeout_ms,))
+                applied = self._measure(cursor, candidate["statements"])
+        finally:
+            conn.rollback()
+        candidate["applied"] = True
+        candidate["applied_ms"] = round(sum(ms for ms, _, _ in applied.values()), 3)
+        return candidate
+
+    def run(self, conn, statements, apply=False):
+        candidates = self.candidates(conn, statements)
+        for candidate in candidates:
+            try:
+                self.evaluate(conn, candidate)
+                if apply and candidate["recommended"]:
+                    self.apply(conn, candidate)
+            except psycopg2.Error as e:
+                # 예: pg_trgm 확장이 설치되어 있지 않음
+                logger.error(f"Failed to evaluate {candidate['table']}.{candidate['column']}: {str(e).strip()}")
+                candidate.update({"recommended": False, "error": str(e).strip().splitlines()[0]})
+        return candidates
+
+
+def _default_logs(app_dir, log_dir):
+    for path in (os.path.join(log_dir, "rdb_queries.jsonl"), os.path.join(log_dir, "rdb_search.log"),
+                 os.path.join(app_dir, "logs", "rdb_search.log")):
+        if os.path.exists(path):
+            return [path]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", action="append", help="rdb_queries.jsonl 또는 rdb_search.log (여러 번 지정 가능)")
+    parser.add_argument("--min-count", type=int, default=2, help="후보가 되기 위한 최소 등장 횟수")
+    parser.add_argument("--samples", type=int, default=5, help="후보마다 측정할 SQL 수")
+    parser.add_argument("--runs", type=int, default=3, help="SQL 마다 EXPLAIN ANALYZE 반복 횟수 (중앙값)")
+    parser.add_argument("--min-speedup", type=float, default=1.2, help="추천 기준 실행 시간 개선 배수")
+    parser.add_argument("--apply", action="store_true", help="추천된 인덱스를 CREATE INDEX CONCURRENTLY 로 생성")
+    parser.add_argument("--report", help="결과를 JSON 한 줄로 덧붙일 파일 (기본: logs/index_advisor.jsonl)")
+    args = parser.parse_args()
+
+    import SearchRdb
+    from SchemaCache import fetch_schema_catalog
+
+    if SearchRdb.USE_SQLITE:
+        parser.error("IndexAdvisor works on the PostgreSQL engine only (RDB_ENGINE=postgres)")
+
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    logs = args.log or _default_logs(app_dir, SearchRdb.log_dir)
+    if not logs:
+        parser.error("no query log found; pass --log")
+    statements = [sql_query for path in logs for sql_query in read_statements(path)]
+
+    conn = psycopg2.connect(**SearchRdb.DB_CONFIG)
+    try:
+        tables = fetch_schema_catalog(conn, SearchRdb.DB_SCHEMA)
+        conn.rollback()
+        advisor = IndexAdvisor(tables, SearchRdb.DB_SCHEMA, min_count=args.min_count, samples=args.samples,
+                               runs=args.runs, min_speedup=args.min_speedup)
+        candidates = advisor.run(conn, statements, apply=args.apply)
+    finally:
+        conn.close()
+
+    print(f"{len(statements)} statements from {', '.join(logs)}")
+    if not candidates:
+        print(f"No predicate column appears at least {args.min_count} times without an index.")
+    for c in candidates:
+        mark = "APPLIED" if c.get("applied") else ("recommend" if c["recommended"] else "skip")
+        line = f"[{mark:9}] {c['table']}.{c['column']} ({c['method']}, {c['count']}x) "
+        if "error" in c:
+            line += f"error: {c['error']}"
+        else:
+            line += (f"{c['before_ms']:.2f} ms -> {c['after_ms']:.2f} ms over "
+                     f"{c['measured_statements']} statements")
+        if c.get("applied"):
+            line += f", {c['applied_ms']:.2f} ms after CREATE INDEX"
+        print(line)
+        print(f"            {c['ddl']};")
+
+    report = args.report or os.path.join(SearchRdb.log_dir, "index_advisor.jsonl")
+    with open(report, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": round(time.time(), 3), "logs": logs, "statements": len(statements),
+                            "candidates": candidates}, ensure_ascii=False) + "\n")
+    print(f"Report appended to {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import threading
+
+
+class Metrics:
+    """카운터와 관측값(count/avg/max)을 모아 두는 간단한 스레드 안전 메트릭 저장소"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._observations = {}
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        with self._lock:
+            count, total, peak = self._observations.get(name, (0, 0.0, value))
+            self._observations[name] = (count + 1, total + value, max(peak, value))
+
+    def snapshot(self):
+        with self._lock:
+            result = dict(self._counters)
+            for name, (count, total, peak) in self._observations.items():
+                result[name] = {
+                    "count": count,
+                    "avg": round(total / count, 2) if count else 0.0,
+                    "max": round(peak, 2),
+                }
+            return result
@@ -0,0 +1,100 @@
+import unicodedata
+
+
+# 이름 끝 표시 - "구매" 처럼 이름 끝에 오는 2글자 키워드도 trigram 접두사("구매\x03")로 찾을 수 있게 함
+END_MARK = "\x03"
+
+# gram 빈도를 셀 때의 상한 (이보다 흔한 gram 은 모두 같은 "흔함"으로 취급)
+DF_CAP = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS name_grams (
+    gram TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, file_id)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_name(text):
+    """파일 이름/키워드 정규화 - NFC (macOS 의 NFD 한글 포함) + casefold"""
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+def name_grams(name_norm):
+    """정규화된 이름의 trigram 집합 (끝 표시 포함). 두 글자 이하 이름은 통째로 하나의 gram."""
+    padded = name_norm + END_MARK
+    if len(padded) < 3:
+        return {padded}
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _upper_bound(prefix):
+    return prefix + "\U0010ffff"
+
+
+class NameGramIndex:
+    """
+    파일 이름의 문자 trigram 역색인 (DocCatalog 의 SQLite 안의 name_grams 테이블).
+
+    키워드가 세 글자 이상이면 키워드의 trigram 을, 두 글자면 그 두 글자로 시작하는 trigram 들(범위 조회)을
+    씁니다. 각 gram 의 posting 크기를 df_cap 까지만 세어 가장 드문 max_terms 개만 골라 SQLite 안에서
+    INTERSECT 합니다. 후보는 포함 여부를 다시 확인해야 합니다 (trigram 이 모두 있어도 연속해서 나오지
+    않을 수 있음). 한 글자 키워드는 색인으로 좁힐 수 없습니다.
+    """
+
+    def __init__(self, df_cap=DF_CAP, max_terms=4):
+        self.df_cap = df_cap
+        self.max_terms = max_terms
+
+    @staticmethod
+    def _rows(files):
+        # (gram, file_id) 순으로 정렬해서 넣으면 B-tree 에 차례로 쓰므로 훨씬 빠름
+        return sorted((gram, file_id) for file_id, name_norm in files for gram in name_grams(name_norm))
+
+    def add(self, conn, files):
+        """files: [(file_id, name_norm)]"""
+        conn.executemany("INSERT OR IGNORE INTO name_grams (gram, file_id) VALUES (?, ?)", self._rows(files))
+
+    def remove(self, conn, files):
+        conn.executemany("DELETE FROM name_grams WHERE gram = ? AND file_id = ?", self._rows(files))
+
+    @staticmethod
+    def _term_sql(prefix):
+        if prefix:
+            return "SELECT file_id FROM name_grams WHERE gram >= ? AND gram < ?"
+        return "SELECT file_id FROM name_grams WHERE gram = ?"
+
+    @staticmethod
+    def _term_params(gram, prefix):
+        return [gram, _upper_bound(gram)] if prefix else [gram]
+
+    def plan(self, conn, keywords):
+        """
+        정규화된 키워드들로 쓸 gram 들을 고릅니다. Returns [(df, gram, prefix)] 드문 순서,
+        색인으로 좁힐 수 있는 키워드가 없으면 None. df 는 df_cap 에서 잘린 posting 크기.
+        """
+        terms = set()
+        for keyword in keywords:
+            if len(keyword) >= 3:
+                terms.update((g, False) for g in name_grams(keyword) if not g.endswith(END_MARK))
+            elif len(keyword) == 2:
+                terms.add((keyword, True))
+        if not terms:
+            return None
+
+        ranked = []
+        for gram, prefix in terms:
+            df = conn.execute(
+                f"SELECT count(*) FROM ({self._term_sql(prefix)} LIMIT ?)",
+                self._term_params(gram, prefix) + [self.df_cap],
+            ).fetchone()[0]
+            ranked.append((df, gram, prefix))
+        ranked.sort()
+        return ranked[:self.max_terms]
+
+    def candidates_sql(self, terms):
+        """plan() 결과로 후보 file_id 를 돌려주는 서브쿼리 (sql, params)"""
+        sql = " INTERSECT ".join(self._term_sql(prefix) for _, _, prefix in terms)
+        params = [p for _, gram, prefix in terms for p in self._term_params(gram, prefix)]
+        return sql, params
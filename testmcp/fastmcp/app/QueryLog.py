@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger("rdb_search_tool.query_log")
+
+
+class QueryLog:
+    """
+    실행된 SQL 을 한 줄에 하나씩 JSON 으로 남기는 구조화된 쿼리 로그 (인덱스 추천 등 분석용).
+
+    {"ts": epoch 초, "sql": 실행한 SQL, "elapsed_ms": 실행 시간, "rows": 반환/변경 행 수}
+    path 가 비어 있으면 아무것도 기록하지 않습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = 0
+        self._errors = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def record(self, sql_query, elapsed_ms, rows):
+        if not self.path:
+            return
+        line = json.dumps({
+            "ts": round(time.time(), 3),
+            "sql": sql_query,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "rows": rows,
+        }, ensure_ascii=False)
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self._records += 1
+            except OSError as e:
+                self._errors += 1
+                logger.error(f"Failed to write query log: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {"path": self.path or None, "records": self._records, "errors": self._errors}
+
+
+def read_query_log(path):
+    """QueryLog 파일에서 SQL 을 순서대로 읽습니다. 깨진 줄은 건너뜁니다."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get("sql"):
+                yield entry["sql"]
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from SqlValidator import tokenize
+
+
+logger = logging.getLogger("rdb_search_tool.result_cache")
+
+
+# 실행할 때마다 결과가 달라지는 함수 - 이런 SQL 은 캐시하지 않음
+VOLATILE_FUNCTIONS = frozenset("""
+    now random clock_timestamp statement_timestamp transaction_timestamp timeofday
+    current_date current_time current_timestamp localtime localtimestamp
+    nextval currval setval gen_random_uuid uuid_generate_v4 pg_sleep txid_current
+""".split())
+
+# 테이블별 변경 카운터. TRUNCATE 는 n_tup_* 를 바꾸지 않지만 relfilenode 를 바꿈
+TABLE_VERSIONS_SQL = """
+SELECT relname, n_tup_ins + n_tup_upd + n_tup_del, pg_relation_filenode(relid)
+FROM pg_stat_user_tables
+WHERE schemaname = %s
+"""
+
+
+def normalize_sql(sql_query):
+    """주석/공백/끝 세미콜론 차이와 따옴표 없는 식별자의 대소문자 차이를 없앤 캐시 키"""
+    parts = []
+    for kind, text in tokenize(sql_query):
+        if kind in ("ws", "comment"):
+            continue
+        parts.append(text.lower() if kind == "ident" else text)
+    while parts and parts[-1] == ";":
+        parts.pop()
+    return " ".join(parts)
+
+
+def referenced_tables(sql_query, table_names):
+    """
+    SQL 에 등장하는 알려진 테이블 이름 집합. 휘발성 함수를 쓰거나 알려진 테이블이 하나도 없으면 None
+    (캐시 불가). 별칭이나 컬럼 이름이 테이블 이름과 같아도 더 많이 무효화될 뿐이라 안전합니다.
+    """
+    found = set()
+    for kind, text in tokenize(sql_query):
+        if kind == "ident":
+            if text.lower() in VOLATILE_FUNCTIONS:
+                return None
+            name = text.lower()
+        elif kind == "qident":
+            name = text[1:-1].replace('""', '"')
+        else:
+            continue
+        if name in table_names:
+            found.add(name)
+    return found or None
+
+
+class ResultCache:
+    """
+    실행된 SQL 의 렌더링된 결과를 메모리에 보관하는 LRU 캐시 (출력 형식 + 정규화된 SQL 텍스트가 키).
+
+    무효화는 테이블 단위입니다. check_interval 마다 pg_stat_user_tables 의 변경 카운터를 읽어
+    달라진 테이블을 참조하는 항목을 지웁니다. 다른 세션의 변경은 그 세션이 통계를 내보낸 뒤에야
+    보이므로 (PostgreSQL 15+ 에서 유휴 세션은 최대 약 10초 간격), 최대 check_interval + 통계 반영
+    지연만큼 오래된 결과가 나갈 수 있습니다. ttl 은 그 밖의 경우를 위한 상한입니다.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600.0, check_interval=5.0, versions_sql=TABLE_VERSIONS_SQL):
+        self.max_bytes = max_bytes
+        self.versions_sql = versions_sql  # None 이면 폴링하지 않음 (읽기 전용 내장 DB 등)
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()  # key -> (value, tables, size, stored_at)
+        self._bytes = 0
+        self._epochs = {}              # table -> 무효화될 때마다 1 씩 증가
+        self._versions = None          # table -> pg_stat_user_tables 카운터
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def needs_check(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def check(self, conn, schema_name):
+        """변경 카운터를 읽어 바뀐 테이블의 항목을 무효화합니다."""
+        if self.versions_sql is None:
+            self._checked_at = time.monotonic()
+            return
+        with conn.cursor() as cursor:
+            cursor.execute(self.versions_sql, (schema_name,))
+            versions = {name: (changes, filenode) for name, changes, filenode in cursor.fetchall()}
+        conn.rollback()
+
+        with self._lock:
+            previous, self._versions = self._versions, versions
+            self._checked_at = time.monotonic()
+        if previous is None:
+            return
+        changed = {name for name in versions.keys() | previous.keys() if versions.get(name) != previous.get(name)}
+        if changed:
+            logger.info(f"Tables changed: {', '.join(sorted(changed))}")
+            self.invalidate_tables(changed)
+
+    def lookup(self, sql_query, table_names, variant=""):
+        """
+        Returns (value, ticket). value 는 캐시된 결과(없으면 None), ticket 은 실행 후 store() 에 넘길 값
+        (캐시할 수 없는 SQL 이면 None). ticket 에는 실행 전 테이블 epoch 가 들어 있어서, 실행 도중
+        무효화된 테이블의 결과는 저장되지 않습니다.
+        """
+        tables = referenced_tables(sql_query, table_names)
+        if tables is None:
+            return None, None
+        key = (variant, normalize_sql(sql_query))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[3] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0], None
+            self._misses += 1
+            epochs = {t: self._epochs.get(t, 0) for t in tables}
+        return None, (key, tables, epochs)
+
+    def store(self, ticket, value, size):
+        """size 는 value 의 대략적인 바이트 수 (메모리 상한 계산용)"""
+        if ticket is None:
+            return
+        key, tables, epochs = ticket
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if any(self._epochs.get(t, 0) != epoch for t, epoch in epochs.items()):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, tables, size, time.monotonic())
+            self._bytes += size
+            self._stores += 1
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate_tables(self, tables):
+        with self._lock:
+            for table in tables:
+                self._epochs[table] = self._epochs.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & set(tables)]
+            for key in stale:
+                self._remove(key)
+            self._invalidations += len(stale)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,122 @@
+import base64
+import datetime
+import decimal
+import json
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # Arrow 출력은 선택 사항 - pyarrow 가 없으면 컬럼형 JSON 만 반환
+    pa = None
+
+
+OUTPUT_FORMATS = ("markdown", "json", "arrow")
+
+ARROW_MIME_TYPE = "application/vnd.apache.arrow.stream"
+
+# PostgreSQL 타입 OID -> 컬럼형 JSON 의 타입 이름
+_TYPE_NAMES = {
+    16: "boolean",
+    20: "integer", 21: "integer", 23: "integer", 26: "integer",
+    700: "number", 701: "number", 1700: "number",
+    1082: "date",
+    1083: "time",
+    1114: "timestamp", 1184: "timestamp",
+    114: "json", 3802: "json",
+}
+
+
+def column_type(type_code):
+    return _TYPE_NAMES.get(type_code, "string")
+
+
+def _convert(value, kind):
+    if value is None or kind == "json":
+        return value
+    if kind == "integer":
+        return int(value)
+    if kind == "number":
+        return float(value)
+    if kind == "boolean":
+        return bool(value)
+    if kind in ("date", "time", "timestamp"):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return str(value)
+
+
+def _json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def describe_columns(result):
+    """[{"name", "type"}] - 같은 이름의 컬럼이 여러 개면 (SELECT a.id, b.id) 뒤에 번호를 붙임"""
+    types = result.get("types") or [None] * len(result["columns"])
+    columns = []
+    seen = set()
+    for i, (name, code) in enumerate(zip(result["columns"], types)):
+        key = name if name not in seen else f"{name}_{i}"
+        seen.add(key)
+        columns.append({"name": key, "type": column_type(code)})
+    return columns
+
+
+def columnar_data(result, columns):
+    """{column_name: [values]} - 행을 한 번씩만 훑어 컬럼별 배열로 모읍니다."""
+    kinds = [col["type"] for col in columns]
+    arrays = [[] for _ in columns]
+    for row in result["rows"]:
+        for i, kind in enumerate(kinds):
+            arrays[i].append(_convert(row[i], kind))
+    return {col["name"]: values for col, values in zip(columns, arrays)}
+
+
+def to_json(payload):
+    return json.dumps(payload, ensure_ascii=False, default=_json_default)
+
+
+_ARROW_TYPES = {
+    "integer": "int64",
+    "number": "float64",
+    "boolean": "bool_",
+    "date": "date32",
+    "string": "string",
+    "json": "string",
+    "time": "string",
+}
+
+
+def arrow_ipc(result):
+    """결과를 Arrow IPC stream 바이트로 직렬화합니다. pyarrow 가 없으면 None."""
+    if pa is None:
+        return None
+    arrays = []
+    fields = []
+    for i, col in enumerate(describe_columns(result)):
+        kind = col["type"]
+        values = [row[i] for row in result["rows"]]
+        if kind == "timestamp":
+            aware = any(v is not None and v.tzinfo is not None for v in values)
+            arrow_type = pa.timestamp("us", tz="UTC" if aware else None)
+        else:
+            arrow_type = getattr(pa, _ARROW_TYPES[kind])()
+            if kind == "json":
+                values = [None if v is None else to_json(v) for v in values]
+            elif kind in ("time", "string"):
+                # JSON 출력과 같은 문자열 (bytea 는 base64)
+                values = [_convert(v, kind) for v in values]
+            elif kind == "number":
+                values = [None if v is None else float(v) for v in values]
+        arrays.append(pa.array(values, type=arrow_type))
+        fields.append(pa.field(col["name"], arrow_type))
+
+    table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger("rdb_search_tool.schema_cache")
+
+
+# pg_catalog 만 읽는 가벼운 지문 쿼리
+# - 테이블/컬럼 OID, relfilenode(TRUNCATE, 재작성 시 변경), 컬럼 이름/타입, 제약조건을 모두 포함
+FINGERPRINT_SQL = """
+    SELECT
+        coalesce((
+            SELECT string_agg(
+                       c.oid::text || ':' || c.relfilenode::text || ':' || a.attnum::text
+                       || ':' || a.attname || ':' || a.atttypid::text || ':' || a.attnotnull::text,
+                       ',' ORDER BY c.oid, a.attnum)
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_catalog.pg_attribute a
+                   ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+            WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+        ), '')
+        || '|' ||
+        coalesce((
+            SELECT string_agg(con.oid::text || ':' || con.contype::text, ',' ORDER BY con.oid)
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_namespace n ON n.oid = con.connamespace
+            WHERE n.nspname = %(schema)s
+        ), '')
+"""
+
+
+# 스키마 전체(테이블, 컬럼, 타입, NOT NULL, 코멘트, PK, FK)를 한 번의 왕복으로 가져오는 쿼리
+CATALOG_SQL = """
+    SELECT
+        c.relname AS table_name,
+        c.relkind,
+        obj_description(c.oid, 'pg_class') AS table_comment,
+        json_agg(json_build_object(
+            'name', a.attname,
+            'type', format_type(a.atttypid, a.atttypmod),
+            'not_null', a.attnotnull,
+            'comment', col_description(c.oid, a.attnum),
+            'pk', coalesce(a.attnum = ANY(pk.conkey), false)
+        ) ORDER BY a.attnum) AS columns,
+        (
+            SELECT array_agg(ka.attname ORDER BY k.ord)
+            FROM unnest(pk.conkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_catalog.pg_attribute ka ON ka.attrelid = c.oid AND ka.attnum = k.attnum
+        ) AS primary_key,
+        (
+            SELECT json_agg(json_build_object(
+                'columns', (
+                    SELECT array_agg(fa.attname ORDER BY k.ord)
+                    FROM unnest(fk.conkey) WITH ORDINALITY AS k(attnum, ord)
+                    JOIN pg_catalog.pg_attribute fa ON fa.attrelid = fk.conrelid AND fa.attnum = k.attnum
+                ),
+                'ref_schema', rn.nspname,
+                'ref_table', rc.relname,
+                'ref_columns', (
+                    SELECT array_agg(ra.attname ORDER BY k.ord)
+                    FROM unnest(fk.confkey) WITH ORDINALITY AS k(attnum, ord)
+                    JOIN pg_catalog.pg_attribute ra ON ra.attrelid = fk.confrelid AND ra.attnum = k.attnum
+                )
+            ) ORDER BY fk.conname)
+            FROM pg_catalog.pg_constraint fk
+            JOIN pg_catalog.pg_class rc ON rc.oid = fk.confrelid
+            JOIN pg_catalog.pg_namespace rn ON rn.oid = rc.relnamespace
+            WHERE fk.conrelid = c.oid AND fk.contype = 'f'
+        ) AS foreign_keys
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_catalog.pg_constraint pk ON pk.conrelid = c.oid AND pk.contype = 'p'
+    WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+    GROUP BY c.oid, c.relname, c.relkind, pk.conkey
+    ORDER BY c.relname
+"""
+
+
+def fetch_schema_catalog(conn, schema_name):
+    """
+    스키마의 모든 테이블 정보를 한 번의 쿼리로 읽어 딕셔너리 리스트로 반환합니다.
+
+    각 항목: {"schema", "name", "kind", "comment", "columns", "primary_key", "foreign_keys"}
+    columns 항목: {"name", "type", "not_null", "comment", "pk"}
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(CATALOG_SQL, {"schema": schema_name})
+        rows = cursor.fetchall()
+
+    tables = []
+    for table_name, relkind, table_comment, columns, primary_key, foreign_keys in rows:
+        tables.append({
+            "schema": schema_name,
+            "name": table_name,
+            "kind": "view" if relkind in ("v", "m") else "table",
+            "comment": table_comment,
+            "columns": columns,
+            "primary_key": list(primary_key or []),
+            "foreign_keys": foreign_keys or [],
+        })
+    return tables
+
+
+def render_table(table, values=None, max_values=10):
+    """
+    테이블 하나를 LLM 프롬프트용 텍스트로 변환합니다.
+    values 가 있으면 ({column: [값, ...]}) 컬럼별 대표 값도 함께 적습니다.
+    """
+    lines = [f"Table: {table['schema']}.{table['name']}"]
+    if table.get("comment"):
+        lines.append(f"Description: {table['comment']}")
+    lines.append("Columns:")
+    for col in table["columns"]:
+        line = f"  - {col['name']}: {col['type']}"
+        if col["not_null"]:
+            line += " NOT NULL"
+        if col.get("comment"):
+            line += f"  -- {col['comment']}"
+        lines.append(line)
+    if table["primary_key"]:
+        lines.append(f"Primary Key(s): {', '.join(table['primary_key'])}")
+    for fk in table["foreign_keys"]:
+        lines.append(
+            f"Foreign Key: ({', '.join(fk['columns'])}) -> "
+            f"{fk['ref_schema']}.{fk['ref_table']}({', '.join(fk['ref_columns'])})"
+        )
+    if values:
+        lines.append("Known values:")
+        for col_name, col_values in values.items():
+            shown = ", ".join("'" + v.replace("'", "''") + "'" for v in col_values[:max_values])
+            more = f", ... ({len(col_values)} total)" if len(col_values) > max_values else ""
+            lines.append(f"  - {col_name}: {shown}{more}")
+    return "\n".join(lines) + "\n"
+
+
+def render_schema(tables, values=None, max_values=10):
+    """values: {(table, column): [값, ...]} - 있으면 테이블별 대표 값을 함께 렌더링"""
+    values = values or {}
+    rendered = []
+    for table in tables:
+        table_values = {col: vals for (name, col), vals in values.items() if name == table["name"]}
+        rendered.append(render_table(table, table_values, max_values))
+    return "\n".join(rendered)
+
+
+class SchemaCache:
+    """
+    스키마 프롬프트 텍스트를 프로세스 안에 캐시합니다.
+
+    매 호출마다 지문(fingerprint) 쿼리 한 번만 실행하고, 지문이 바뀌었거나 TTL 이 지났을 때만
+    loader(conn) 로 스키마를 다시 읽습니다.
+    """
+
+    def __init__(self, schema_name, ttl=600.0, fingerprint_sql=FINGERPRINT_SQL):
+        self.schema_name = schema_name
+        self.ttl = ttl
+        self.fingerprint_sql = fingerprint_sql
+        self._entry = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+
+    def fingerprint(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(self.fingerprint_sql, {"schema": self.schema_name})
+            raw = cursor.fetchone()[0] or ""
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, conn, loader):
+        """
+        캐시된 항목을 반환합니다. 항목은 loader(conn) 가 반환한 딕셔너리(예: {"text", "tables"})에
+        "fingerprint", "loaded_at" 를 더한 것입니다.
+        loader 에서 발생한 예외는 그대로 전달되며 캐시에 저장되지 않습니다.
+        """
+        fingerprint = self.fingerprint(conn)
+
+        with self._lock:
+            entry = self._entry
+            if (entry is not None
+                    and entry["fingerprint"] == fingerprint
+                    and time.monotonic() - entry["loaded_at"] < self.ttl):
+                self._hits += 1
+                return entry
+            self._misses += 1
+
+        reason = "cold" if entry is None else (
+            "fingerprint changed" if entry["fingerprint"] != fingerprint else "ttl expired"
+        )
+        logger.info(f"Reloading schema for '{self.schema_name}' ({reason})")
+
+        entry = dict(loader(conn))
+        entry["fingerprint"] = fingerprint
+        entry["loaded_at"] = time.monotonic()
+        with self._lock:
+            self._entry = entry
+            self._refreshes += 1
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+
+    def stats(self):
+        with self._lock:
+            entry = self._entry
+            return {
+                "schema": self.schema_name,
+                "cached": entry is not None,
+                "fingerprint": entry["fingerprint"][:12] if entry else None,
+                "age_seconds": round(time.monotonic() - entry["loaded_at"], 1) if entry else None,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+            }
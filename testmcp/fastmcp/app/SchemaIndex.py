@@ -0,0 +1,100 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+
+_WORD = re.compile(r"[0-9A-Za-z]+|[가-힣]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def tokenize(text):
+    """
+    BM25 용 토크나이저 - 영문/숫자 단어(snake_case, camelCase 분리)와 한글 어절, 한글 음절 bigram.
+    한글은 조사가 붙기 때문에("요청자가", "장비명이") bigram 으로 부분 일치를 잡습니다.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFC", str(text))
+    tokens = []
+    for word in _WORD.findall(_CAMEL.sub(" ", text)):
+        if _HANGUL.match(word):
+            tokens.append(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def table_document(table):
+    """테이블 하나를 색인할 텍스트 (테이블명, 코멘트, 컬럼명, 컬럼 코멘트)"""
+    parts = [table["name"], table.get("comment") or ""]
+    for col in table["columns"]:
+        parts.append(col["name"])
+        parts.append(col.get("comment") or "")
+    return " ".join(parts)
+
+
+class SchemaIndex:
+    """
+    테이블 단위 BM25 색인. 질문과 관련 있는 테이블 top-k 와 그 FK 이웃만 프롬프트에 넣기 위해 사용합니다.
+    네트워크 없이 프로세스 안에서만 동작합니다.
+    """
+
+    def __init__(self, tables, k1=1.2, b=0.75):
+        self.tables = tables
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(table_document(t))) for t in tables]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        doc_freq = Counter()
+        for doc in self._docs:
+            doc_freq.update(doc.keys())
+        n = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()
+        }
+
+        # FK 로 연결된 테이블 (양방향)
+        by_name = {t["name"]: i for i, t in enumerate(tables)}
+        self._neighbours = [set() for _ in tables]
+        for i, table in enumerate(tables):
+            for fk in table.get("foreign_keys", []):
+                j = by_name.get(fk["ref_table"])
+                if j is not None and j != i:
+                    self._neighbours[i].add(j)
+                    self._neighbours[j].add(i)
+
+    def scores(self, question):
+        terms = set(tokenize(question))
+        results = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length) if self._avg_length else self.k1
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+    def select(self, question, top_k):
+        """
+        질문과 관련된 테이블 top_k 개와 FK 이웃을 원래 순서대로 반환합니다.
+        아무 테이블도 맞지 않으면 판단할 근거가 없으므로 전체 테이블을 반환합니다.
+        """
+        if top_k <= 0 or len(self.tables) <= top_k:
+            return list(self.tables)
+
+        scores = self.scores(question)
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: -scores[i])[:top_k]
+        if not ranked:
+            return list(self.tables)
+
+        selected = set(ranked)
+        for i in ranked:
+            selected |= self._neighbours[i]
+        return [self.tables[i] for i in sorted(selected)]
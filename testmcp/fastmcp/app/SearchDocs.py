@@ -1,8 +1,155 @@
+import heapq
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ContentIndex import ContentIndex
+from DocCatalog import DocCatalog
+from DocWatcher import DocWatcher
+from NameIndex import normalize_name
+from ZipCache import ZipDirectoryCache
+
+
+# 문서 폴더(MNRO 별 하위 폴더)가 있는 루트
+DOCS_ROOT_PATH = os.getenv("DOCS_ROOT_PATH", r"C:\Users\Administrator\Desktop\ye\LKM\Tools\mcp_testbed\testmcp\mcpclient\app\mockup_data")
+
+# 파일 catalog - 폴더 내용을 SQLite 에 기록해 두고 바뀐 디렉터리만 다시 읽습니다
+DOC_CATALOG_PATH = os.getenv("DOC_CATALOG_PATH", str(Path(__file__).resolve().parent / "cache" / "doc_catalog.sqlite"))
+DOC_CATALOG_REFRESH_INTERVAL = float(os.getenv("DOC_CATALOG_REFRESH_INTERVAL", 30))
+DOC_CATALOG_FULL_RESCAN_INTERVAL = float(os.getenv("DOC_CATALOG_FULL_RESCAN_INTERVAL", 3600))
+# catalog 에 아직 없는 폴더들을 처음 읽을 때 동시에 나열할 스레드 수 (네트워크 드라이브는 I/O 대기가 길어 효과가 큼)
+DOC_SCAN_WORKERS = int(os.getenv("DOC_SCAN_WORKERS", 8))
+
+# zip central directory 캐시 - (경로, 크기, mtime) 이 같은 zip 은 다시 열지 않습니다
+ZIP_CACHE_MAX_MB = float(os.getenv("ZIP_CACHE_MAX_MB", 32))
+
+zip_cache = ZipDirectoryCache(max_bytes=int(ZIP_CACHE_MAX_MB * 1024 * 1024))
+
+doc_catalog = DocCatalog(
+    DOC_CATALOG_PATH,
+    DOCS_ROOT_PATH,
+    refresh_interval=DOC_CATALOG_REFRESH_INTERVAL,
+    full_rescan_interval=DOC_CATALOG_FULL_RESCAN_INTERVAL,
+    zip_cache=zip_cache,
+)
+
+# 내용 검색용 전문 색인 (SQLite FTS5) - 검색된 폴더에서 새로 생겼거나 바뀐 문서만 프로세스 풀에서 텍스트 추출
+DOC_CONTENT_INDEX_PATH = os.getenv("DOC_CONTENT_INDEX_PATH", str(Path(__file__).resolve().parent / "cache" / "doc_content.sqlite"))
+DOC_CONTENT_WORKERS = int(os.getenv("DOC_CONTENT_WORKERS", 0))  # 0 이면 CPU 수
+DOC_CONTENT_MAX_FILE_MB = float(os.getenv("DOC_CONTENT_MAX_FILE_MB", 50))
+
+content_index = ContentIndex(
+    DOC_CONTENT_INDEX_PATH,
+    zip_cache,
+    workers=DOC_CONTENT_WORKERS,
+    max_file_mb=DOC_CONTENT_MAX_FILE_MB,
+)
+
+# 파일 변경 감시 - 서버 프로세스 안에서 변경 이벤트를 catalog 에 바로 반영 (검색 때 폴더를 확인하지 않음)
+DOCS_WATCH = os.getenv("DOCS_WATCH", "true").lower() in ("1", "true", "yes")
+DOCS_WATCH_DEBOUNCE = float(os.getenv("DOCS_WATCH_DEBOUNCE", 1.0))
+DOCS_WATCH_MAX_DELAY = float(os.getenv("DOCS_WATCH_MAX_DELAY", 10))
+DOCS_WATCH_POLL_INTERVAL = float(os.getenv("DOCS_WATCH_POLL_INTERVAL", 10))
+# 변경 알림을 믿고 검색 때 폴더 확인을 건너뛸지 - auto 이면 문서 루트가 네트워크 공유가 아닐 때만
+DOCS_WATCH_TRUST_EVENTS = os.getenv("DOCS_WATCH_TRUST_EVENTS", "auto").lower()
+
+doc_watcher = DocWatcher(
+    doc_catalog,
+    debounce=DOCS_WATCH_DEBOUNCE,
+    max_delay=DOCS_WATCH_MAX_DELAY,
+    poll_interval=DOCS_WATCH_POLL_INTERVAL,
+    trust_events=None if DOCS_WATCH_TRUST_EVENTS == "auto" else DOCS_WATCH_TRUST_EVENTS in ("1", "true", "yes"),
+)
+
+
+# 결과 페이지 - 넓은 검색이 SSE 로 LLM 컨텍스트에 통째로 들어가지 않도록 limit 개씩 돌려줍니다
+DOCS_SEARCH_DEFAULT_LIMIT = int(os.getenv("DOCS_SEARCH_DEFAULT_LIMIT", 50))
+DOCS_SEARCH_MAX_LIMIT = int(os.getenv("DOCS_SEARCH_MAX_LIMIT", 500))
+
+# relevance 점수 - 이름 일치(내용에서만 찾은 파일보다 위), 키워드가 이름에서 차지하는 비율,
+# 최근 수정(반감기 DOCS_RECENCY_HALF_LIFE_DAYS 일), 요청한 폴더 순서(앞의 폴더일수록 높음)
+DOCS_RECENCY_HALF_LIFE_DAYS = float(os.getenv("DOCS_RECENCY_HALF_LIFE_DAYS", 180))
+RELEVANCE_WEIGHTS = {"name_match": 2.0, "coverage": 1.0, "recency": 1.0, "folder_affinity": 0.5}
+
+SORT_KEYS = ("relevance", "recent", "name", "path")
+
+
+def start_doc_watcher():
+    """서버 시작 시 파일 변경 감시를 시작합니다."""
+    if DOCS_WATCH:
+        doc_watcher.start()
+
+
+def get_search_docs_stats():
+    return {
+        "catalog": doc_catalog.stats(),
+        "watcher": doc_watcher.stats(),
+        "zip_cache": zip_cache.stats(),
+        "content_index": content_index.stats(),
+    }
+
+
+def _keyword_coverage(name, keywords):
+    """키워드가 파일 이름(확장자 제외)에서 차지하는 글자 비율 (겹치는 부분은 한 번만)"""
+    stem = normalize_name(name.rsplit('.', 1)[0] if '.' in name else name)
+    if not stem:
+        return 0.0
+    covered = set()
+    for keyword in keywords:
+        start = stem.find(keyword)
+        if start >= 0:
+            covered.update(range(start, start + len(keyword)))
+    return len(covered) / len(stem)
+
+
+def _relevance(entry, keywords, name_matches, folder_rank, now_ns):
+    weights = RELEVANCE_WEIGHTS
+    key = (entry["path"], entry["path_in_zip"])
+    score = 0.0
+    if key in name_matches:
+        score += weights["name_match"] + weights["coverage"] * _keyword_coverage(entry["name"], keywords)
+    age_days = max(now_ns - entry["mtime_ns"], 0) / 86_400_000_000_000
+    score += weights["recency"] * 0.5 ** (age_days / DOCS_RECENCY_HALF_LIFE_DAYS)
+    score += weights["folder_affinity"] * (1 - folder_rank[entry["folder"]] / len(folder_rank))
+    return score
+
+
+def _path_key(entry):
+    return entry["folder"], entry["path"], entry["path_in_zip"]
+
+
+def _top_entries(entries, sort_by, count, keywords, name_matches, folder_names):
+    """
+    정렬 기준으로 앞의 count 개만 고릅니다 - 전체를 정렬하지 않고 heap 으로 top-k 선택.
+    Returns [(entry, score)] (score 는 relevance 일 때만).
+    """
+    if sort_by == "path":
+        return [(entry, None) for entry in heapq.nsmallest(count, entries, key=_path_key)]
+    if sort_by == "name":
+        return [(entry, None) for entry in heapq.nsmallest(
+            count, entries, key=lambda e: (normalize_name(e["name"]), e["path"], e["path_in_zip"]))]
+    if sort_by == "recent":
+        return [(entry, None) for entry in heapq.nlargest(count, entries, key=lambda e: e["mtime_ns"])]
+
+    folder_rank = {}
+    for folder in folder_names:
+        folder_rank.setdefault(folder, len(folder_rank))
+    keywords = [normalize_name(k) for k in keywords or [] if k]
+    now_ns = time.time_ns()
+    # 점수가 같으면 경로 순서
+    scored = ((-_relevance(e, keywords, name_matches, folder_rank, now_ns), _path_key(e), e) for e in entries)
+    return [(entry, -score) for score, _, entry in heapq.nsmallest(count, scored, key=lambda t: t[:2])]
+
+
 def search_docs_main(
     folder_names: list = None, 
     keywords: list = None,
     doc_type: str = None,
-    search_in_content: bool = False
+    search_in_content: bool = False,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = "relevance"
 ):
     """
     특정 폴더들 내에서 키워드와 조건을 기반으로 문서를 검색하는 함수
@@ -10,107 +157,94 @@ def search_docs_main(
     :param folder_names: 검색할 폴더 이름 리스트 (예: ['MR24010002M', 'MR24010003M'])
     :param keywords: 검색할 키워드들 (파일 이름에 포함되어야 하는 단어들)
     :param doc_type: 문서 형식 (예: 'docx', 'xlsx', 'pdf')
-    :param search_in_content: 파일 내용 검색 여부 (기본값: False)
-    :return: 검색된 파일 정보의 리스트
+    :param search_in_content: 파일 내용도 검색할지 여부 (docx, xlsx, pdf - zip 내부 포함, 기본값: False)
+    :param limit: 돌려줄 최대 파일 수 (기본값: DOCS_SEARCH_DEFAULT_LIMIT, 최대 DOCS_SEARCH_MAX_LIMIT)
+    :param offset: 건너뛸 파일 수 - 이전 결과의 next_offset 을 넣으면 다음 페이지
+    :param sort_by: 'relevance'(기본값), 'recent'(최근 수정 순), 'name', 'path'
+    :return: 검색 결과 페이지 (total, offset, more_available, next_offset, files)
     """
     
-    import os
-    import zipfile
-    from datetime import datetime
-    
-    root_path = r"C:\Users\Administrator\Desktop\ye\LKM\Tools\mcp_testbed\testmcp\mcpclient\app\mockup_data"
-
     if not folder_names or not isinstance(folder_names, list):
         return {"status": "error", "message": "유효한 폴더 이름 리스트가 필요합니다."}
+    if sort_by not in SORT_KEYS:
+        return {"status": "error", "message": f"sort_by 는 {', '.join(SORT_KEYS)} 중 하나여야 합니다."}
+    limit = min(max(int(limit or DOCS_SEARCH_DEFAULT_LIMIT), 1), DOCS_SEARCH_MAX_LIMIT)
+    offset = max(int(offset or 0), 0)
+
+    # 'MR24010002M/' 같은 표기 차이는 같은 폴더로 맞추고, 루트 밖을 가리키는 이름은 거부
+    normalized = [doc_catalog.normalize_folder(name) for name in folder_names]
+    invalid = [name for name, folder in zip(folder_names, normalized) if folder is None]
+    if invalid:
+        return {"status": "error", "message": f"잘못된 폴더 이름입니다 (문서 루트 바로 아래의 폴더 이름만 가능): {invalid}"}
+    folder_names = list(dict.fromkeys(normalized))
     
-    result_files = []
+    # 바뀐 디렉터리만 다시 읽어 catalog 를 맞춘 뒤 색인에서 조회
+    # (처음 보는 폴더들은 스레드 풀에서 동시에 나열)
+    folders = []
+    missing_folders = []
+    for folder_name, exists in doc_catalog.refresh_many(folder_names, DOC_SCAN_WORKERS):
+        (folders if exists else missing_folders).append(folder_name)
+    
+    entries = doc_catalog.search(folders, keywords, doc_type) if folders else []
+    name_matches = {(e["path"], e["path_in_zip"]) for e in entries}
+    
+    # 파일 내용 검색 - 이름에 키워드가 없어도 내용에 모두 들어 있으면 결과에 추가
+    content_matches = set()
+    if search_in_content and keywords and folders:
+        all_entries = doc_catalog.search(folders)
+        content_index.update(folders, all_entries)
+        content_matches = content_index.search(folders, keywords)
+        suffix = f".{doc_type.lower()}" if doc_type else ""
+        for entry in all_entries:
+            key = (entry["path"], entry["path_in_zip"])
+            if key in content_matches and key not in name_matches and entry["name"].lower().endswith(suffix):
+                entries.append(entry)
     
-    for folder_name in folder_names:
-        folder_path = os.path.join(root_path, folder_name)
-        
-        # 폴더가 존재하지 않으면 다음 폴더로 넘어감
-        if not os.path.exists(folder_path) or not os.path.isdir(folder_path):
-            print(f"폴더를 찾을 수 없음: {folder_path}")
-            continue
-        
-        # 폴더 내 모든 파일 탐색 (하위 폴더 포함)
-        for root, _, files in os.walk(folder_path):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                
-                # ZIP 파일 처리
-                if file_name.lower().endswith('.zip'):
-                    try:
-                        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                            for zip_file_path in zip_ref.namelist():
-                                if zip_file_path.endswith('/'):
-                                    continue
-                                
-                                # 파일명 추출 (경로의 마지막 부분)
-                                file_name_in_zip = os.path.basename(zip_file_path)
-                                
-                                if not file_name_in_zip:
-                                    continue
-                                
-                                # 문서 타입 필터링
-                                if doc_type and not file_name_in_zip.lower().endswith(f".{doc_type.lower()}"):
-                                    continue
-                                
-                                # 키워드 필터링
-                                if keywords and not all(keyword.lower() in file_name_in_zip.lower() for keyword in keywords):
-                                    continue
-                                
-                                # 파일 정보 추출
-                                zip_file_info = zip_ref.getinfo(zip_file_path)
-                                
-                                # 파일 정보 추가
-                                zip_result_file = {
-                                    "file_name": file_name_in_zip,
-                                    "zip_path": file_path, # zip 경로 (예: "C:\폴더\MR24010002M\파일모음.zip")
-                                    "path_in_zip": zip_file_path,  # zip 내부에서 파일 경로 (예: "문서/보고서.docx")
-                                    "folder_name": folder_name,
-                                    "file_type": file_name_in_zip.split('.')[-1] if '.' in file_name_in_zip else None,
-                                    "in_zip": True,
-                                }
-                                
-                                result_files.append(zip_result_file)
-                                print("\nzip파일 추가")
-                                print(f"키워드: {keywords}")
-                                print(zip_result_file)
-                    
-                    except Exception as e:
-                        print(f"ZIP 파일 {file_path} 처리 중 오류 발생: {str(e)}")
-                
-                # 일반 파일 처리
-                else:
-                    # 문서 타입 필터링
-                    if doc_type and not file_name.lower().endswith(f".{doc_type.lower()}"):
-                        continue
-                    
-                    # 키워드 필터링
-                    if keywords and not all(keyword.lower() in file_name.lower() for keyword in keywords):
-                        continue
-                    
-                    # 파일 정보 추가
-                    file_info = {
-                        "file_name": file_name,
-                        "file_path": file_path,
-                        "folder_name": folder_name,
-                        "file_type": file_name.split('.')[-1] if '.' in file_name else None,
-                        "in_zip": False
-                    }
-                    
-                    # 파일 내용 검색 로직 ing
-                    if search_in_content and keywords:
-                        # 여기에 파일 내용 검색 로직을 추가할 수 있음
-                        pass
-                    
-                    result_files.append(file_info)
-                    print("\n파일 추가")
-                    print(f"키워드: {keywords}")
-                    print(file_info)
+    if not entries:
+        result = {"status": "info", "message": "검색 조건에 맞는 파일을 찾을 수 없습니다."}
+        if missing_folders:
+            result["missing_folders"] = missing_folders
+        return result
     
-    if not result_files:
-        return {"status": "info", "message": "검색 조건에 맞는 파일을 찾을 수 없습니다."}
+    top = _top_entries(entries, sort_by, offset + limit, keywords, name_matches, folder_names)[offset:]
+    
+    result_files = []
+    for entry, score in top:
+        if entry["in_zip"]:
+            file_info = {
+                "file_name": entry["name"],
+                "zip_path": entry["path"], # zip 경로 (예: "C:\폴더\MR24010002M\파일모음.zip")
+                "path_in_zip": entry["path_in_zip"],  # zip 내부에서 파일 경로 (예: "문서/보고서.docx")
+                "folder_name": entry["folder"],
+                "file_type": entry["ext"],
+                "in_zip": True,
+            }
+        else:
+            file_info = {
+                "file_name": entry["name"],
+                "file_path": entry["path"],
+                "folder_name": entry["folder"],
+                "file_type": entry["ext"],
+                "in_zip": False
+            }
+        file_info["modified"] = datetime.fromtimestamp(entry["mtime_ns"] / 1e9).isoformat(timespec="seconds")
+        if (entry["path"], entry["path_in_zip"]) in content_matches:
+            file_info["content_match"] = True
+        if score is not None:
+            file_info["score"] = round(score, 3)
+        result_files.append(file_info)
     
-    return result_files
\ No newline at end of file
+    next_offset = offset + len(result_files)
+    result = {
+        "status": "success",
+        "total": len(entries),
+        "offset": offset,
+        "limit": limit,
+        "sort_by": sort_by,
+        "more_available": next_offset < len(entries),
+        "next_offset": next_offset if next_offset < len(entries) else None,
+        "files": result_files,
+    }
+    if missing_folders:
+        result["missing_folders"] = missing_folders
+    return result
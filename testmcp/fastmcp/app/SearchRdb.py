@@ -1,15 +1,34 @@
 from fastmcp.prompts.base import UserMessage
-from mcp.types import TextContent
+from mcp.types import TextContent, EmbeddedResource, BlobResourceContents
 from langchain_openai import AzureChatOpenAI
 
 import os
+import asyncio
+import base64
 import logging
 import psycopg2
-from psycopg2 import Error
 import re
+import sqlite3
+import threading
+import time
+import uuid
 from pathlib import Path
 from dotenv import load_dotenv
 
+from DbPool import DbPool
+from EmbeddedDb import EmbeddedPool, FINGERPRINT_SQL as SQLITE_FINGERPRINT_SQL, SQLITE_SCHEMA, fetch_catalog
+from SchemaCache import SchemaCache, fetch_schema_catalog, render_schema
+from SqlCache import SqlCache
+from SchemaIndex import SchemaIndex
+from ValueIndex import ValueIndex
+from SqlValidator import SqlValidator
+from SqlGuard import SqlGuard, SqlGuardError, order_covers_key, stable_order
+from ResultCache import ResultCache, referenced_tables
+from ContinuationStore import ContinuationStore, paginate_sql
+from ResultFormat import OUTPUT_FORMATS, ARROW_MIME_TYPE, describe_columns, columnar_data, to_json, arrow_ipc
+from Metrics import Metrics
+from QueryLog import QueryLog
+
 
 
 # 환경 변수 로딩 - 프로그램 시작 시 한 번만 수행
@@ -40,15 +59,123 @@ DB_CONFIG = {
     "port": os.getenv("DB_PORT", 5432)
 }
 
+# 연결 풀 설정 - 호출마다 connect/close 하지 않고 풀에서 빌려 씁니다
+POOL_CONFIG = {
+    "minconn": int(os.getenv("DB_POOL_MIN", 2)),
+    "maxconn": int(os.getenv("DB_POOL_MAX", 10)),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+    "health_check_interval": float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30)),
+    "search_path": os.getenv("DB_SEARCH_PATH", "ocean_h, public"),
+}
+
+# 실행 엔진 - postgres (기본) 또는 sqlite (RDB.xlsx 로 만든 읽기 전용 내장 DB, 서버 없이 동작)
+RDB_ENGINE = os.getenv("RDB_ENGINE", "postgres").lower()
+USE_SQLITE = RDB_ENGINE == "sqlite"
+
+SQLITE_CONFIG = {
+    "db_path": os.getenv("RDB_SQLITE_PATH", str(Path(__file__).resolve().parent / "cache" / "rdb.sqlite")),
+    "xlsx_path": os.getenv("RDB_XLSX_PATH", str(Path(__file__).resolve().parents[2] / "mcpclient" / "app" / "mockup_data" / "RDB.xlsx")),
+    "table_name": os.getenv("RDB_SQLITE_TABLE", "rfq_search"),
+    "maxconn": POOL_CONFIG["maxconn"],
+    "timeout": POOL_CONFIG["timeout"],
+    "mmap_size": int(os.getenv("RDB_SQLITE_MMAP_MB", 256)) * 1024 * 1024,
+}
+
+db_pool = EmbeddedPool(**SQLITE_CONFIG) if USE_SQLITE else DbPool(DB_CONFIG, **POOL_CONFIG)
+
+# 프롬프트에 쓰는 SQL 방언 이름
+SQL_DIALECT = "SQLite" if USE_SQLITE else "PostgreSQL"
+
+# 두 엔진의 드라이버 오류 - 실행 가드가 거부한 경우까지 포함한 것이 QUERY_ERRORS
+DB_ERRORS = (psycopg2.Error, sqlite3.Error)
+QUERY_ERRORS = DB_ERRORS + (SqlGuardError,)
+
+# 스키마 캐시 설정 - 카탈로그 지문이 바뀌거나 TTL 이 지났을 때만 스키마를 다시 읽습니다
+DB_SCHEMA = SQLITE_SCHEMA if USE_SQLITE else os.getenv("DB_SCHEMA", "ocean_h")
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", 600))
+
+if USE_SQLITE:
+    schema_cache = SchemaCache(DB_SCHEMA, ttl=SCHEMA_CACHE_TTL, fingerprint_sql=SQLITE_FINGERPRINT_SQL)
+else:
+    schema_cache = SchemaCache(DB_SCHEMA, ttl=SCHEMA_CACHE_TTL)
+
+# 질문 -> SQL 변환 캐시 - 같은 질문(같은 스키마)이면 LLM 을 호출하지 않습니다
+SQL_CACHE_PATH = os.getenv("SQL_CACHE_PATH", str(Path(__file__).resolve().parent / "cache" / "nl2sql_cache.sqlite"))
+SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", 5000))
+
+sql_cache = SqlCache(SQL_CACHE_PATH, max_entries=SQL_CACHE_MAX_ENTRIES)
+
+# 프롬프트에 넣을 테이블 수 - 질문과 관련된 top-k 테이블(+FK 이웃)만 보냅니다. 0 이면 전체 스키마
+SCHEMA_PRUNE_TOP_K = int(os.getenv("SCHEMA_PRUNE_TOP_K", 5))
+
+# 범주형 값 색인 - 카디널리티가 낮은 텍스트 컬럼의 값을 프롬프트에 넣고, SQL 리터럴을 실행 전에 보정합니다
+VALUE_INDEX_MAX_DISTINCT = int(os.getenv("VALUE_INDEX_MAX_DISTINCT", 50))
+VALUE_INDEX_TTL = float(os.getenv("VALUE_INDEX_TTL", 3600))
+VALUE_INDEX_PROMPT_VALUES = int(os.getenv("VALUE_INDEX_PROMPT_VALUES", 10))
+# pg_stats 통계가 없는 테이블만 직접 셉니다 - 이 행 수보다 크면 건너뛰고, 테이블마다 시간 제한을 둠
+VALUE_INDEX_SCAN_ROWS = int(os.getenv("VALUE_INDEX_SCAN_ROWS", 100000))
+VALUE_INDEX_TIMEOUT_MS = int(os.getenv("VALUE_INDEX_TIMEOUT_MS", 5000))
+
+value_index = ValueIndex(
+    max_distinct=VALUE_INDEX_MAX_DISTINCT,
+    ttl=VALUE_INDEX_TTL,
+    scan_rows=VALUE_INDEX_SCAN_ROWS,
+    timeout_ms=VALUE_INDEX_TIMEOUT_MS,
+    # 내장 DB 에는 pg_stats 가 없음
+    **({"stats_sql": None} if USE_SQLITE else {}),
+)
+
+# 실행 결과 캐시 - 같은 SQL 이면 DB 를 다시 조회하지 않고, 참조 테이블이 바뀌면 해당 항목만 무효화합니다
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", 64))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 600))
+RESULT_CACHE_CHECK_INTERVAL = float(os.getenv("RESULT_CACHE_CHECK_INTERVAL", 5))
+
+result_cache = ResultCache(
+    max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024),
+    ttl=RESULT_CACHE_TTL,
+    check_interval=RESULT_CACHE_CHECK_INTERVAL,
+    # 내장 DB 는 읽기 전용이라 바뀌지 않음 - TTL 만 적용
+    **({"versions_sql": None} if USE_SQLITE else {}),
+)
+
+search_metrics = Metrics()
+
+# 추측(speculative) 수정 모드 - SQL 오류 시 수정 후보 N 개를 동시에 받아 병렬로 시험하고 먼저 성공한 것을 씁니다.
+# 1 이면 기존처럼 한 번에 하나씩 최대 3 번 수정합니다.
+SQL_FIX_CANDIDATES = int(os.getenv("SQL_FIX_CANDIDATES", 1))
+SQL_FIX_TEMPERATURE = float(os.getenv("SQL_FIX_TEMPERATURE", 0.7))
+
+
+def init_db_pool():
+    """서버 시작 시 풀을 미리 열어 둡니다. DB 가 아직 준비되지 않았으면 첫 호출 때 다시 시도합니다."""
+    try:
+        db_pool.open()
+    except DB_ERRORS as e:
+        logger.error(f"Failed to warm up connection pool: {str(e)}")
+
+
+def get_search_rdb_stats():
+    return {
+        "pool": db_pool.stats(),
+        "schema_cache": schema_cache.stats(),
+        "sql_cache": sql_cache.stats(),
+        "value_index": value_index.stats(),
+        "sql_guard": sql_guard.stats(),
+        "result_cache": result_cache.stats(),
+        "continuations": continuation_store.stats(),
+        "query_log": query_log.stats(),
+        "search": search_metrics.snapshot(),
+    }
+
 # Azure OpenAI 설정 (전역으로 한 번만 설정)
-def create_llm():
+def create_llm(temperature=0):
     return AzureChatOpenAI(
         azure_deployment=os.getenv("OPENAI_DEPLOYMENT"),
         azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
         api_version=os.getenv("OPENAI_API_VERSION"),
         api_key=os.getenv("OPENAI_API_KEY"),
         n=1,
-        temperature=0,
+        temperature=temperature,
         max_tokens=500,
         model=os.getenv("OPENAI_MODEL"),
         verbose=True,
@@ -80,77 +207,144 @@ def extract_sql_from_response(content):
         
     return None
 
-def get_db_schema(conn):
-    """Get database schema for the connected PostgreSQL database."""
-    schema = []
-    
+def load_db_schema(conn):
+    """
+    Load the schema of DB_SCHEMA in a single pg_catalog round trip.
+
+    Returns {"tables": [...], "text": "..."} where text is the prompt rendering of tables.
+    """
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                set search_path to ocean_h;
-                show search_path;
-                           """)
-            
-            # Get list of tables
-            cursor.execute("""
-                SELECT table_schema,table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'ocean_h'
-            """)
-            tables = cursor.fetchall()
-            
-            if not tables:
-                logger.warning("No tables found in the database")
-                return "No tables found in the database schema."
-                
-            for table in tables:
-                table_schema = table[0]
-                table_name = table[1]
-                
-                # Get column information for each table
-                cursor.execute(f"""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_name = '{table_name}'
-                """)
-                columns = cursor.fetchall()
-                
-                table_info = f"Table: {table_schema}.{table_name}\nColumns:\n"
-                for col in columns:
-                    col_name, col_type = col
-                    table_info += f"  - {col_name}: {col_type}\n"
-                
-                # 추가: 기본 키 정보 가져오기
-                cursor.execute(f"""
-                    SELECT c.column_name
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.constraint_column_usage AS ccu USING (constraint_schema, constraint_name)
-                    JOIN information_schema.columns AS c ON c.table_schema = tc.constraint_schema
-                      AND tc.table_name = c.table_name AND ccu.column_name = c.column_name
-                    WHERE constraint_type = 'PRIMARY KEY' AND tc.table_name = '{table_name}'
-                """)
-                pks = cursor.fetchall()
-                if pks:
-                    pk_names = [pk[0] for pk in pks]
-                    table_info += f"Primary Key(s): {', '.join(pk_names)}\n"
-                
-                schema.append(table_info)
-            
-            cursor.execute("""
-                set search_path to default;
-                           """)
-        
-        
-        return "\n".join(schema)
-    
-    except Error as e:
+        tables = fetch_catalog(conn, DB_SCHEMA) if USE_SQLITE else fetch_schema_catalog(conn, DB_SCHEMA)
+    except DB_ERRORS as e:
         logger.error(f"Error retrieving database schema: {str(e)}")
-        return f"Error retrieving schema: {str(e)}"
+        raise
+
+    if not tables:
+        logger.warning("No tables found in the database")
+        return {"tables": [], "text": "No tables found in the database schema.", "index": None, "validator": None}
+
+    return {
+        "tables": tables,
+        "text": render_schema(tables),
+        "index": SchemaIndex(tables),
+        "validator": SqlValidator(tables, DB_SCHEMA),
+    }
+
+
+def get_db_schema(conn):
+    """Get database schema for the connected database."""
+    return load_db_schema(conn)["text"]
+
+
+def select_prompt_schema(schema_entry, query):
+    """
+    Pick the tables relevant to the question (BM25 top-k plus FK neighbours) and render them
+    together with their known categorical values. query may also be a list of questions,
+    in which case the union of their tables is used.
+
+    Returns (tables, text). Falls back to all tables when pruning is disabled or there is no index.
+    """
+    tables = schema_entry["tables"]
+    index = schema_entry.get("index")
+    if index is not None and SCHEMA_PRUNE_TOP_K > 0:
+        questions = [query] if isinstance(query, str) else query
+        selected = set()
+        for question in questions:
+            selected.update(t["name"] for t in index.select(question, SCHEMA_PRUNE_TOP_K))
+        tables = [t for t in schema_entry["tables"] if t["name"] in selected]
+        if len(tables) < len(schema_entry["tables"]):
+            logger.info(f"Schema pruned to {len(tables)}/{len(schema_entry['tables'])} tables: "
+                        f"{', '.join(t['name'] for t in tables)}")
+
+    values = value_index.values_for(tables)
+    if not values and len(tables) == len(schema_entry["tables"]):
+        return tables, schema_entry["text"]
+    return tables, render_schema(tables, values, VALUE_INDEX_PROMPT_VALUES)
+
+
+def full_prompt_schema(schema_entry):
+    """The prompt schema without pruning (all tables with their known values) - the baseline for schema_chars_full."""
+    tables = schema_entry["tables"]
+    values = value_index.values_for(tables)
+    return render_schema(tables, values, VALUE_INDEX_PROMPT_VALUES) if values else schema_entry["text"]
+
+
+def refresh_value_index(conn):
+    schema_entry = get_cached_db_schema(conn)
+    if schema_entry["fingerprint"]:
+        value_index.refresh(conn, schema_entry["tables"], schema_entry["fingerprint"])
+
+
+def _refresh_value_index_in_background():
+    try:
+        with db_pool.connection() as conn:
+            refresh_value_index(conn)
+    except DB_ERRORS as e:
+        logger.error(f"Failed to refresh value index: {str(e)}")
+
+
+def schedule_value_index_refresh(schema_entry):
+    """값 색인이 오래됐거나 스키마가 바뀌었으면 요청을 막지 않도록 백그라운드에서 다시 만듭니다."""
+    if schema_entry["fingerprint"] and value_index.is_stale(schema_entry["fingerprint"]):
+        threading.Thread(target=_refresh_value_index_in_background, daemon=True).start()
 
-def fix_sql_query(llm, db_schema, query, sql_query, error_info):
+
+def correct_sql_literals(sql_query, tables):
+    """Replace misspelled categorical literals with the closest known value before execution."""
+    corrected, corrections = value_index.correct_literals(sql_query, tables)
+    for column, old, new in corrections:
+        logger.info(f"Corrected literal for {column}: '{old}' -> '{new}'")
+    if corrections:
+        search_metrics.incr("literal_corrections", len(corrections))
+    return corrected
+
+
+def repair_sql_locally(sql_query, schema_entry):
+    """
+    Validate identifiers against the cached schema and repair trivial problems (case, missing
+    schema qualification, near-miss names) without an LLM call.
+
+    Returns (sql, repaired, errors) - repaired is True when something other than schema
+    qualification was fixed, errors lists identifiers that could not be resolved.
+    """
+    validator = schema_entry.get("validator")
+    if validator is None:
+        return sql_query, False, []
+
+    result = validator.validate(sql_query)
+    for kind, old, new in result["repairs"]:
+        logger.info(f"Local SQL repair ({kind}): {old} -> {new}")
+        search_metrics.incr(f"local_repairs_{kind}")
+    if result["errors"]:
+        logger.warning(f"Unresolved identifiers: {'; '.join(result['errors'])}")
+    repaired = any(kind != "qualify" for kind, _, _ in result["repairs"])
+    return result["sql"], repaired, result["errors"]
+
+
+def get_cached_db_schema(conn):
+    """
+    Get the cached schema entry ({"text", "tables", "fingerprint", ...}), reloading only when
+    the catalog fingerprint changes or the TTL expires.
+    """
+    try:
+        return schema_cache.get(conn, load_db_schema)
+    except DB_ERRORS as e:
+        conn.rollback()
+        return {"text": f"Error retrieving schema: {str(e)}", "tables": [], "index": None, "validator": None, "fingerprint": None}
+
+
+def warm_schema_cache():
+    """서버 시작 시 스키마 캐시와 값 색인을 미리 채워 둡니다."""
+    try:
+        with db_pool.connection() as conn:
+            refresh_value_index(conn)
+    except DB_ERRORS as e:
+        logger.error(f"Failed to warm up schema cache: {str(e)}")
+
+async def fix_sql_query(llm, db_schema, query, sql_query, error_info):
     """Fix SQL syntax errors using the LLM."""
     
-    system_prompt = f"""You are a PostgreSQL database expert. Review the user's question, 
+    system_prompt = f"""You are a {SQL_DIALECT} database expert. Review the user's question, 
     the database schema, the SQL query that was generated, and the error message returned by 
     the database. Fix ONLY the syntax errors in the SQL query without changing the logic.
     Output ONLY the fixed SQL query wrapped in ```sql and ``` tags.
@@ -174,7 +368,7 @@ def fix_sql_query(llm, db_schema, query, sql_query, error_info):
     ]
     
     try:
-        response = llm.invoke(system_prompt + "\n\n" + user_prompt)
+        response = await llm.ainvoke(system_prompt + "\n\n" + user_prompt)
         content = response.content
         fixed_sql = extract_sql_from_response(content)
         
@@ -189,14 +383,377 @@ def fix_sql_query(llm, db_schema, query, sql_query, error_info):
         return sql_query
 
 
-def search_rdb_main(query: str) -> list[TextContent]:
+# 결과 스트리밍 설정 - 서버 측 커서에서 필요한 만큼만 가져옵니다
+MAX_RESULT_ROWS = int(os.getenv("RDB_MAX_RESULT_ROWS", 100))
+FETCH_BATCH_SIZE = int(os.getenv("RDB_FETCH_BATCH_SIZE", 50))
+
+_ROW_RETURNING_SQL = re.compile(r"^\s*\(*\s*(SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+
+# 실행 가드 - 읽기 전용 트랜잭션, statement_timeout, LIMIT 자동 추가, EXPLAIN 비용 상한
+SQL_GUARD_CONFIG = {
+    "row_limit": int(os.getenv("SQL_GUARD_ROW_LIMIT", 1000)),
+    "statement_timeout_ms": int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", 15000)),
+    "max_plan_cost": float(os.getenv("SQL_GUARD_MAX_COST", 1e6)),
+    "max_plan_rows": float(os.getenv("SQL_GUARD_MAX_ROWS", 100000)),
+    "read_only": os.getenv("SQL_READ_ONLY", "true").lower() in ("1", "true", "yes"),
+}
+if USE_SQLITE:
+    # SQLite 의 EXPLAIN 에는 비용/행 수 추정이 없음 - LIMIT 과 시간 제한만 적용
+    SQL_GUARD_CONFIG.update(max_plan_cost=0, max_plan_rows=0)
+
+sql_guard = SqlGuard(**SQL_GUARD_CONFIG)
+
+# 페이지 이어 받기 - 잘린 결과에 continuation token 을 붙여 search_rdb_next 로 다음 페이지를 바로 조회합니다
+RDB_CONTINUATION_TTL = float(os.getenv("RDB_CONTINUATION_TTL", 900))
+RDB_CONTINUATION_MAX_TOKENS = int(os.getenv("RDB_CONTINUATION_MAX_TOKENS", 1000))
+
+continuation_store = ContinuationStore(ttl=RDB_CONTINUATION_TTL, max_entries=RDB_CONTINUATION_MAX_TOKENS)
+
+# 구조화된 쿼리 로그 - 실행된 SQL 과 실행 시간을 JSON 한 줄씩 남깁니다 (IndexAdvisor 의 입력). 빈 값이면 끔
+RDB_QUERY_LOG = os.getenv("RDB_QUERY_LOG", os.path.join(log_dir, "rdb_queries.jsonl"))
+
+query_log = QueryLog(RDB_QUERY_LOG)
+
+
+def execute_sql_query(conn, sql_query, max_rows=MAX_RESULT_ROWS, tables=None):
+    """
+    Execute a generated SQL statement.
+
+    Row-returning statements are read through a named (server-side) cursor with fetchmany,
+    so at most max_rows + 1 rows ever reach this process no matter how large the result is.
+    The statement first goes through sql_guard in the same transaction (read-only, timeout,
+    LIMIT, EXPLAIN cost budget); SqlGuardError is raised if the guard rejects it. When tables
+    (the schema catalog) is given, a single-table query gets its primary key as the last ORDER BY key
+    so that a truncated result can be paged deterministically.
+    Returns {"columns", "types", "rows", "more_available", "notes", "statement", "pageable"} for
+    queries, {"affected_rows"} otherwise. statement is the SQL the guard actually ran and pageable
+    tells whether its top-level ORDER BY covers the primary key of every table it reads, i.e. the row
+    order is fully determined (continuation tokens are only issued for those).
+    Successful statements are appended to query_log.
+    """
+    started = time.perf_counter()
+    row_returning = bool(_ROW_RETURNING_SQL.match(sql_query))
+    order_by = stable_order(sql_query, tables) if tables and row_returning else None
+    statement, notes = sql_guard.prepare(conn, sql_query, row_returning, order_by=order_by, tables=tables)
+
+    if not row_returning:
+        with conn.cursor() as cursor:
+            cursor.execute(statement)
+            if cursor.description is None:
+                affected_rows = cursor.rowcount
+                conn.commit()  # 필요한 경우 변경사항을 커밋
+                query_log.record(sql_query, (time.perf_counter() - started) * 1000, affected_rows)
+                return {"affected_rows": affected_rows}
+            rows = cursor.fetchmany(max_rows + 1)
+            query_log.record(sql_query, (time.perf_counter() - started) * 1000, len(rows[:max_rows]))
+            return {
+                "columns": [desc[0] for desc in cursor.description],
+                "types": [desc[1] for desc in cursor.description],
+                "rows": rows[:max_rows],
+                "more_available": len(rows) > max_rows,
+                "notes": notes,
+                "statement": statement,
+                "pageable": False,
+            }
+
+    # DECLARE ... CURSOR FOR 안에서는 문장 끝 세미콜론을 쓸 수 없음 (prepare 가 이미 제거)
+    with conn.cursor(name=f"search_rdb_{uuid.uuid4().hex}") as cursor:
+        cursor.itersize = FETCH_BATCH_SIZE
+        cursor.execute(statement)
+
+        rows = []
+        while len(rows) < max_rows:
+            batch = cursor.fetchmany(min(FETCH_BATCH_SIZE, max_rows - len(rows)))
+            if not batch:
+                break
+            rows.extend(batch)
+        more_available = len(rows) == max_rows and bool(cursor.fetchmany(1))
+        columns = [desc[0] for desc in cursor.description]
+        types = [desc[1] for desc in cursor.description]
+
+    query_log.record(sql_query, (time.perf_counter() - started) * 1000, len(rows))
+    return {"columns": columns, "types": types, "rows": rows, "more_available": more_available, "notes": notes,
+            "statement": statement, "pageable": bool(tables) and order_covers_key(statement, tables)}
+
+
+def format_query_result(sql_query, result, fixed=False, offset=0, continuation=None):
+    """
+    Render an execute_sql_query result as the markdown text returned to the agent.
+
+    offset is the position of the first row (for pages fetched with a continuation token) and
+    continuation is the token for the following page, if there is one.
+    """
+    label = "SQL Query (fixed)" if fixed else "SQL Query"
+
+    if "affected_rows" in result:
+        return [TextContent(type="text", text=f"{label}:\n```sql\n{sql_query}\n```\n\nQuery executed successfully. Affected rows: {result['affected_rows']}")]
+
+    columns = result["columns"]
+    rows = result["rows"]
+
+    # Format the results as markdown table - 줄 단위로 모아서 마지막에 한 번만 join
+    parts = [
+        "| " + " | ".join(columns) + " |\n",
+        "| " + " | ".join(["---" for _ in columns]) + " |\n",
+    ]
+    
+    if not rows:
+        parts.append("| No results found |" + " | ".join(["" for _ in range(len(columns)-1)]) + " |\n")
+    else:
+        parts.extend(
+            "| " + " | ".join([str(val) if val is not None else "NULL" for val in row]) + " |\n"
+            for row in rows
+        )
+        
+        if result["more_available"] and continuation:
+            parts.append(f"\n_Note: Results limited to {len(rows)} rows; more rows are available. "
+                         f"Call search_rdb_next with continuation_token=`{continuation}` to fetch the next page._")
+        elif result["more_available"]:
+            parts.append(f"\n_Note: Results limited to {len(rows)} rows; more rows are available._")
+
+    parts.extend(f"\n_Note: {note}._" for note in result.get("notes", []))
+    
+    heading = f"Results (rows {offset + 1}-{offset + len(rows)})" if offset else "Results"
+    return [TextContent(type="text", text=f"{label}:\n```sql\n{sql_query}\n```\n\n{heading}:\n" + "".join(parts))]
+
+
+def format_structured_result(sql_query, result, output_format, fixed=False, offset=0, continuation=None, extra=None):
+    """
+    Render an execute_sql_query result as column-oriented JSON ("json"), or as JSON metadata
+    plus the rows as base64 Arrow IPC stream bytes in a second content part ("arrow").
+
+    Downstream tools can read the columns directly instead of parsing the markdown table.
+    Falls back to JSON data when pyarrow is not installed. extra is merged into the JSON payload.
+    """
+    payload = dict(extra or {}, sql=sql_query, fixed=fixed)
+    if "affected_rows" in result:
+        payload["affected_rows"] = result["affected_rows"]
+        return [TextContent(type="text", text=to_json(payload))]
+
+    columns = describe_columns(result)
+    notes = list(result.get("notes", []))
+    payload.update(
+        columns=columns,
+        row_count=len(result["rows"]),
+        offset=offset,
+        more_available=result["more_available"],
+        continuation_token=continuation,
+    )
+
+    ipc = arrow_ipc(result) if output_format == "arrow" else None
+    if ipc is None:
+        if output_format == "arrow":
+            notes.append("pyarrow is not installed; rows are returned as JSON instead of Arrow")
+        payload["data"] = columnar_data(result, columns)
+        payload["notes"] = notes
+        return [TextContent(type="text", text=to_json(payload))]
+
+    payload["notes"] = notes
+    payload["arrow"] = {"content_index": 1, "mime_type": ARROW_MIME_TYPE, "bytes": len(ipc)}
+    blob = BlobResourceContents(
+        uri=f"search-rdb://results/{uuid.uuid4().hex}.arrows",
+        mimeType=ARROW_MIME_TYPE,
+        blob=base64.b64encode(ipc).decode("ascii"),
+    )
+    return [TextContent(type="text", text=to_json(payload)), EmbeddedResource(type="resource", resource=blob)]
+
+
+def continuation_entry(result, offset=0):
+    """(guarded statement, next offset) for a truncated result in a stable order, else None"""
+    if result.get("more_available") and result.get("pageable"):
+        return result["statement"], offset + len(result["rows"])
+    return None
+
+
+def render_result(sql_query, result, fixed=False, offset=0, output_format="markdown", extra=None):
+    """Render in output_format, issuing a continuation token when more rows are available."""
+    continuation = None
+    entry = continuation_entry(result, offset)
+    if entry is not None:
+        continuation = continuation_store.put(*entry)
+    elif result.get("more_available"):
+        # 순서가 정해지지 않은 결과는 다음 페이지가 앞 페이지와 겹치거나 빠질 수 있어 토큰을 주지 않음
+        result = dict(result, notes=result.get("notes", []) + [
+            "no stable row order, so no continuation token was issued; ORDER BY the primary key of every table "
+            "to page through the rest"])
+    if output_format == "markdown":
+        return format_query_result(sql_query, result, fixed=fixed, offset=offset, continuation=continuation)
+    return format_structured_result(sql_query, result, output_format, fixed=fixed, offset=offset,
+                                    continuation=continuation, extra=extra)
+
+
+def _content_size(contents):
+    return sum(len(getattr(c, "text", "")) + len(getattr(getattr(c, "resource", None), "blob", "")) for c in contents)
+
+
+async def run_with_connection(fn, *args):
+    """
+    Run a blocking psycopg2 function on a pooled connection in a worker thread.
+
+    The connection is borrowed only for the duration of fn, so no connection is held
+    while a request is waiting on the LLM.
+    """
+    def _run():
+        with db_pool.connection() as conn:
+            return fn(conn, *args)
+
+    return await asyncio.to_thread(_run)
+
+
+def execute_read_only(conn, sql_query, running, key, tables=None):
+    """
+    Execute a fix candidate inside a read-only transaction that is always rolled back.
+
+    While the statement runs the connection is registered in running[key] so that a
+    competing candidate that wins first can cancel it with conn.cancel().
+    """
+    running[key] = conn
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION READ ONLY")
+        return execute_sql_query(conn, sql_query, MAX_RESULT_ROWS, tables)
+    finally:
+        running.pop(key, None)
+        conn.rollback()
+
+
+async def speculative_fix_sql(llm, db_schema, query, sql_query, error_info, schema_entry, candidates):
+    """
+    Request `candidates` fixes concurrently and test each one as soon as it arrives.
+
+    The first candidate that executes successfully wins; the remaining LLM calls are
+    cancelled and queries still running on the database are cancelled with conn.cancel().
+    Returns (fixed_sql, result), or (None, error_info) if no candidate succeeded.
+    """
+    running = {}
+    tried = {sql_query}
+
+    async def _try_candidate(key):
+        fixed_sql = await fix_sql_query(llm, db_schema, query, sql_query, error_info)
+        fixed_sql = correct_sql_literals(fixed_sql, schema_entry["tables"])
+        fixed_sql, _, validation_errors = repair_sql_locally(fixed_sql, schema_entry)
+        if fixed_sql in tried:
+            raise ValueError("no new SQL candidate")
+        tried.add(fixed_sql)
+        logger.info(f"Testing SQL fix candidate #{key+1}: {fixed_sql}")
+        try:
+            result = await run_with_connection(execute_read_only, fixed_sql, running, key, schema_entry["tables"])
+        except QUERY_ERRORS as e:
+            message = str(e)
+            if validation_errors:
+                message += "\nLocal validation: " + "; ".join(validation_errors)
+            raise ValueError(message) from e
+        return fixed_sql, result
+
+    search_metrics.incr("llm_fix_calls", candidates)
+    pending = {asyncio.create_task(_try_candidate(key)) for key in range(candidates)}
+    last_error = error_info
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    search_metrics.incr("speculative_fix_wins")
+                    return task.result()
+                if str(task.exception()) != "no new SQL candidate":
+                    last_error = str(task.exception())
+                logger.error(f"SQL fix candidate failed: {task.exception()}")
+        return None, last_error
+    finally:
+        for task in pending:
+            task.cancel()
+        for conn in list(running.values()):
+            try:
+                conn.cancel()
+            except DB_ERRORS:
+                pass
+        if pending:
+            search_metrics.incr("speculative_fix_cancelled", len(pending))
+
+
+async def execute_and_render(sql_query, schema_entry, fixed=False, output_format="markdown"):
+    """
+    Execute sql_query and render it, serving repeated SQL from result_cache.
+
+    Returns (contents, result); result is None when the contents came from the cache.
+    Statements that modify data invalidate the cached results of the tables they touch.
+    """
+    try:
+        if result_cache.needs_check():
+            await run_with_connection(result_cache.check, DB_SCHEMA)
+    except DB_ERRORS as e:
+        logger.error(f"Failed to check table changes for the result cache: {str(e)}")
+
+    table_names = {t["name"] for t in schema_entry["tables"]}
+    cached, ticket = result_cache.lookup(sql_query, table_names, variant=output_format)
+    if cached is not None:
+        logger.info("Result cache hit")
+        cached_contents, continuation = cached
+        if continuation is not None:
+            # 캐시된 응답의 토큰이 만료됐을 수 있으므로 다시 등록 (같은 SQL/offset 이면 같은 토큰)
+            continuation_store.put(*continuation)
+        return list(cached_contents), None
+
+    result = await run_with_connection(execute_sql_query, sql_query, MAX_RESULT_ROWS, schema_entry["tables"])
+    contents = render_result(sql_query, result, fixed=fixed, output_format=output_format)
+    if "columns" in result:
+        result_cache.store(ticket, (tuple(contents), continuation_entry(result)), _content_size(contents))
+    else:
+        result_cache.invalidate_tables(referenced_tables(sql_query, table_names) or table_names)
+    return contents, result
+
+
+def _unknown_output_format(output_format):
+    return [TextContent(type="text", text=f"Unknown output_format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}.")]
+
+
+async def search_rdb_next_page(continuation_token: str, output_format: str = "markdown") -> list[TextContent | EmbeddedResource]:
+    """
+    Fetch the next page of a previous search_rdb result without calling the LLM.
+
+    Args:
+        continuation_token: Token from the note under a truncated search_rdb result
+        output_format: "markdown", "json" (column-oriented) or "arrow"
+    """
+    if output_format not in OUTPUT_FORMATS:
+        return _unknown_output_format(output_format)
+    entry = continuation_store.get(continuation_token.strip().strip("`"))
+    if entry is None:
+        return [TextContent(type="text", text="Continuation token is unknown or expired. Please run search_rdb again.")]
+
+    statement, offset = entry
+    search_metrics.incr("next_page_calls")
+    try:
+        result = await run_with_connection(execute_sql_query, paginate_sql(statement, offset, MAX_RESULT_ROWS))
+    except QUERY_ERRORS as e:
+        logger.error(f"Failed to fetch next page: {str(e)}")
+        return [TextContent(type="text", text=f"Failed to fetch the next page.\n\nSQL Query:\n```sql\n{statement}\n```\n\nError: {str(e)}")]
+    # 바깥 페이지 쿼리에는 ORDER BY 가 없지만 안쪽 문장의 순서를 그대로 따름
+    result = dict(result, statement=statement, pageable=True)
+    return render_result(statement, result, offset=offset, output_format=output_format)
+
+
+async def search_rdb_main(query: str, output_format: str = "markdown") -> list[TextContent | EmbeddedResource]:
     """
     Search the relational database using natural language query.
     
     Args:
         query: Natural language query to search the database
+        output_format: "markdown" (default), "json" (column-oriented with typed arrays) or
+            "arrow" (JSON metadata plus base64 Arrow IPC bytes in a second content part)
     """
+    if output_format not in OUTPUT_FORMATS:
+        return _unknown_output_format(output_format)
+    started = time.perf_counter()
+    try:
+        return await _search_rdb(query, output_format)
+    finally:
+        search_metrics.observe("latency_ms", (time.perf_counter() - started) * 1000)
+
+
+async def _search_rdb(query, output_format):
     logger.info(f"Processing RDB search query: {query}")
+    search_metrics.incr("calls")
     
     # Create LLM instance
     try:
@@ -206,34 +763,51 @@ def search_rdb_main(query: str) -> list[TextContent]:
         logger.error(error_msg)
         return [TextContent(type="text", text=error_msg)]
     
-    conn = None
     try:
-        # Connect to PostgreSQL
-        conn = psycopg2.connect(**DB_CONFIG)
-        
         # Get database schema for prompt context
-        db_schema = get_db_schema(conn)
-        logger.info(f"Database schema retrieved successfully:\n{db_schema}")
+        schema_entry = await run_with_connection(get_cached_db_schema)
+        db_schema = schema_entry["text"]
+        schema_fingerprint = schema_entry["fingerprint"]
+        schedule_value_index_refresh(schema_entry)
+        prompt_tables, prompt_schema = select_prompt_schema(schema_entry, query)
+        # 가지치기 효과를 보려면 전체 쪽도 같은 방식(값 목록 포함)으로 렌더링한 크기와 비교
+        full_schema_chars = len(full_prompt_schema(schema_entry))
+        search_metrics.observe("schema_chars_full", full_schema_chars)
+        search_metrics.observe("schema_chars_prompt", len(prompt_schema))
+        logger.info(f"Database schema retrieved successfully ({len(prompt_schema)}/{full_schema_chars} chars in prompt):\n{prompt_schema}")
         print('\ndb_schema')
-        print(db_schema)
+        print(prompt_schema)
       
         
         # Generate SQL from natural language query
-        system_prompt = f"""You are a PostgreSQL database expert. Your task is to convert natural language questions
+        system_prompt = f"""You are a {SQL_DIALECT} database expert. Your task is to convert natural language questions
         into correct SQL queries based on the database schema provided. Return ONLY the SQL query wrapped in 
-        ```sql and ``` tags. Ensure the SQL is syntactically correct for PostgreSQL.
+        ```sql and ``` tags. Ensure the SQL is syntactically correct for {SQL_DIALECT}.
 
         Database Schema:
-        {db_schema}
+        {prompt_schema}
         """
 
         user_prompt = f"Convert this question to SQL: {query}"
         
-        # Call LLM to generate SQL
-        logger.info("Calling LLM to generate SQL query")
-        response = llm.invoke(system_prompt + "\n\n" + user_prompt)
-        content = response.content
-        sql_query = extract_sql_from_response(content)
+        repaired, validation_errors = False, []
+
+        # 같은 질문에 대해 이미 실행에 성공한 SQL 이 있으면 LLM 호출을 건너뜀
+        cached_sql = sql_cache.get(query, schema_fingerprint) if schema_fingerprint else None
+        if cached_sql:
+            logger.info(f"SQL cache hit: {cached_sql}")
+            search_metrics.incr("llm_generate_skipped")
+            sql_query = cached_sql
+        else:
+            # Call LLM to generate SQL
+            logger.info("Calling LLM to generate SQL query")
+            search_metrics.incr("llm_generate_calls")
+            response = await llm.ainvoke(system_prompt + "\n\n" + user_prompt)
+            content = response.content
+            sql_query = extract_sql_from_response(content)
+            if sql_query:
+                sql_query = correct_sql_literals(sql_query, prompt_tables)
+                sql_query, repaired, validation_errors = repair_sql_locally(sql_query, schema_entry)
         
         logger.info(f"Generated SQL query: {sql_query}")
         print('\nsql_query')
@@ -244,92 +818,257 @@ def search_rdb_main(query: str) -> list[TextContent]:
         
         # Execute the SQL query
         try:
-            with conn.cursor() as cursor:
-                cursor.execute(sql_query)
-                
-                # Check if there are results (might be an INSERT, UPDATE, etc.)
-                if cursor.description is None:
-                    affected_rows = cursor.rowcount
-                    conn.commit()  # 필요한 경우 변경사항을 커밋
-                    return [TextContent(type="text", text=f"SQL Query:\n```sql\n{sql_query}\n```\n\nQuery executed successfully. Affected rows: {affected_rows}")]
+            contents, result = await execute_and_render(sql_query, schema_entry, output_format=output_format)
+            if repaired:
+                # 로컬 수정이 없었다면 실패해서 LLM 수정 호출이 필요했을 쿼리
+                search_metrics.incr("llm_fix_avoided")
+            if schema_fingerprint and not cached_sql and (result is None or "columns" in result):
+                sql_cache.put(query, schema_fingerprint, sql_query)
+            return contents
                 
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                
-                # Format the results as markdown table
-                result_md = "| " + " | ".join(columns) + " |\n"
-                result_md += "| " + " | ".join(["---" for _ in columns]) + " |\n"
-                
-                if not rows:
-                    result_md += "| No results found |" + " | ".join(["" for _ in range(len(columns)-1)]) + " |\n"
-                else:
-                    for row in rows[:100]:  # Limit to 100 rows
-                        row_values = [str(val) if val is not None else "NULL" for val in row]
-                        result_md += "| " + " | ".join(row_values) + " |\n"
-                    
-                    if len(rows) > 100:
-                        result_md += "\n_Note: Results limited to 100 rows._"
-                
-                return [TextContent(type="text", text=f"SQL Query:\n```sql\n{sql_query}\n```\n\nResults:\n{result_md}")]
-                
-        except Error as e:
-            # Try to fix SQL if there's an error
-            conn.rollback()
+        except QUERY_ERRORS as e:
+            # Try to fix SQL if there's an error (the pool rolls back the failed transaction)
             logger.error(f"SQL execution error: {str(e)}")
+            if cached_sql:
+                # 데이터나 권한이 바뀌어 캐시된 SQL 이 더 이상 유효하지 않음
+                sql_cache.invalidate(query, schema_fingerprint)
             
+            error_info = str(e)
+            if validation_errors:
+                error_info += "\nLocal validation: " + "; ".join(validation_errors)
+
+            if SQL_FIX_CANDIDATES > 1:
+                # 온도를 높여 서로 다른 후보를 받고, 읽기 전용 트랜잭션에서 동시에 시험
+                fix_llm = create_llm(temperature=SQL_FIX_TEMPERATURE)
+                fixed_sql, outcome = await speculative_fix_sql(
+                    fix_llm, db_schema, query, sql_query, error_info, schema_entry, SQL_FIX_CANDIDATES
+                )
+                if fixed_sql is not None:
+                    if schema_fingerprint and "columns" in outcome:
+                        sql_cache.put(query, schema_fingerprint, fixed_sql)
+                    return render_result(fixed_sql, outcome, fixed=True, output_format=output_format)
+                return [TextContent(type="text", text=f"Failed to execute SQL query after {SQL_FIX_CANDIDATES} parallel fix attempts.\n\nSQL Query:\n```sql\n{sql_query}\n```\n\nError: {outcome}\n\nPlease try rephrasing your question or check if the requested data exists in the database.")]
+
             for attempt in range(3):
                 logger.info(f"SQL error occurred, attempting fix #{attempt+1}")
-                fixed_sql = fix_sql_query(llm, db_schema, query, sql_query, str(e))
+                search_metrics.incr("llm_fix_calls")
+                fixed_sql = await fix_sql_query(llm, db_schema, query, sql_query, error_info)
                 
                 if fixed_sql == sql_query:
                     logger.warning("No changes made to SQL query after fix attempt")
                     break  # Break if no changes were made
                     
                 logger.info(f"SQL query modified: {fixed_sql}")
-                sql_query = fixed_sql
+                sql_query = correct_sql_literals(fixed_sql, schema_entry["tables"])
+                sql_query, _, validation_errors = repair_sql_locally(sql_query, schema_entry)
                 print('\nfixed_sql_query')
                 print(sql_query)
                 
                 try:
-                    with conn.cursor() as cursor:
-                        cursor.execute(sql_query)
-                        
-                        # Check if there are results (might be an INSERT, UPDATE, etc.)
-                        if cursor.description is None:
-                            affected_rows = cursor.rowcount
-                            conn.commit()  # 필요한 경우 변경사항을 커밋
-                            return [TextContent(type="text", text=f"SQL Query (fixed):\n```sql\n{sql_query}\n```\n\nQuery executed successfully. Affected rows: {affected_rows}")]
+                    contents, result = await execute_and_render(sql_query, schema_entry, fixed=True,
+                                                                output_format=output_format)
+                    if schema_fingerprint and (result is None or "columns" in result):
+                        sql_cache.put(query, schema_fingerprint, sql_query)
+                    return contents
                         
-                        columns = [desc[0] for desc in cursor.description]
-                        rows = cursor.fetchall()
-                        
-                        # Format the results as markdown table
-                        result_md = "| " + " | ".join(columns) + " |\n"
-                        result_md += "| " + " | ".join(["---" for _ in columns]) + " |\n"
-                        
-                        if not rows:
-                            result_md += "| No results found |" + " | ".join(["" for _ in range(len(columns)-1)]) + " |\n"
-                        else:
-                            for row in rows[:100]:  # Limit to 100 rows
-                                row_values = [str(val) if val is not None else "NULL" for val in row]
-                                result_md += "| " + " | ".join(row_values) + " |\n"
-                            
-                            if len(rows) > 100:
-                                result_md += "\n_Note: Results limited to 100 rows._"
-                        
-                        return [TextContent(type="text", text=f"SQL Query (fixed):\n```sql\n{sql_query}\n```\n\nResults:\n{result_md}")]
-                        
-                except Error as e2:
-                    logger.error(f"Error after fix attempt #{attempt+1}: {str(e2)}")
-                    if attempt == 2:  # Last attempt
-                        return [TextContent(type="text", text=f"Failed to execute SQL query after multiple fix attempts.\n\nSQL Query:\n```sql\n{sql_query}\n```\n\nError: {str(e2)}\n\nPlease try rephrasing your question or check if the requested data exists in the database.")]
+                except QUERY_ERRORS as e2:
+                    error_info = str(e2)
+                    if validation_errors:
+                        error_info += "\nLocal validation: " + "; ".join(validation_errors)
+                    logger.error(f"Error after fix attempt #{attempt+1}: {error_info}")
+            
+            return [TextContent(type="text", text=f"Failed to execute SQL query after multiple fix attempts.\n\nSQL Query:\n```sql\n{sql_query}\n```\n\nError: {error_info}\n\nPlease try rephrasing your question or check if the requested data exists in the database.")]
     
-    except Error as e:
+    except DB_ERRORS as e:
         error_msg = f"Database connection error: {str(e)}"
         logger.error(error_msg)
         return [TextContent(type="text", text=error_msg)]
-    
+
+
+# 한 번의 search_rdb_batch 호출에서 받을 최대 질문 수
+RDB_BATCH_MAX_QUESTIONS = int(os.getenv("RDB_BATCH_MAX_QUESTIONS", 10))
+
+_BATCH_SQL_BLOCK = re.compile(r"```sql\s*(.*?)\s*```", re.DOTALL)
+
+
+def execute_batch(conn, statements, tables=None):
+    """
+    Execute statements one after another in a single REPEATABLE READ, read-only transaction,
+    so every statement sees the same snapshot. Each statement runs under its own savepoint:
+    a failing statement is rolled back alone and the rest of the batch continues.
+
+    Returns a list with, per statement, the execute_sql_query result, the exception raised,
+    or None when the statement was None.
+    """
+    results = []
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        for i, statement in enumerate(statements):
+            if statement is None:
+                results.append(None)
+                continue
+            with conn.cursor() as cursor:
+                cursor.execute(f"SAVEPOINT batch_{i}")
+            try:
+                results.append(execute_sql_query(conn, statement, MAX_RESULT_ROWS, tables))
+                with conn.cursor() as cursor:
+                    cursor.execute(f"RELEASE SAVEPOINT batch_{i}")
+            except QUERY_ERRORS as e:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT batch_{i}")
+                results.append(e)
     finally:
-        if conn:
-            conn.close()
-            logger.info("Database connection closed")
\ No newline at end of file
+        conn.rollback()
+    return results
+
+
+async def generate_batch_sql(llm, prompt_schema, queries):
+    """
+    Generate SQL for all queries with a single LLM request.
+
+    Returns a list aligned with queries (None where no SQL could be extracted). If the answer
+    does not contain exactly one SQL block per question, the questions are asked one by one
+    concurrently instead.
+    """
+    numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(queries, 1))
+    system_prompt = f"""You are a {SQL_DIALECT} database expert. Your task is to convert each of the numbered
+    natural language questions into a correct SQL query based on the database schema provided.
+    Return exactly one SQL query per question, in the same order, each wrapped in its own
+    ```sql and ``` tags. Ensure the SQL is syntactically correct for {SQL_DIALECT}.
+
+    Database Schema:
+    {prompt_schema}
+    """
+    user_prompt = f"Convert these {len(queries)} questions to SQL:\n{numbered}"
+
+    search_metrics.incr("llm_generate_calls")
+    response = await llm.ainvoke(system_prompt + "\n\n" + user_prompt)
+    blocks = [block.strip() for block in _BATCH_SQL_BLOCK.findall(response.content)]
+    if len(blocks) == len(queries):
+        return [block or None for block in blocks]
+
+    logger.warning(f"Batch answer had {len(blocks)} SQL blocks for {len(queries)} questions; asking one by one")
+    single_prompt = f"""You are a {SQL_DIALECT} database expert. Your task is to convert natural language questions
+    into correct SQL queries based on the database schema provided. Return ONLY the SQL query wrapped in 
+    ```sql and ``` tags. Ensure the SQL is syntactically correct for {SQL_DIALECT}.
+
+    Database Schema:
+    {prompt_schema}
+    """
+
+    async def _one(query):
+        search_metrics.incr("llm_generate_calls")
+        answer = await llm.ainvoke(single_prompt + "\n\n" + f"Convert this question to SQL: {query}")
+        return extract_sql_from_response(answer.content)
+
+    return list(await asyncio.gather(*(_one(q) for q in queries)))
+
+
+def _render_batch_item(index, query, sql_query, outcome, output_format, fixed=False):
+    if isinstance(outcome, dict):
+        if output_format == "markdown":
+            contents = render_result(sql_query, outcome, fixed=fixed)
+            contents[0] = TextContent(type="text", text=f"## Question {index}: {query}\n\n{contents[0].text}")
+            return contents
+        return render_result(sql_query, outcome, fixed=fixed, output_format=output_format,
+                             extra={"question_index": index, "question": query})
+
+    error = "Failed to generate SQL query from the question." if sql_query is None else str(outcome)
+    if output_format == "markdown":
+        sql_part = f"SQL Query:\n```sql\n{sql_query}\n```\n\n" if sql_query else ""
+        return [TextContent(type="text", text=f"## Question {index}: {query}\n\n{sql_part}Error: {error}\n\n"
+                                              "Please try this question on its own with search_rdb.")]
+    return [TextContent(type="text", text=to_json({"question_index": index, "question": query,
+                                                   "sql": sql_query, "error": error}))]
+
+
+async def search_rdb_batch_main(queries: list[str], output_format: str = "markdown") -> list[TextContent | EmbeddedResource]:
+    """
+    Answer several related natural language questions with one LLM request and one
+    database round of execution in a single read-only snapshot.
+
+    Args:
+        queries: Natural language questions (at most RDB_BATCH_MAX_QUESTIONS)
+        output_format: "markdown", "json" or "arrow" (applied to every question)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        return _unknown_output_format(output_format)
+    queries = [q for q in (queries or []) if q and q.strip()]
+    if not queries:
+        return [TextContent(type="text", text="No questions were given.")]
+    if len(queries) > RDB_BATCH_MAX_QUESTIONS:
+        return [TextContent(type="text", text=f"Too many questions ({len(queries)}); at most {RDB_BATCH_MAX_QUESTIONS} per batch.")]
+
+    started = time.perf_counter()
+    try:
+        return await _search_rdb_batch(queries, output_format)
+    finally:
+        search_metrics.observe("batch_latency_ms", (time.perf_counter() - started) * 1000)
+
+
+async def _search_rdb_batch(queries, output_format):
+    logger.info(f"Processing RDB batch of {len(queries)} queries: {queries}")
+    search_metrics.incr("batch_calls")
+    search_metrics.incr("batch_questions", len(queries))
+
+    try:
+        llm = create_llm()
+    except Exception as e:
+        error_msg = f"Failed to initialize LLM: {str(e)}"
+        logger.error(error_msg)
+        return [TextContent(type="text", text=error_msg)]
+
+    try:
+        schema_entry = await run_with_connection(get_cached_db_schema)
+        schema_fingerprint = schema_entry["fingerprint"]
+        schedule_value_index_refresh(schema_entry)
+        prompt_tables, prompt_schema = select_prompt_schema(schema_entry, queries)
+
+        # 캐시에 있는 질문은 LLM 에 보내지 않음
+        statements = [sql_cache.get(q, schema_fingerprint) if schema_fingerprint else None for q in queries]
+        missing = [i for i, sql_query in enumerate(statements) if not sql_query]
+        search_metrics.incr("llm_generate_skipped", len(queries) - len(missing))
+        if missing:
+            generated = await generate_batch_sql(llm, prompt_schema, [queries[i] for i in missing])
+            for i, sql_query in zip(missing, generated):
+                if sql_query:
+                    sql_query = correct_sql_literals(sql_query, prompt_tables)
+                    sql_query, _, _ = repair_sql_locally(sql_query, schema_entry)
+                statements[i] = sql_query
+        logger.info(f"Batch SQL: {statements}")
+
+        outcomes = await run_with_connection(execute_batch, statements, schema_entry["tables"])
+        fixed = [False] * len(queries)
+
+        # 실패한 질문은 동시에 한 번씩만 수정해서 두 번째 스냅샷에서 다시 실행
+        failed = [i for i, outcome in enumerate(outcomes) if isinstance(outcome, Exception)]
+        if failed:
+            for i in failed:
+                if i not in missing and schema_fingerprint:
+                    sql_cache.invalidate(queries[i], schema_fingerprint)
+            search_metrics.incr("llm_fix_calls", len(failed))
+            fixes = await asyncio.gather(*(
+                fix_sql_query(llm, prompt_schema, queries[i], statements[i], str(outcomes[i])) for i in failed
+            ))
+            retry = [None] * len(queries)
+            for i, fixed_sql in zip(failed, fixes):
+                if fixed_sql and fixed_sql != statements[i]:
+                    fixed_sql = correct_sql_literals(fixed_sql, schema_entry["tables"])
+                    retry[i], _, _ = repair_sql_locally(fixed_sql, schema_entry)
+            if any(retry):
+                for i, outcome in enumerate(await run_with_connection(execute_batch, retry, schema_entry["tables"])):
+                    if outcome is not None and not isinstance(outcome, Exception):
+                        statements[i], outcomes[i], fixed[i] = retry[i], outcome, True
+
+        contents = []
+        for i, (query, sql_query, outcome) in enumerate(zip(queries, statements, outcomes)):
+            if schema_fingerprint and isinstance(outcome, dict) and "columns" in outcome:
+                sql_cache.put(query, schema_fingerprint, sql_query)
+            contents.extend(_render_batch_item(i + 1, query, sql_query, outcome, output_format, fixed[i]))
+        return contents
+
+    except DB_ERRORS as e:
+        error_msg = f"Database connection error: {str(e)}"
+        logger.error(error_msg)
+        return [TextContent(type="text", text=error_msg)]
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+logger = logging.getLogger("rdb_search_tool.sql_cache")
+
+
+_QUOTED = re.compile(r"('[^']*'|\"[^\"]*\")")
+
+
+def normalize_question(question):
+    """
+    캐시 키용 질문 정규화 - NFC, 공백 축약, 끝 문장부호 제거, 따옴표 밖만 소문자화.
+    따옴표 안의 값('Tank', "홍성국")은 SQL 리터럴로 그대로 쓰이므로 대소문자를 유지합니다.
+    """
+    text = unicodedata.normalize("NFC", question).strip()
+    text = re.sub(r"[\s?.!。]+$", "", text)
+    parts = _QUOTED.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i]).casefold()
+    return "".join(parts).strip()
+
+
+class SqlCache:
+    """
+    (정규화된 질문, 스키마 지문) -> 실행에 성공한 SQL 을 로컬 SQLite 파일에 저장하는 캐시.
+    max_entries 를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다 (LRU).
+    """
+
+    def __init__(self, db_path, max_entries=5000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS nl2sql (
+                    key TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    sql TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS nl2sql_last_used ON nl2sql (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(question, fingerprint):
+        raw = normalize_question(question) + "\0" + fingerprint
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, question, fingerprint):
+        key = self.make_key(question, fingerprint)
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT sql FROM nl2sql WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._misses += 1
+                    return None
+                conn.execute(
+                    "UPDATE nl2sql SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+                self._hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logger.error(f"SQL cache lookup failed: {str(e)}")
+            return None
+
+    def put(self, question, fingerprint, sql):
+        key = self.make_key(question, fingerprint)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    """
+                    INSERT INTO nl2sql (key, question, fingerprint, sql, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET sql = excluded.sql, last_used = excluded.last_used
+                    """,
+                    (key, normalize_question(question), fingerprint, sql, now, now),
+                )
+                self._stores += 1
+                count = conn.execute("SELECT count(*) FROM nl2sql").fetchone()[0]
+                if count > self.max_entries:
+                    evicted = conn.execute(
+                        """
+                        DELETE FROM nl2sql WHERE key IN (
+                            SELECT key FROM nl2sql ORDER BY last_used ASC LIMIT ?
+                        )
+                        """,
+                        (count - self.max_entries,),
+                    ).rowcount
+                    self._evictions += evicted
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQL cache store failed: {str(e)}")
+
+    def invalidate(self, question, fingerprint):
+        key = self.make_key(question, fingerprint)
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM nl2sql WHERE key = ?", (key,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQL cache invalidation failed: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            try:
+                entries = self._connect().execute("SELECT count(*) FROM nl2sql").fetchone()[0]
+            except sqlite3.Error:
+                entries = None
+            return {
+                "path": self.db_path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions,
+            }
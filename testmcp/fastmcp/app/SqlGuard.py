@@ -0,0 +1,313 @@
+import logging
+import threading
+
+from SqlValidator import fold_ident, ident_value, is_name, quote_ident, table_aliases, tokenize
+
+
+logger = logging.getLogger("rdb_search_tool.sql_guard")
+
+
+class SqlGuardError(Exception):
+    """실행 전 가드가 거부한 SQL (예상 비용 초과, 읽기 전용 위반 등)"""
+
+
+def _top_level(tokens):
+    """괄호 밖(최상위)에 있는 코드 토큰의 인덱스 리스트"""
+    depth = 0
+    result = []
+    for i, (kind, text) in enumerate(tokens):
+        if kind in ("ws", "comment"):
+            continue
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            result.append(i)
+    return result
+
+
+def ensure_limit(sql_query, limit):
+    """
+    최상위 LIMIT/FETCH 가 없는 조회문 끝에 LIMIT 를 붙입니다 (LIMIT ALL 은 LIMIT 이 없는 것으로 보고 숫자로 바꿈).
+    (SELECT ...) UNION (SELECT ...) 처럼 괄호로 시작하는 조회문도 바깥에 붙입니다.
+    Returns (sql, injected). INSERT/UPDATE/DELETE 가 섞인 문장(WITH ... INSERT 등)은 건드리지 않습니다.
+    """
+    tokens = tokenize(sql_query)
+    top = _top_level(tokens)
+    words = [tokens[i][1].lower() for i in top]
+    code = [t[1].lower() for t in tokens if t[0] not in ("ws", "comment")]
+    if "select" not in words and "values" not in words and "table" not in words:
+        # 괄호로 감싼 조회문 - 안쪽까지 모두 봐야 변경문이 아닌지 알 수 있음
+        first = next((w for w in code if w != "("), None)
+        if first not in ("select", "values", "table") or code[0] != "(":
+            return sql_query, False
+        words = code
+    if any(w in ("insert", "update", "delete", "into") for w in words):
+        return sql_query, False
+    if "fetch" in (tokens[i][1].lower() for i in top):
+        return sql_query, False
+    limits = [i for i in top if tokens[i][1].lower() == "limit"]
+    if limits:
+        following = [i for i in top if i > limits[0]]
+        if following and tokens[following[0]][1].lower() == "all":
+            tokens[following[0]][1] = str(int(limit))
+            return "".join(t[1] for t in tokens), True
+        return sql_query, False
+
+    # 끝의 세미콜론/주석/공백을 떼어 낸 뒤 LIMIT 추가 (FOR UPDATE/SHARE 가 있으면 그 앞에)
+    while tokens and (tokens[-1][0] in ("ws", "comment") or tokens[-1][1] == ";"):
+        tokens.pop()
+    body = [t[1] for t in tokens]
+    locking = [i for i in top if i < len(tokens) and tokens[i][1].lower() == "for"]
+    if locking:
+        at = locking[0]
+        return "".join(body[:at]).rstrip() + f"\nLIMIT {int(limit)}\n" + "".join(body[at:]), True
+    return "".join(body) + f"\nLIMIT {int(limit)}", True
+
+
+# 집계 함수 - GROUP BY 없이 써도 결과가 한 행으로 접히므로 기본 키로 정렬할 수 없음
+AGGREGATE_FUNCTIONS = frozenset("""
+    count sum avg min max array_agg string_agg json_agg jsonb_agg json_object_agg jsonb_object_agg
+    bool_and bool_or every bit_and bit_or stddev stddev_pop stddev_samp variance var_pop var_samp
+    mode percentile_cont percentile_disc group_concat total
+""".split())
+
+
+def _top_words(tokens):
+    return [(i, tokens[i][1].lower()) for i in _top_level(tokens)]
+
+
+def has_order_by(sql_query):
+    """최상위(괄호 밖) ORDER BY 가 있는지 - 서브쿼리나 OVER (ORDER BY ...) 는 세지 않음"""
+    words = [w for _, w in _top_words(tokenize(sql_query))]
+    return any(a == "order" and b == "by" for a, b in zip(words, words[1:]))
+
+
+def ensure_order(sql_query, order_by):
+    """
+    조회문의 최상위 ORDER BY 끝에 order_by 를 붙입니다 (없으면 ORDER BY order_by 를 LIMIT/OFFSET/FETCH/FOR 앞에).
+    기존 정렬 키가 겹치는 행의 순서를 order_by 로 정하기 위한 것입니다.
+    """
+    tokens = tokenize(sql_query)
+    while tokens and (tokens[-1][0] in ("ws", "comment") or tokens[-1][1] == ";"):
+        tokens.pop()
+    body = [t[1] for t in tokens]
+    top = _top_words(tokens)
+    ordered = any(a == "order" and b == "by" for (_, a), (_, b) in zip(top, top[1:]))
+    start = next((i for i, w in top if w == "order"), -1) if ordered else -1
+    tail = [i for i, w in top if start < i < len(tokens) and w in ("limit", "offset", "fetch", "for")]
+    clause = f", {order_by}" if ordered else f"\nORDER BY {order_by}"
+    if tail:
+        at = tail[0]
+        return "".join(body[:at]).rstrip() + clause + "\n" + "".join(body[at:])
+    return "".join(body) + clause
+
+
+def _order_items(tokens):
+    """최상위 ORDER BY 의 정렬 항목들 - 각 항목은 ASC/DESC/NULLS ... 를 뗀 코드 토큰 리스트 (ORDER BY 가 없으면 None)"""
+    top = _top_words(tokens)
+    words = [w for _, w in top]
+    starts = [pos for pos, (a, b) in enumerate(zip(words, words[1:])) if a == "order" and b == "by"]
+    if not starts:
+        return None
+    depth = 0
+    items = [[]]
+    for i in range(top[starts[-1] + 1][0] + 1, len(tokens)):
+        kind, text = tokens[i]
+        if kind in ("ws", "comment"):
+            continue
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth -= 1
+        elif depth == 0:
+            if text == ",":
+                items.append([])
+                continue
+            if text == ";" or text.lower() in ("limit", "offset", "fetch", "for"):
+                break
+        items[-1].append(tokens[i])
+    for item in items:
+        while item and item[-1][1].lower() in ("asc", "desc", "nulls", "first", "last"):
+            item.pop()
+    return items
+
+
+def order_covers_key(sql_query, tables):
+    """
+    최상위 ORDER BY 가 결과 행을 하나로 정하는지 - FROM/JOIN 에 나온 모든 테이블의 기본 키 컬럼이
+    정렬 항목에 (컬럼 그대로) 들어 있으면 True. 번호(ORDER BY 2), 식, 별칭으로 쓴 항목은 키로 세지 않습니다.
+    """
+    tokens = tokenize(sql_query)
+    if any(w in ("union", "intersect", "except") for _, w in _top_words(tokens)):
+        return False
+    items = _order_items(tokens)
+    aliases, referenced = table_aliases(sql_query, tables)
+    if not items or not referenced:
+        return False
+    by_name = {t["name"]: t for t in tables}
+    columns = {name: {fold_ident(c["name"]) for c in by_name[name]["columns"]} for name in referenced}
+
+    covered = set()
+    for item in items:
+        if len(item) == 3 and item[1][1] == "." and is_name(item[0]) and is_name(item[2]):
+            table = aliases.get(fold_ident(ident_value(item[0])))
+            column = fold_ident(ident_value(item[2]))
+        elif len(item) == 1 and is_name(item[0]):
+            column = fold_ident(ident_value(item[0]))
+            owners = [t for t in referenced if column in columns[t]]
+            table = owners[0] if len(owners) == 1 else None
+        else:
+            continue
+        if table is not None:
+            covered.add((table, column))
+    return all(
+        by_name[name].get("primary_key")
+        and all((name, fold_ident(c)) in covered for c in by_name[name]["primary_key"])
+        for name in referenced
+    )
+
+
+def stable_order(sql_query, tables):
+    """
+    페이지를 나눠 읽어도 매번 같은 순서가 나오도록 붙일 ORDER BY 식 (정할 수 없으면 None).
+
+    테이블 하나만 읽는 단순 SELECT (JOIN/GROUP BY/DISTINCT/집합 연산/집계 없음) 이고 그 테이블에
+    기본 키가 있을 때만 기본 키로 정렬합니다 - 기본 키 인덱스로 정렬할 수 있어 LIMIT 과 함께 써도 싸고,
+    어떤 SELECT 목록에도 붙일 수 있습니다.
+    """
+    tokens = tokenize(sql_query)
+    top = _top_words(tokens)
+    words = [w for _, w in top]
+    if not words or words[0] != "select":
+        return None
+    if any(w in ("join", "group", "having", "distinct", "union", "intersect", "except", "window")
+           for w in words):
+        return None
+    if "from" not in words:
+        return None
+    code = [i for i, t in enumerate(tokens) if t[0] not in ("ws", "comment")]
+    following = {i: code[pos + 1] for pos, i in enumerate(code[:-1])}
+    at = top[words.index("from")][0]
+    for i, word in top:
+        if i < at and word in AGGREGATE_FUNCTIONS and tokens[following.get(i, i)][1] == "(":
+            return None
+
+    # FROM [schema .] table [[AS] alias] 다음에 WHERE/ORDER/LIMIT/OFFSET/FETCH/FOR 또는 끝
+    names = [tokens[i] for i in code[code.index(at) + 1:]]
+    if len(names) >= 3 and names[1][1] == "." and is_name(names[0]):
+        names = names[2:]
+    if not names or not is_name(names[0]):
+        return None  # FROM (서브쿼리), FROM 함수 등
+    table = {fold_ident(t["name"]): t for t in tables}.get(fold_ident(ident_value(names[0])))
+    if table is None or not table.get("primary_key"):
+        return None
+    qualifier, rest = names[0][1], names[1:]
+    if rest and rest[0][1].lower() == "as":
+        rest = rest[1:]
+    if rest and is_name(rest[0]):
+        qualifier, rest = rest[0][1], rest[1:]
+    if rest and rest[0][1] != ";" and rest[0][1].lower() not in ("where", "order", "limit", "offset", "fetch", "for"):
+        return None  # FROM a, b / 테이블 함수 등
+    return ", ".join(f"{qualifier}.{quote_ident(column)}" for column in table["primary_key"])
+
+
+class SqlGuard:
+    """
+    생성된 SQL 을 실행하기 직전에 같은 트랜잭션 안에서 적용하는 안전장치.
+
+    - 읽기 전용 트랜잭션 (read_only=True 일 때)
+    - 호출 단위 statement_timeout (SET LOCAL 이라 트랜잭션이 끝나면 풀 연결에 남지 않음)
+    - 조회문에 호출자가 준 안정적인 정렬(기본 키) 추가 - ORDER BY 가 없으면 새로, 있으면 끝에 덧붙여서
+      겹치는 행의 순서도 정함 (페이지 이어 받기용)
+    - LIMIT 없는 조회문에 LIMIT 추가
+    - EXPLAIN 예상 행 수가 max_plan_rows 를 넘으면 LIMIT 로 감싸서 줄이고,
+      예상 비용이 max_plan_cost 를 넘으면 실행하지 않고 SqlGuardError
+      (둘 다 0 이면 EXPLAIN 을 하지 않음)
+    """
+
+    def __init__(self, row_limit=1000, statement_timeout_ms=15000, max_plan_cost=1e6,
+                 max_plan_rows=100000, read_only=True):
+        self.row_limit = row_limit
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_plan_cost = max_plan_cost
+        self.max_plan_rows = max_plan_rows
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._counts = {"checked": 0, "limits_injected": 0, "orders_injected": 0, "narrowed": 0, "rejected": 0}
+
+    def _incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    @staticmethod
+    def explain(cursor, sql_query):
+        """Returns (estimated total cost, estimated rows) of the top plan node."""
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql_query)
+        plan = cursor.fetchone()[0][0]["Plan"]
+        return plan["Total Cost"], plan["Plan Rows"]
+
+    def prepare(self, conn, sql_query, row_returning, order_by=None, tables=None):
+        """
+        conn 의 현재 트랜잭션에 가드 설정을 적용하고 실제로 실행할 SQL 을 돌려줍니다.
+        반드시 트랜잭션의 첫 문장보다 먼저 호출해야 합니다. order_by 는 stable_order() 결과로, LIMIT 보다
+        먼저 최상위 ORDER BY 로 (이미 있으면 마지막 정렬 키로) 붙여서 잘린 결과도 매번 같은 행이 되게 합니다.
+        tables 를 알면 이미 기본 키로 정렬된 문장에는 붙이지 않습니다.
+        Returns (sql, notes) - notes 는 사용자에게 보여 줄 변경 사항 설명 리스트
+        """
+        self._incr("checked")
+        notes = []
+        statement = sql_query.strip().rstrip(";").strip()
+        with conn.cursor() as cursor:
+            if self.read_only:
+                cursor.execute("SET TRANSACTION READ ONLY")
+            if self.statement_timeout_ms > 0:
+                cursor.execute("SET LOCAL statement_timeout = %s", (int(self.statement_timeout_ms),))
+
+            if not row_returning:
+                # SHOW, DML 등은 EXPLAIN 대상이 아님 - 읽기 전용/타임아웃만 적용
+                return statement, notes
+
+            if order_by and not (tables and order_covers_key(statement, tables)):
+                if has_order_by(statement):
+                    notes.append(f"{order_by} appended to ORDER BY by the query guard as a tiebreaker "
+                                 f"for stable paging")
+                else:
+                    notes.append(f"ORDER BY {order_by} added by the query guard for stable paging")
+                statement = ensure_order(statement, order_by)
+                self._incr("orders_injected")
+
+            if self.row_limit > 0:
+                statement, injected = ensure_limit(statement, self.row_limit)
+                if injected:
+                    self._incr("limits_injected")
+                    notes.append(f"LIMIT {self.row_limit} added by the query guard")
+
+            if self.max_plan_cost <= 0 and self.max_plan_rows <= 0:
+                return statement, notes  # 비용 추정을 쓰지 않는 엔진 (SQLite 등)
+
+            cost, rows = self.explain(cursor, statement)
+            if self.row_limit > 0 and rows > self.max_plan_rows:
+                # 사용자가 준 LIMIT 이 너무 큰 경우 - 바깥에서 다시 자름
+                notes.append(f"estimated {rows:.0f} rows; narrowed to LIMIT {self.row_limit} by the query guard")
+                statement = f"SELECT * FROM (\n{statement}\n) AS guarded LIMIT {int(self.row_limit)}"
+                cost, rows = self.explain(cursor, statement)
+                self._incr("narrowed")
+
+            if self.max_plan_cost > 0 and cost > self.max_plan_cost:
+                self._incr("rejected")
+                logger.warning(f"Rejected SQL with estimated cost {cost:.0f}: {statement}")
+                raise SqlGuardError(
+                    f"Query rejected by the guard: estimated plan cost {cost:.0f} exceeds the budget "
+                    f"{self.max_plan_cost:.0f}. Add filters, join conditions or aggregate the result."
+                )
+        return statement, notes
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts,
+                        row_limit=self.row_limit,
+                        statement_timeout_ms=self.statement_timeout_ms,
+                        max_plan_cost=self.max_plan_cost,
+                        read_only=self.read_only)
@@ -0,0 +1,291 @@
+import re
+import unicodedata
+
+
+_TOKEN = re.compile(r"""
+      (?P<ws>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<string>[EeNn]?'(?:[^']|'')*')
+    | (?P<qident>"(?:[^"]|"")+")
+    | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+    | (?P<ident>[A-Za-z_\u0080-\uffff][\w$\u0080-\uffff]*)
+    | (?P<op>::|<>|!=|<=|>=|\|\||[-+*/%=<>~!@#^&|`?:])
+    | (?P<punct>[(),;.\[\]])
+    | (?P<other>.)
+""", re.S | re.X)
+
+# 식별자로 취급하지 않을 키워드/타입/특수 함수 이름 (소문자)
+KEYWORDS = frozenset("""
+    all and any array as asc between bigint boolean both by case cast char character coalesce
+    collate cross current_date current_time current_timestamp current_user date day decimal
+    default delete desc distinct double else end except exists extract false fetch filter first
+    following for from full group having hour ilike in inner insert integer intersect interval
+    into is isnull join last lateral leading left like limit localtime localtimestamp minute
+    month natural not notnull null nulls numeric offset on only or order outer over partition
+    precision preceding range real recursive returning right row rows second select set similar
+    smallint some symmetric table text then time timestamp to trailing true union unknown update
+    using values varchar varying when where window with within without year zone
+""".split())
+
+_PLAIN_IDENT = re.compile(r"[a-z_][a-z0-9_$]*")
+
+
+def quote_ident(name):
+    """PostgreSQL 에서 그대로 쓸 수 있으면 그대로, 아니면 큰따옴표로 감쌉니다."""
+    if _PLAIN_IDENT.fullmatch(name) and name not in KEYWORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def tokenize(sql_text):
+    return [[m.lastgroup, m.group()] for m in _TOKEN.finditer(sql_text)]
+
+
+def ident_value(token):
+    """토큰이 가리키는 실제 식별자 (따옴표 없으면 PostgreSQL 처럼 소문자로 접힘)"""
+    kind, text = token
+    if kind == "qident":
+        return text[1:-1].replace('""', '"')
+    return text.lower()
+
+
+def is_name(token):
+    return token[0] == "qident" or (token[0] == "ident" and token[1].lower() not in KEYWORDS)
+
+
+def fold_ident(name):
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def table_aliases(sql_query, tables):
+    """SQL 의 FROM/JOIN 에 나오는 알려진 테이블. Returns ({접은 테이블 이름/별칭: table}, [table])"""
+    table_names = {fold_ident(t["name"]): t["name"] for t in tables}
+    tokens = [t for t in tokenize(sql_query) if t[0] not in ("ws", "comment")]
+    aliases = {}
+    referenced = []
+    for i, token in enumerate(tokens):
+        if not is_name(token) or (i + 1 < len(tokens) and tokens[i + 1][1] in (".", "(")):
+            continue
+        table = table_names.get(fold_ident(ident_value(token)))
+        if table is None or (i > 1 and tokens[i - 1][1] == "."
+                             and fold_ident(ident_value(tokens[i - 2])) in table_names):
+            continue  # alias.col 의 col 이 테이블 이름과 같은 경우
+        if table not in referenced:
+            referenced.append(table)
+        aliases[fold_ident(table)] = table
+        j = i + 1
+        if j < len(tokens) and tokens[j][1].lower() == "as":
+            j += 1
+        if j < len(tokens) and is_name(tokens[j]):
+            aliases[fold_ident(ident_value(tokens[j]))] = table
+    return aliases, referenced
+
+
+def edit_distance(a, b):
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _closest(name, candidates, max_distance):
+    """대소문자 무시 일치 -> 편집 거리 max_distance 이내의 유일한 최근접 후보"""
+    folded = fold_ident(name)
+    exact = [c for c in candidates if fold_ident(c) == folded]
+    if len(exact) == 1:
+        return exact[0], "case"
+    scored = sorted((edit_distance(folded, fold_ident(c)), c) for c in candidates)
+    if scored and scored[0][0] <= max_distance and (len(scored) == 1 or scored[1][0] > scored[0][0]):
+        return scored[0][1], "near_miss"
+    return None, None
+
+
+class SqlValidator:
+    """
+    생성된 PostgreSQL 문장을 토큰 단위로 읽어 테이블/컬럼 식별자를 캐시된 스키마와 대조하고,
+    대소문자, 스키마 한정 누락, 한두 글자 오타 같은 사소한 문제는 그 자리에서 고칩니다.
+
+    완전한 SQL 파서가 아니므로, 확신할 수 없는 식별자(서브쿼리/CTE 의 컬럼, AS 없는 별칭 등)는
+    건드리지 않고 그대로 둡니다.
+    """
+
+    def __init__(self, tables, schema_name):
+        self.schema_name = schema_name
+        self.tables = {t["name"]: t for t in tables}
+        self.columns = {t["name"]: [c["name"] for c in t["columns"]] for t in tables}
+
+    def validate(self, sql_text):
+        """
+        Returns {"sql", "repairs", "errors"}
+        repairs: [(kind, old, new)] - kind 는 "qualify", "case", "near_miss"
+        errors:  고칠 수 없는 식별자 설명 리스트
+        """
+        tokens = tokenize(sql_text)
+        code = [i for i, t in enumerate(tokens) if t[0] not in ("ws", "comment")]
+        repairs = []
+        errors = []
+
+        ctes = self._cte_names(tokens, code)
+        sources, aliases, opaque, consumed = self._table_refs(tokens, code, ctes, repairs, errors)
+
+        known_columns = []
+        for table_name in sources:
+            known_columns.extend(self.columns[table_name])
+
+        output_aliases = set()
+        for pos, i in enumerate(code[1:], 1):
+            if tokens[code[pos - 1]][1].lower() == "as" and is_name(tokens[i]):
+                output_aliases.add(ident_value(tokens[i]))
+
+        for pos, i in enumerate(code):
+            if i in consumed or not is_name(tokens[i]):
+                continue
+            prev_tok = tokens[code[pos - 1]] if pos > 0 else None
+            next_tok = tokens[code[pos + 1]] if pos + 1 < len(code) else None
+            if next_tok is not None and next_tok[1] in ("(", "."):
+                continue  # 함수 호출, 또는 한정자(alias.col 의 alias)
+            if prev_tok is not None and prev_tok[1].lower() in ("::", "as"):
+                continue  # 타입 캐스트, 별칭 정의
+
+            if prev_tok is not None and prev_tok[1] == "." and pos >= 2:
+                qualifier = ident_value(tokens[code[pos - 2]])
+                table_name = aliases.get(qualifier)
+                if table_name is None:
+                    continue
+                self._check_column(tokens[i], self.columns[table_name], f"{qualifier}.", repairs, errors, strict=True)
+                continue
+
+            if opaque or not sources:
+                continue
+            value = ident_value(tokens[i])
+            if value in output_aliases or value in aliases:
+                continue
+            self._check_column(tokens[i], known_columns, "", repairs, errors, strict=tokens[i][0] == "qident")
+
+        return {"sql": "".join(t[1] for t in tokens), "repairs": repairs, "errors": errors}
+
+    def _check_column(self, token, candidates, prefix, repairs, errors, strict):
+        name = ident_value(token)
+        if name in candidates:
+            return
+        max_distance = max(1, len(name) // 4) if strict else 1
+        match, kind = _closest(name, candidates, max_distance)
+        if match is None or (not strict and kind == "near_miss" and len(name) < 4):
+            if strict:
+                errors.append(f'column "{prefix}{name}" does not exist')
+            return
+        old = token[1]
+        token[0], token[1] = "qident", quote_ident(match)
+        repairs.append((kind, prefix + old, prefix + token[1]))
+
+    @staticmethod
+    def _cte_names(tokens, code):
+        names = set()
+        for pos in range(len(code) - 2):
+            a, b, c = (tokens[code[pos + k]] for k in range(3))
+            if is_name(a) and b[1].lower() == "as" and c[1] == "(":
+                names.add(ident_value(a))
+        return names
+
+    def _table_refs(self, tokens, code, ctes, repairs, errors):
+        """FROM/JOIN/UPDATE/INTO 뒤의 테이블 참조를 찾아 검증/수정합니다."""
+        sources = []       # 알려진 테이블 이름
+        aliases = {}       # 별칭 또는 테이블 이름 -> 알려진 테이블 이름
+        opaque = False     # 서브쿼리/CTE/함수/알 수 없는 테이블이 있으면 bare 컬럼은 검증하지 않음
+        consumed = set()
+
+        # EXTRACT(x FROM y), SUBSTRING(x FROM n) 안의 FROM 은 테이블 참조가 아님
+        in_function = []
+        stack = []
+        for pos, i in enumerate(code):
+            if tokens[i][1] == "(":
+                stack.append(tokens[code[pos - 1]][1].lower() if pos > 0 else "")
+            elif tokens[i][1] == ")" and stack:
+                stack.pop()
+            in_function.append(stack[-1] if stack else "")
+
+        pos = 0
+        while pos < len(code):
+            word = tokens[code[pos]][1].lower()
+            if word not in ("from", "join", "update", "into") or \
+                    in_function[pos] in ("extract", "substring", "trim", "overlay", "position"):
+                pos += 1
+                continue
+            pos += 1
+            while pos < len(code):
+                tok = tokens[code[pos]]
+                if tok[1] == "(" or tok[1].lower() in ("lateral", "only"):
+                    opaque = True
+                    break
+                if not is_name(tok):
+                    break
+
+                # [schema .] table
+                schema_tok = None
+                if pos + 2 < len(code) and tokens[code[pos + 1]][1] == "." and is_name(tokens[code[pos + 2]]):
+                    schema_tok, pos = tok, pos + 2
+                    tok = tokens[code[pos]]
+                name_index = code[pos]
+                consumed.add(name_index)
+                if schema_tok is not None:
+                    consumed.add(code[pos - 2])
+                pos += 1
+
+                if pos < len(code) and tokens[code[pos]][1] == "(":
+                    opaque = True  # FROM generate_series(...) 같은 함수
+                    break
+
+                table_name = self._resolve_table(tokens, name_index, schema_tok, ctes, repairs, errors)
+                if table_name is None:
+                    opaque = True
+                else:
+                    sources.append(table_name)
+                    aliases[table_name.lower()] = table_name
+                    aliases[table_name] = table_name
+
+                # [AS] alias
+                if pos < len(code) and tokens[code[pos]][1].lower() == "as":
+                    pos += 1
+                if pos < len(code) and is_name(tokens[code[pos]]):
+                    alias = ident_value(tokens[code[pos]])
+                    consumed.add(code[pos])
+                    if table_name is not None:
+                        aliases[alias] = table_name
+                    pos += 1
+
+                if pos < len(code) and tokens[code[pos]][1] == "," and word == "from":
+                    pos += 1
+                    continue
+                break
+        return sources, aliases, opaque, consumed
+
+    def _resolve_table(self, tokens, name_index, schema_tok, ctes, repairs, errors):
+        token = tokens[name_index]
+        name = ident_value(token)
+        if schema_tok is None and name in ctes:
+            return None
+        if schema_tok is not None and fold_ident(ident_value(schema_tok)) != fold_ident(self.schema_name):
+            return None  # 다른 스키마 (information_schema, pg_catalog 등) 는 검증 대상 아님
+
+        match, kind = (name, None) if name in self.tables else _closest(name, list(self.tables), max(1, len(name) // 4))
+        if match is None:
+            errors.append(f'relation "{name}" does not exist in schema {self.schema_name}')
+            return None
+
+        qualified = f"{quote_ident(self.schema_name)}.{quote_ident(match)}"
+        if schema_tok is None:
+            old = token[1]
+            token[0], token[1] = "qident", qualified
+            repairs.append((kind or "qualify", old, qualified))
+        elif kind is not None:
+            old = token[1]
+            token[0], token[1] = "qident", quote_ident(match)
+            repairs.append((kind, old, token[1]))
+        return match
@@ -0,0 +1,251 @@
+import difflib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import psycopg2
+
+from SqlValidator import fold_ident, ident_value, table_aliases, tokenize
+
+
+logger = logging.getLogger("rdb_search_tool.value_index")
+
+
+TEXT_TYPES = ("text", "character varying", "character", "varchar", "char", "citext")
+
+DB_ERRORS = (psycopg2.Error, sqlite3.Error)
+
+# ANALYZE 가 모은 컬럼별 최빈값 목록과 빈도 - 테이블을 읽지 않으므로 큰 테이블에서도 즉시 끝남
+COLUMN_STATS_SQL = """
+SELECT s.tablename, s.attname, s.most_common_vals::text::text[], s.most_common_freqs, s.null_frac, c.reltuples
+FROM pg_stats s
+JOIN pg_namespace n ON n.nspname = s.schemaname
+JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename
+WHERE s.schemaname = %s AND NOT s.inherited
+"""
+
+# 빈도는 float4 라 합이 정확히 1 이 되지 않음
+STATS_COVERAGE_SLACK = 0.001
+
+# "col" = 'value', alias."col" = 'value', col <> 'value' ... 형태의 비교식
+_COMPARISON = re.compile(
+    r"""(?P<ident>(?:[A-Za-z_가-힣][\w가-힣]*\.|"[^"]+"\.)?(?:"[^"]+"|[A-Za-z_가-힣][\w가-힣]*))"""
+    r"""(?P<op>\s*(?:=|<>|!=)\s*)'(?P<literal>(?:[^']|'')*)'"""
+)
+
+
+def _normalize(value):
+    return re.sub(r"\s+", "", unicodedata.normalize("NFC", value)).casefold()
+
+
+def _jamo(value):
+    # 한글 음절을 자모로 분해해서 비교 ('이태죠' 와 '이태조' 는 모음 하나만 다름)
+    return unicodedata.normalize("NFD", value)
+
+
+def _quote(name):
+    # PostgreSQL 과 SQLite 모두에서 쓸 수 있는 식별자 인용
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _split_ident(ident):
+    """'alias."Col"' -> ('alias', 'col') - 둘 다 fold_ident 로 접은 이름, 한정자가 없으면 None"""
+    tokens = [t for t in tokenize(ident) if t[0] in ("ident", "qident")]
+    column = fold_ident(ident_value(tokens[-1]))
+    return (fold_ident(ident_value(tokens[0])) if len(tokens) > 1 else None), column
+
+
+class ValueIndex:
+    """
+    카디널리티가 낮은 텍스트 컬럼의 값 목록(빈도순)을 미리 모아 두는 색인.
+
+    - 프롬프트에 관련 테이블 컬럼의 대표 값을 넣어 LLM 이 실제 철자를 쓰도록 돕고
+    - 생성된 SQL 의 col = 'literal' 이 실제 값과 다르면 실행 전에 가장 가까운 값으로 고칩니다.
+    """
+
+    def __init__(self, max_distinct=50, max_value_length=100, max_distinct_ratio=0.5, ttl=3600.0,
+                 scan_rows=100000, timeout_ms=5000, stats_sql=COLUMN_STATS_SQL):
+        self.max_distinct = max_distinct
+        self.max_distinct_ratio = max_distinct_ratio
+        self.max_value_length = max_value_length
+        self.ttl = ttl
+        self.scan_rows = scan_rows
+        self.timeout_ms = timeout_ms
+        self.stats_sql = stats_sql  # None 이면 통계 없이 직접 셈 (내장 DB)
+        self._values = {}  # (table, column) -> [value, ...] (빈도순)
+        self._fingerprint = None
+        self._built_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def is_stale(self, fingerprint):
+        return (self._built_at is None
+                or self._fingerprint != fingerprint
+                or time.monotonic() - self._built_at > self.ttl)
+
+    def refresh(self, conn, tables, fingerprint):
+        """
+        tables(fetch_schema_catalog 결과)의 텍스트 컬럼 값 목록을 다시 모읍니다.
+
+        통계가 있는 컬럼은 pg_stats 의 최빈값 목록만 읽고 (테이블을 읽지 않음), 통계가 없는 테이블(ANALYZE
+        전, 뷰, 내장 DB)만 scan_rows 행까지 statement_timeout 을 걸고 직접 셉니다. 그보다 큰 테이블은
+        값 목록이 완전하다고 할 수 없으므로 건너뜁니다 - 일부만 본 목록으로 리터럴을 고치면 드문 값이
+        흔한 값으로 바뀝니다.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        started = time.perf_counter()
+        try:
+            values = {}
+            stats = self._column_stats(conn, tables[0]["schema"]) if tables else {}
+            for table in tables:
+                text_columns = [
+                    col["name"] for col in table["columns"]
+                    if col["type"].startswith(TEXT_TYPES) and not col["pk"]
+                ]
+                unanalyzed = []
+                for column in text_columns:
+                    entry = stats.get((table["name"], column))
+                    if entry is None:
+                        unanalyzed.append(column)
+                        continue
+                    found = self._from_stats(*entry)
+                    if found:
+                        values[(table["name"], column)] = found
+                if unanalyzed:
+                    values.update(self._scan(conn, table, unanalyzed))
+
+            with self._lock:
+                self._values = values
+                self._fingerprint = fingerprint
+                self._built_at = time.monotonic()
+            logger.info(f"Value index refreshed: {len(values)} categorical columns "
+                        f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _column_stats(self, conn, schema_name):
+        """{(table, column): (most_common_vals, most_common_freqs, null_frac, reltuples)}"""
+        if self.stats_sql is None:
+            return {}
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.stats_sql, (schema_name,))
+                rows = cursor.fetchall()
+        finally:
+            conn.rollback()
+        return {(table, column): rest for table, column, *rest in rows}
+
+    def _from_stats(self, common_values, frequencies, null_frac, row_estimate):
+        # 최빈값 빈도 + NULL 비율이 1 이면 ANALYZE 표본의 모든 값이 목록에 있음
+        if not common_values or len(common_values) > self.max_distinct:
+            return None
+        if sum(frequencies) + null_frac < 1.0 - STATS_COVERAGE_SLACK:
+            return None
+        if row_estimate > 0 and len(common_values) > self.max_distinct_ratio * row_estimate:
+            return None
+        if any(len(value) > self.max_value_length for value in common_values):
+            return None
+        return list(common_values)  # pg_stats 는 이미 빈도순
+
+    def _scan(self, conn, table, columns):
+        """통계가 없는 테이블을 scan_rows 행까지 직접 세어 {(table, column): [values]}"""
+        relation = f"{_quote(table['schema'])}.{_quote(table['name'])}"
+        found = {}
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", (self.timeout_ms,))
+                cursor.execute(f"SELECT count(*) FROM (SELECT 1 FROM {relation} LIMIT %s) sample",
+                               (self.scan_rows + 1,))
+                total_rows = cursor.fetchone()[0]
+                if total_rows > self.scan_rows:
+                    logger.info(f"Skipping value scan of {table['name']}: more than {self.scan_rows} rows "
+                                f"and no planner statistics (run ANALYZE)")
+                    return found
+
+                for column in columns:
+                    quoted = _quote(column)
+                    cursor.execute(
+                        f"SELECT {quoted}, count(*) FROM {relation} WHERE {quoted} IS NOT NULL "
+                        f"GROUP BY {quoted} ORDER BY count(*) DESC LIMIT %s",
+                        (self.max_distinct + 1,),
+                    )
+                    rows = cursor.fetchall()
+                    if not rows or len(rows) > self.max_distinct:
+                        continue
+                    # 거의 모든 행이 서로 다른 값이면 (제목, 식별자 등) 범주형이 아님
+                    if len(rows) > self.max_distinct_ratio * total_rows:
+                        continue
+                    if any(len(value) > self.max_value_length for value, _ in rows):
+                        continue
+                    found[(table["name"], column)] = [value for value, _ in rows]
+        except DB_ERRORS as e:
+            # statement_timeout 등 - 이 테이블만 건너뜀
+            logger.warning(f"Value scan of {table['name']} failed: {str(e).strip()}")
+            found = {}
+        finally:
+            conn.rollback()
+        return found
+
+    def values_for(self, tables):
+        """{(table, column): [values]} 중 tables 에 속한 것만"""
+        names = {t["name"] for t in tables}
+        with self._lock:
+            return {key: vals for key, vals in self._values.items() if key[0] in names}
+
+    def correct_literals(self, sql_query, tables):
+        """
+        col = 'literal' 의 literal 이 해당 컬럼의 알려진 값에 없으면 가장 가까운 값으로 바꿉니다.
+        컬럼은 (테이블, 컬럼) 단위로 찾습니다 - 한정자는 별칭/테이블 이름으로, 한정자가 없으면 SQL 에 나온
+        테이블 중 그 컬럼을 가진 테이블이 하나일 때만 고칩니다.
+        Returns (corrected_sql, [("table.column", old, new), ...]).
+        """
+        by_key = {(table, fold_ident(column)): vals for (table, column), vals in self.values_for(tables).items()}
+        if not by_key:
+            return sql_query, []
+
+        aliases, referenced = table_aliases(sql_query, tables)
+        columns = {t["name"]: {fold_ident(c["name"]): c["name"] for c in t["columns"]} for t in tables}
+        corrections = []
+
+        def _replace(match):
+            qualifier, column = _split_ident(match.group("ident"))
+            if qualifier is not None:
+                table = aliases.get(qualifier)
+            else:
+                owners = [t for t in referenced if column in columns[t]]
+                table = owners[0] if len(owners) == 1 else None
+            known = by_key.get((table, column))
+            literal = match.group("literal").replace("''", "'")
+            if not known or literal in known:
+                return match.group(0)
+
+            normalized = {_normalize(v): v for v in known}
+            candidate = normalized.get(_normalize(literal))
+            if candidate is None:
+                decomposed = {_jamo(key): value for key, value in normalized.items()}
+                close = difflib.get_close_matches(_jamo(_normalize(literal)), list(decomposed), n=1, cutoff=0.75)
+                candidate = decomposed[close[0]] if close else None
+            if candidate is None:
+                return match.group(0)
+
+            corrections.append((f"{table}.{columns[table][column]}", literal, candidate))
+            escaped = candidate.replace("'", "''")
+            return f"{match.group('ident')}{match.group('op')}'{escaped}'"
+
+        return _COMPARISON.sub(_replace, sql_query), corrections
+
+    def stats(self):
+        with self._lock:
+            return {
+                "columns": len(self._values),
+                "age_seconds": round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+                "ttl_seconds": self.ttl,
+                "refreshing": self._refreshing,
+            }
@@ -0,0 +1,120 @@
+import logging
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict, namedtuple
+
+
+logger = logging.getLogger("search_docs.zip_cache")
+
+
+# central directory 에서 필요한 것만 남긴 멤버 레코드
+ZipMember = namedtuple("ZipMember", "name size crc offset compressed_size method date_time")
+
+# 멤버 하나당 대략적인 메모리 (tuple + int 객체들), 이름 길이는 따로 더함
+_MEMBER_OVERHEAD = 240
+
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class ZipDirectoryCache:
+    """
+    zip 파일의 central directory 를 파싱한 결과를 (path, size, mtime) 키로 메모리에 보관하는 LRU 캐시.
+
+    멤버마다 이름/크기/CRC/local header offset 만 남겨 두고, 바뀌지 않은 zip 은 다시 열지 않습니다.
+    read() 는 저장된 offset 으로 바로 찾아가 멤버 하나만 읽으므로 central directory 를 다시 읽지 않습니다.
+    전체 크기가 max_bytes 를 넘으면 가장 오래 쓰지 않은 zip 부터 버립니다.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (size, mtime_ns, members, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def members(self, path, st=None):
+        """
+        zip 안의 파일 목록 (디렉터리 항목 제외). st 를 주면 os.stat 을 다시 하지 않습니다.
+        zip 이 아니거나 읽을 수 없으면 zipfile.BadZipFile / OSError.
+        """
+        st = st or os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                self._entries.move_to_end(path)
+                self._hits += 1
+                return entry[2]
+            self._misses += 1
+
+        with zipfile.ZipFile(path, 'r') as zip_ref:
+            members = tuple(
+                ZipMember(info.filename, info.file_size, info.CRC, info.header_offset,
+                          info.compress_size, info.compress_type, info.date_time)
+                for info in zip_ref.infolist()
+                if not info.is_dir() and not info.flag_bits & 0x1  # 암호화된 멤버는 읽을 수 없음
+            )
+        nbytes = sum(_MEMBER_OVERHEAD + len(m.name) for m in members)
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old[3]
+            if nbytes <= self.max_bytes:
+                self._entries[path] = (st.st_size, st.st_mtime_ns, members, nbytes)
+                self._bytes += nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted[3]
+                    self._evictions += 1
+        return members
+
+    @staticmethod
+    def read(path, member, max_size=None):
+        """
+        멤버 하나의 내용을 local header offset 으로 바로 읽습니다 (stored/deflate).
+        max_size 보다 크면 None. 그 밖의 압축 방식은 zipfile 로 읽습니다.
+        """
+        if max_size is not None and member.size > max_size:
+            return None
+        if member.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            with zipfile.ZipFile(path, 'r') as zip_ref:
+                return zip_ref.read(member.name)
+
+        with open(path, "rb") as f:
+            f.seek(member.offset)
+            header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            if header[0] != _LOCAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile(f"Bad local header for {member.name} in {path}")
+            f.seek(header[9] + header[10], os.SEEK_CUR)  # 파일 이름 + extra field
+            data = f.read(member.compressed_size)
+
+        if member.method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        if zlib.crc32(data) != member.crc:
+            raise zipfile.BadZipFile(f"CRC mismatch for {member.name} in {path}")
+        return data
+
+    def invalidate(self, path):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry[3]
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "archives": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,141 @@
+"""
+get_db_schema 벤치마크 - 테이블별 information_schema 루프(기존) vs pg_catalog 단일 쿼리(현재)
+
+사용법 (fastmcp/app 에서 실행, .env 의 DB 설정 사용):
+    python benchmarks/bench_schema_introspection.py
+    python benchmarks/bench_schema_introspection.py --synthetic-tables 300 --columns 20
+
+--synthetic-tables 를 주면 임시 스키마에 테이블을 만들어 측정한 뒤 삭제합니다.
+"""
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SearchRdb import DB_CONFIG, DB_SCHEMA  # noqa: E402
+from SchemaCache import fetch_schema_catalog, render_schema  # noqa: E402
+
+
+class CountingCursor(extensions.cursor):
+    """execute 호출 수(= 서버 왕복 수)를 세는 커서"""
+    round_trips = 0
+
+    def execute(self, query, vars=None):
+        CountingCursor.round_trips += 1
+        return super().execute(query, vars)
+
+
+def legacy_get_db_schema(conn, schema_name):
+    """기존 구현 - 테이블마다 컬럼, PK 쿼리를 따로 실행 (N+1)"""
+    schema = []
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT table_schema,table_name
+            FROM information_schema.tables
+            WHERE table_schema = %s
+        """, (schema_name,))
+        tables = cursor.fetchall()
+
+        for table_schema, table_name in tables:
+            cursor.execute(f"""
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_name = '{table_name}'
+            """)
+            columns = cursor.fetchall()
+
+            table_info = f"Table: {table_schema}.{table_name}\nColumns:\n"
+            for col_name, col_type in columns:
+                table_info += f"  - {col_name}: {col_type}\n"
+
+            cursor.execute(f"""
+                SELECT c.column_name
+                FROM information_schema.table_constraints tc
+                JOIN information_schema.constraint_column_usage AS ccu USING (constraint_schema, constraint_name)
+                JOIN information_schema.columns AS c ON c.table_schema = tc.constraint_schema
+                  AND tc.table_name = c.table_name AND ccu.column_name = c.column_name
+                WHERE constraint_type = 'PRIMARY KEY' AND tc.table_name = '{table_name}'
+            """)
+            pks = cursor.fetchall()
+            if pks:
+                table_info += f"Primary Key(s): {', '.join(pk[0] for pk in pks)}\n"
+
+            schema.append(table_info)
+    return "\n".join(schema)
+
+
+def bulk_get_db_schema(conn, schema_name):
+    return render_schema(fetch_schema_catalog(conn, schema_name))
+
+
+def create_synthetic_schema(conn, schema_name, n_tables, n_columns):
+    with conn.cursor() as cursor:
+        cursor.execute(f'DROP SCHEMA IF EXISTS "{schema_name}" CASCADE')
+        cursor.execute(f'CREATE SCHEMA "{schema_name}"')
+        for i in range(n_tables):
+            columns = ", ".join(f"col_{j} text" for j in range(n_columns))
+            parent_fk = f", parent_id integer REFERENCES \"{schema_name}\".t_{i - 1}(id)" if i else ""
+            cursor.execute(
+                f'CREATE TABLE "{schema_name}".t_{i} (id integer PRIMARY KEY, {columns}{parent_fk})'
+            )
+    conn.commit()
+
+
+def measure(fn, conn, schema_name, repeat):
+    timings = []
+    trips = 0
+    for _ in range(repeat):
+        CountingCursor.round_trips = 0
+        started = time.perf_counter()
+        fn(conn, schema_name)
+        timings.append(time.perf_counter() - started)
+        trips = CountingCursor.round_trips
+        conn.rollback()
+    timings.sort()
+    return {
+        "round_trips": trips,
+        "median_ms": timings[len(timings) // 2] * 1000,
+        "min_ms": timings[0] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schema", default=DB_SCHEMA)
+    parser.add_argument("--synthetic-tables", type=int, default=0)
+    parser.add_argument("--columns", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(cursor_factory=CountingCursor, **DB_CONFIG)
+    schema_name = args.schema
+    try:
+        if args.synthetic_tables:
+            schema_name = "bench_schema_introspection"
+            print(f"Creating {args.synthetic_tables} tables x {args.columns} columns in {schema_name}...")
+            create_synthetic_schema(conn, schema_name, args.synthetic_tables, args.columns)
+
+        results = {
+            "legacy (information_schema loop)": measure(legacy_get_db_schema, conn, schema_name, args.repeat),
+            "bulk (single pg_catalog query)": measure(bulk_get_db_schema, conn, schema_name, args.repeat),
+        }
+
+        print(f"\nschema: {schema_name}, repeat: {args.repeat}")
+        print(f"{'implementation':<36}{'round trips':>12}{'median ms':>12}{'min ms':>12}")
+        for name, r in results.items():
+            print(f"{name:<36}{r['round_trips']:>12}{r['median_ms']:>12.1f}{r['min_ms']:>12.1f}")
+    finally:
+        if args.synthetic_tables:
+            with conn.cursor() as cursor:
+                cursor.execute(f'DROP SCHEMA IF EXISTS "{schema_name}" CASCADE')
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+스키마 프루닝 벤치마크 - 질문마다 프롬프트에 들어가는 스키마 크기(전체 vs BM25 top-k)를 비교합니다.
+
+질문은 logs/rdb_search.log 의 "Processing RDB search query:" 줄에서 읽거나 --question 으로 지정합니다.
+
+사용법 (fastmcp/app 에서 실행, .env 의 DB 설정 사용):
+    python benchmarks/bench_schema_pruning.py --top-k 5
+    python benchmarks/bench_schema_pruning.py --question "장비명 = '열교환기' AND 요청자 = '홍성국'"
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import psycopg2
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from SearchRdb import DB_CONFIG, load_db_schema  # noqa: E402
+from SchemaCache import render_schema  # noqa: E402
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # tiktoken 이 없거나 인코딩 파일을 내려받을 수 없으면 글자 수만 보고
+    _encoding = None
+
+
+def count_tokens(text):
+    return len(_encoding.encode(text)) if _encoding else None
+
+
+def questions_from_log(path):
+    pattern = re.compile(r"Processing RDB search query: (.*)$")
+    seen = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            m = pattern.search(line)
+            if m and m.group(1) not in seen:
+                seen.append(m.group(1))
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--question", action="append")
+    parser.add_argument("--log", default=os.path.join(APP_DIR, "logs", "rdb_search.log"))
+    args = parser.parse_args()
+
+    questions = args.question or questions_from_log(args.log)
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        schema = load_db_schema(conn)
+    finally:
+        conn.close()
+
+    full_text = schema["text"]
+    index = schema["index"]
+    full_tokens = count_tokens(full_text)
+    print(f"tables: {len(schema['tables'])}, full schema: {len(full_text)} chars"
+          + (f", {full_tokens} tokens" if full_tokens is not None else ""))
+
+    total_full = total_pruned = 0
+    for question in questions:
+        started = time.perf_counter()
+        tables = index.select(question, args.top_k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pruned_text = render_schema(tables)
+        total_full += len(full_text)
+        total_pruned += len(pruned_text)
+        tokens = count_tokens(pruned_text)
+        print(f"- {question}\n    {len(tables)} tables, {len(pruned_text)} chars"
+              + (f", {tokens} tokens" if tokens is not None else "")
+              + f", select {elapsed_ms:.2f} ms")
+
+    if questions:
+        print(f"\nprompt schema size: {total_pruned / total_full:.1%} of full "
+              f"({1 - total_pruned / total_full:.1%} reduction)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+search_docs 첫 검색(cold) 벤치마크 - 폴더별 순차 os.walk(기존) vs catalog 순차 scandir vs 스레드 풀 scandir(현재)
+
+사용법 (fastmcp/app 에서 실행):
+    python benchmarks/bench_search_docs_cold_scan.py
+    python benchmarks/bench_search_docs_cold_scan.py --folders 10000 --workers 16 --latency-ms 1
+
+임시 디렉터리에 --folders 개의 MNRO 폴더(각각 하위 폴더 하나와 파일 몇 개, 일부는 zip)를 만들고,
+매번 빈 catalog 에서 모든 폴더를 한 번에 검색합니다. --latency-ms 를 주면 scandir/stat 호출마다
+그만큼 기다려서 네트워크 공유(SMB)의 왕복 지연을 흉내 냅니다.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DocCatalog import DocCatalog  # noqa: E402
+
+
+def create_tree(root, n_folders, files_per_folder):
+    for i in range(n_folders):
+        folder = os.path.join(root, f"MR{i:08d}M")
+        sub = os.path.join(folder, "도면")
+        os.makedirs(sub)
+        for j in range(files_per_folder):
+            target = sub if j % 2 else folder
+            open(os.path.join(target, f"Tube Bundle 사양서_{j}.{('pdf', 'docx', 'xlsx')[j % 3]}"), "w").close()
+        if i % 10 == 0:
+            with zipfile.ZipFile(os.path.join(folder, "파일모음.zip"), "w") as z:
+                z.writestr("문서/보고서.docx", "x")
+                z.writestr("문서/Tube 검사.pdf", "y")
+
+
+def add_latency(seconds):
+    """scandir/stat 호출마다 seconds 만큼 지연 (os.walk 도 내부에서 os.scandir 를 씀)"""
+    real_scandir, real_stat = os.scandir, os.stat
+
+    def scandir(*args, **kwargs):
+        time.sleep(seconds)
+        return real_scandir(*args, **kwargs)
+
+    def stat(*args, **kwargs):
+        time.sleep(seconds)
+        return real_stat(*args, **kwargs)
+
+    os.scandir, os.stat = scandir, stat
+
+
+def legacy_walk(root, folders, keywords):
+    """기존 구현 - 폴더마다 차례로 os.walk, zip 은 매번 열어 이름만 비교"""
+    found = 0
+    for folder in folders:
+        folder_path = os.path.join(root, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for dir_path, _, files in os.walk(folder_path):
+            for name in files:
+                if name.lower().endswith(".zip"):
+                    with zipfile.ZipFile(os.path.join(dir_path, name)) as z:
+                        names = [os.path.basename(n) for n in z.namelist() if not n.endswith("/")]
+                else:
+                    names = [name]
+                found += sum(all(k.lower() in n.lower() for k in keywords) for n in names)
+    return found
+
+
+def catalog_scan(root, folders, keywords, workers, db_path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    catalog = DocCatalog(db_path, root)
+    first = None
+    started = time.perf_counter()
+    existing = []
+    for folder, exists in catalog.refresh_many(folders, workers):
+        if first is None:
+            first = time.perf_counter() - started
+        if exists:
+            existing.append(folder)
+    return len(catalog.search(existing, keywords)), first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folders", type=int, default=10000)
+    parser.add_argument("--files-per-folder", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--keep", action="store_true", help="만든 트리를 지우지 않음")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench_search_docs_")
+    root = os.path.join(work, "docs")
+    try:
+        print(f"Creating {args.folders} folders x {args.files_per_folder} files in {root}...")
+        create_tree(root, args.folders, args.files_per_folder)
+        folders = sorted(os.listdir(root))
+        keywords = ["tube"]
+        if args.latency_ms:
+            add_latency(args.latency_ms / 1000)
+
+        results = {}
+        started = time.perf_counter()
+        found = legacy_walk(root, folders, keywords)
+        results["legacy (sequential os.walk)"] = (time.perf_counter() - started, None, found)
+        for workers in (1, args.workers):
+            started = time.perf_counter()
+            found, first = catalog_scan(root, folders, keywords, workers, os.path.join(work, "catalog.sqlite"))
+            label = f"catalog scandir, {workers} thread{'s' if workers > 1 else ''}"
+            results[label] = (time.perf_counter() - started, first, found)
+
+        print(f"\nfolders: {len(folders)}, latency: {args.latency_ms} ms per scandir/stat")
+        print(f"{'implementation':<32}{'total s':>10}{'first folder ms':>18}{'matches':>10}")
+        for name, (total, first, found) in results.items():
+            first_ms = f"{first * 1000:.1f}" if first is not None else "-"
+            print(f"{name:<32}{total:>10.2f}{first_ms:>18}{found:>10}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
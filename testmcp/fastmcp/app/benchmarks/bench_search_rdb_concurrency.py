@@ -0,0 +1,76 @@
+"""
+search_rdb 동시성 벤치마크 - LLM 을 지연 시간만 흉내 내는 스텁으로 바꾸고,
+N 개의 search_rdb_main 호출을 순차 실행할 때와 동시에 실행할 때의 전체 시간을 비교합니다.
+
+사용법 (fastmcp/app 에서 실행, .env 의 DB 설정 사용):
+    python benchmarks/bench_search_rdb_concurrency.py --calls 20 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 매 호출이 LLM 을 타도록 변환 캐시는 임시 파일로 분리
+os.environ.setdefault("SQL_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "bench_nl2sql_cache.sqlite"))
+# 모든 호출이 같은 SQL 이므로 결과 캐시를 끄지 않으면 첫 호출 뒤로는 DB 를 타지 않음
+os.environ.setdefault("RESULT_CACHE_MAX_MB", "0")
+
+import SearchRdb  # noqa: E402
+
+
+class StubLLM:
+    """고정된 SQL 을 돌려주는 LLM 스텁 - ainvoke 는 latency 만큼 await 합니다."""
+
+    def __init__(self, sql, latency):
+        self.sql = sql
+        self.latency = latency
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return types.SimpleNamespace(content=f"```sql\n{self.sql}\n```")
+
+
+async def run_sequential(n):
+    started = time.perf_counter()
+    for i in range(n):
+        await SearchRdb.search_rdb_main(f"benchmark question #{i}")
+    return time.perf_counter() - started
+
+
+async def run_concurrent(n):
+    started = time.perf_counter()
+    await asyncio.gather(*(SearchRdb.search_rdb_main(f"benchmark question #{i}") for i in range(n)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stubbed LLM latency in seconds")
+    parser.add_argument("--sql", default="SELECT table_name FROM information_schema.tables LIMIT 10")
+    args = parser.parse_args()
+
+    # SQL_FIX_CANDIDATES>1 이면 create_llm(temperature=...) 로도 불림
+    SearchRdb.create_llm = lambda temperature=0: StubLLM(args.sql, args.llm_latency)
+    SearchRdb.init_db_pool()
+    SearchRdb.warm_schema_cache()
+
+    sequential = asyncio.run(run_sequential(args.calls))
+    SearchRdb.sql_cache = SearchRdb.SqlCache(os.path.join(tempfile.mkdtemp(), "bench_nl2sql_cache.sqlite"))
+    concurrent = asyncio.run(run_concurrent(args.calls))
+
+    print(f"\ncalls: {args.calls}, stubbed LLM latency: {args.llm_latency * 1000:.0f} ms")
+    print(f"sequential: {sequential:8.2f} s  ({sequential / args.calls * 1000:.0f} ms/call)")
+    print(f"concurrent: {concurrent:8.2f} s  ({concurrent / args.calls * 1000:.0f} ms/call)")
+    print(f"speedup:    {sequential / concurrent:8.1f}x")
+    print(f"pool:       {SearchRdb.db_pool.stats()}")
+    print(f"results:    {SearchRdb.result_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 from mcp.server.fastmcp import FastMCP
 from fastmcp.prompts.base import UserMessage
-from mcp.types import TextContent
+from mcp.types import TextContent, EmbeddedResource
 from typing import List, Optional
 
-from SearchRdb import search_rdb_main
-from SearchDocs import search_docs_main
+from SearchRdb import search_rdb_main, search_rdb_next_page, search_rdb_batch_main, init_db_pool, warm_schema_cache, get_search_rdb_stats
+from SearchDocs import search_docs_main, start_doc_watcher, get_search_docs_stats
 from docxtohtml import docx_to_html_main
 
 
@@ -21,37 +21,85 @@ def multiply(a: int, b: int) -> int:
     return a * b
 
 @mcp.tool()
-def search_rdb(query: str) -> list[TextContent]:
+async def search_rdb(query: str, output_format: str = "markdown") -> list[TextContent | EmbeddedResource]:
     """
     Search the relational database using natural language query.
     
     Args:
         query: Natural language query to search the database
+        output_format: "markdown" (default), "json" (column-oriented with typed arrays) or
+            "arrow" (JSON metadata plus base64 Arrow IPC bytes in a second content part)
     """
-    return search_rdb_main(query)
+    return await search_rdb_main(query, output_format)
+
+@mcp.tool()
+async def search_rdb_batch(queries: list[str], output_format: str = "markdown") -> list[TextContent | EmbeddedResource]:
+    """
+    Answer several related questions at once (one SQL generation, one consistent DB snapshot).
+    Prefer this over several search_rdb calls when the questions are about the same records.
+    
+    Args:
+        queries: Natural language questions, e.g. the equipment, requester and latest RFQ of one MNRO
+        output_format: "markdown", "json" or "arrow" (applied to every question)
+    """
+    return await search_rdb_batch_main(queries, output_format)
+
+@mcp.tool()
+async def search_rdb_next(continuation_token: str, output_format: str = "markdown") -> list[TextContent | EmbeddedResource]:
+    """
+    Fetch the next page of a truncated search_rdb result (no new SQL generation).
+    
+    Args:
+        continuation_token: Token shown in the note (or continuation_token field) of the previous result
+        output_format: "markdown", "json" or "arrow"
+    """
+    return await search_rdb_next_page(continuation_token, output_format)
+
+@mcp.tool()
+def search_rdb_stats() -> dict:
+    """
+    Return search_rdb monitoring statistics (connection pool, caches, guard, continuation tokens).
+    """
+    return get_search_rdb_stats()
+
+@mcp.tool()
+def search_docs_stats() -> dict:
+    """
+    Return search_docs monitoring statistics (file catalog size, refreshes, file watcher events).
+    """
+    return get_search_docs_stats()
 
 @mcp.tool()
 def search_docs(
     folder_names: list,
     keywords: Optional[list] = None,
     doc_type: Optional[str] = None,
-    search_in_content: bool = False
-) -> list:
+    search_in_content: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    sort_by: str = "relevance"
+) -> dict:
     """
     문서 검색 도구 - 지정된 폴더에서 문서를 검색합니다.
     
     :param folder_names: 검색할 폴더 이름 리스트 (예: ['MR24010002M', 'MR24010003M'])
     :param keywords: 검색할 키워드들 (파일 이름에 포함되어야 하는 단어들)
     :param doc_type: 문서 형식 (예: 'docx', 'xlsx', 'pdf')
-    :param search_in_content: 파일 내용 검색 여부 (기본값: False)
-    :return: 검색된 파일 정보의 리스트
+    :param search_in_content: 파일 내용도 검색할지 여부 (docx, xlsx, pdf - zip 내부 포함, 기본값: False)
+    :param limit: 돌려줄 최대 파일 수 (기본값: 50)
+    :param offset: 건너뛸 파일 수 - 결과에 more_available 이 true 이면 next_offset 을 넣어 다음 페이지 조회
+    :param sort_by: 'relevance'(기본값, 이름 일치/최근 수정/앞에 적은 폴더 우선), 'recent', 'name', 'path'
+    :return: 검색 결과 페이지 (total, more_available, next_offset, files)
     """
     # search_docs 함수를 직접 호출하여 결과 반환
     return search_docs_main(
         folder_names=folder_names,
         keywords=keywords,
         doc_type=doc_type,
-        search_in_content=search_in_content
+        search_in_content=search_in_content,
+        limit=limit,
+        offset=offset,
+        sort_by=sort_by
     )
 
 @mcp.tool()
@@ -70,4 +118,7 @@ def docx_to_html(file_paths: list[str]) -> str:
 
 
 if __name__ == "__main__":
+    init_db_pool()
+    warm_schema_cache()
+    start_doc_watcher()
     mcp.run(transport='sse')
\ No newline at end of file
@@ -1,13 +1,99 @@
+import time
+
 import pandas as pd
 import psycopg2
-from sqlalchemy import create_engine
-from pathlib import Path
+from psycopg2 import sql
+
+# pandas dtype -> PostgreSQL 타입 (새 테이블을 만들 때만 사용)
+_PG_TYPES = {
+    "i": "bigint",
+    "u": "bigint",
+    "f": "double precision",
+    "b": "boolean",
+    "M": "timestamp",
+}
+
+
+def _pg_type(series):
+    # 값이 하나도 없는 열은 pandas 가 float 로 읽으므로 text 로 둠
+    if series.isna().all():
+        return "text"
+    return _PG_TYPES.get(series.dtype.kind, "text")
+
+
+def _copy_value(value):
+    # COPY CSV: 따옴표 없는 빈 값은 NULL, "" 는 빈 문자열
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class _CopyStream:
+    """DataFrame 행을 CSV 로 바꿔 가며 copy_expert 에 흘려 주는 파일 객체 (전체를 메모리에 만들지 않음)"""
+
+    def __init__(self, df):
+        self._rows = df.itertuples(index=False, name=None)
+        self._buffer = ""
+        self.rows = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += ",".join(_copy_value(v) for v in row) + "\n"
+            self.rows += 1
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
 
-def excel_to_postgresql(excel_path, db_name='rdb_database', table_name='rdb_table', 
-                        host='localhost', port='5432', user='postgres', password='your_password'):
+def _copy_rows(cursor, target, columns, df):
+    stream = _CopyStream(df)
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        target, sql.SQL(", ").join(map(sql.Identifier, columns)))
+    cursor.copy_expert(statement.as_string(cursor), stream, size=64 * 1024)
+    return stream.rows
+
+
+def _table_exists(cursor, schema, table_name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL",
+                   (sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table_name)).as_string(cursor),))
+    return cursor.fetchone()[0]
+
+
+def _has_unique_key(cursor, schema, table_name, key_column):
+    cursor.execute("""
+        SELECT 1 FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = to_regclass(%s) AND i.indisunique AND i.indnkeyatts = 1 AND a.attname = %s
+    """, (sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table_name)).as_string(cursor), key_column))
+    return cursor.fetchone() is not None
+
+
+def _build_indexes(cursor, target, table_name, key_column, index_columns, add_primary_key):
+    """적재가 끝난 뒤에 인덱스를 만듭니다 (행마다 인덱스를 갱신하는 것보다 훨씬 빠름)"""
+    if add_primary_key:
+        cursor.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY ({})").format(target, sql.Identifier(key_column)))
+    for column in index_columns:
+        cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({})").format(
+            sql.Identifier(f"{table_name}_{column}_idx"[:63]), target, sql.Identifier(column)))
+
+
+def excel_to_postgresql(excel_path, db_name='rdb_database', table_name='rdb_table',
+                        host='localhost', port='5432', user='postgres', password='your_password',
+                        schema='public', mode='upsert', key_column='MNRO', index_columns=(),
+                        delete_missing=False):
     """
     Excel 파일을 PostgreSQL 관계형 데이터베이스로 변환합니다.
-    
+
+    행은 COPY ... FROM STDIN 으로 흘려 넣고, 인덱스는 적재가 끝난 뒤에 만듭니다.
+    테이블이 이미 있으면 테이블을 지우지 않습니다 (캐시/인덱스가 그대로 유지됨).
+    - mode='upsert'  : 임시 테이블로 COPY 한 뒤 key_column 기준으로 새 행은 INSERT,
+                       값이 바뀐 행만 UPDATE (delete_missing=True 면 엑셀에 없는 행은 삭제)
+    - mode='replace' : 같은 트랜잭션에서 TRUNCATE 후 COPY
+
     Args:
         excel_path (str): Excel 파일 경로
         db_name (str): 생성할 PostgreSQL 데이터베이스 이름
@@ -16,56 +102,138 @@ def excel_to_postgresql(excel_path, db_name='rdb_database', table_name='rdb_tabl
         port (str): PostgreSQL 포트
         user (str): PostgreSQL 사용자 이름
         password (str): PostgreSQL 패스워드
-    
+        schema (str): 테이블을 둘 스키마
+        mode (str): 'upsert' 또는 'replace'
+        key_column (str): upsert 기준 컬럼 (새 테이블이면 PRIMARY KEY 가 됨)
+        index_columns (tuple): 적재 후 btree 인덱스를 만들 컬럼들
+        delete_missing (bool): upsert 때 엑셀에 없는 행을 삭제할지 여부
+
     Returns:
         bool: 성공 여부
     """
+    if mode not in ("upsert", "replace"):
+        print(f"알 수 없는 mode: {mode} (upsert 또는 replace)")
+        return False
+
     # Excel 파일 읽기
     try:
+        started = time.perf_counter()
         excel_data = pd.read_excel(excel_path)
-        print(f"엑셀 파일 로드 성공. 열: {excel_data.columns.tolist()}")
-        print(f"데이터 샘플:\n{excel_data.head()}")
+        excel_data.columns = [str(c).strip() for c in excel_data.columns]
+        print(f"엑셀 파일 로드 성공 ({len(excel_data)}행, {time.perf_counter() - started:.2f}s). "
+              f"열: {excel_data.columns.tolist()}")
     except Exception as e:
         print(f"엑셀 파일 로딩 오류: {e}")
         return False
-    
-    # PostgreSQL 연결 
+
+    columns = excel_data.columns.tolist()
+    has_key = key_column in columns
+    if mode == "upsert" and not has_key:
+        print(f"upsert 기준 컬럼 {key_column} 이(가) 엑셀에 없습니다.")
+        return False
+    if has_key and (excel_data[key_column].isna().any() or excel_data[key_column].duplicated().any()):
+        if mode == "upsert":
+            print(f"{key_column} 값이 비어 있거나 중복되어 upsert 할 수 없습니다.")
+            return False
+        has_key = False
+
+    # PostgreSQL 연결
     try:
         # 먼저 PostgreSQL 서버에 연결
         conn = psycopg2.connect(
             host=host,
             port=port,
             user=user,
-            password=password
+            password=password,
+            dbname='postgres'
         )
         conn.autocommit = True
         cursor = conn.cursor()
-        
+
         # 기존 데이터베이스가 있는지 확인하고 없으면 생성
         cursor.execute("SELECT 1 FROM pg_catalog.pg_database WHERE datname = %s", (db_name,))
         exists = cursor.fetchone()
         if not exists:
             print(f"데이터베이스 {db_name} 생성 중...")
-            cursor.execute(f"CREATE DATABASE {db_name}")
-        
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(db_name)))
+
         conn.close()
-        
-        # SQLAlchemy 엔진 생성 및 데이터 삽입
-        engine = create_engine(f'postgresql://{user}:{password}@{host}:{port}/{db_name}')
-        
-        # 엑셀 데이터를 PostgreSQL 테이블로 저장
-        excel_data.to_sql(table_name, engine, if_exists='replace', index=False)
-        
-        # 데이터 확인
-        with engine.connect() as connection:
-            result = connection.execute(f"SELECT * FROM {table_name} LIMIT 5")
-            print("데이터베이스 생성 성공. 샘플 데이터:")
-            for row in result:
+
+        conn = psycopg2.connect(host=host, port=port, user=user, password=password, dbname=db_name)
+        target = sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table_name))
+        started = time.perf_counter()
+
+        with conn, conn.cursor() as cursor:
+            cursor.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema)))
+
+            if not _table_exists(cursor, schema, table_name):
+                # 새 테이블: 인덱스 없이 만들고 COPY 한 뒤 인덱스 생성
+                cursor.execute(sql.SQL("CREATE TABLE {} ({})").format(target, sql.SQL(", ").join(
+                    sql.SQL("{} {}").format(sql.Identifier(col), sql.SQL(_pg_type(excel_data[col])))
+                    for col in columns)))
+                loaded = _copy_rows(cursor, target, columns, excel_data)
+                _build_indexes(cursor, target, table_name, key_column, index_columns, has_key)
+                summary = f"새 테이블에 {loaded}행 적재"
+
+            elif mode == "replace":
+                cursor.execute(sql.SQL("TRUNCATE {}").format(target))
+                loaded = _copy_rows(cursor, target, columns, excel_data)
+                _build_indexes(cursor, target, table_name, key_column, index_columns, False)
+                summary = f"TRUNCATE 후 {loaded}행 적재"
+
+            else:
+                # 임시 테이블로 COPY 한 뒤 바뀐 행만 반영 (ON CONFLICT 에는 key_column 의 유일 인덱스가 필요)
+                if not _has_unique_key(cursor, schema, table_name, key_column):
+                    cursor.execute(sql.SQL("CREATE UNIQUE INDEX {} ON {} ({})").format(
+                        sql.Identifier(f"{table_name}_{key_column}_key"[:63]), target, sql.Identifier(key_column)))
+                cursor.execute(sql.SQL("CREATE TEMP TABLE rdb_stage (LIKE {}) ON COMMIT DROP").format(target))
+                stage = sql.Identifier("rdb_stage")
+                loaded = _copy_rows(cursor, stage, columns, excel_data)
+
+                key = sql.Identifier(key_column)
+                others = [sql.Identifier(col) for col in columns if col != key_column]
+                column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+                if others:
+                    on_conflict = sql.SQL("DO UPDATE SET {} WHERE ({}) IS DISTINCT FROM ({})").format(
+                        sql.SQL(", ").join(sql.SQL("{0} = EXCLUDED.{0}").format(col) for col in others),
+                        sql.SQL(", ").join(sql.SQL("t.{}").format(col) for col in others),
+                        sql.SQL(", ").join(sql.SQL("EXCLUDED.{}").format(col) for col in others),
+                    )
+                else:
+                    on_conflict = sql.SQL("DO NOTHING")
+                cursor.execute(sql.SQL(
+                    "WITH up AS (INSERT INTO {target} AS t ({columns}) SELECT {columns} FROM {stage} "
+                    "ON CONFLICT ({key}) {on_conflict} RETURNING xmax = 0 AS inserted) "
+                    "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM up"
+                ).format(target=target, columns=column_list, stage=stage, key=key, on_conflict=on_conflict))
+                inserted, updated = cursor.fetchone()
+
+                deleted = 0
+                if delete_missing:
+                    cursor.execute(sql.SQL(
+                        "DELETE FROM {target} AS t WHERE NOT EXISTS (SELECT 1 FROM {stage} s WHERE s.{key} = t.{key})"
+                    ).format(target=target, stage=stage, key=key))
+                    deleted = cursor.rowcount
+                _build_indexes(cursor, target, table_name, key_column, index_columns, False)
+                summary = (f"{loaded}행 비교: 추가 {inserted}, 변경 {updated}, "
+                           f"변경 없음 {loaded - inserted - updated}, 삭제 {deleted}")
+
+        elapsed = time.perf_counter() - started
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("ANALYZE {}").format(target))
+
+            # 데이터 확인
+            cursor.execute(sql.SQL("SELECT * FROM {} LIMIT 5").format(target))
+            print("데이터베이스 적재 성공. 샘플 데이터:")
+            for row in cursor.fetchall():
                 print(row)
-                
-        print(f"PostgreSQL 데이터베이스 {db_name}에 {table_name} 테이블이 생성되었습니다.")
+        conn.close()
+
+        print(f"{summary} - {elapsed:.2f}s ({loaded / elapsed if elapsed > 0 else 0:,.0f} rows/s)")
+        print(f"PostgreSQL 데이터베이스 {db_name}에 {schema}.{table_name} 테이블이 준비되었습니다.")
         return True
-        
+
     except Exception as e:
         print(f"PostgreSQL 데이터베이스 생성 오류: {e}")
         import traceback
@@ -75,7 +243,7 @@ def excel_to_postgresql(excel_path, db_name='rdb_database', table_name='rdb_tabl
 # 사용 예시
 if __name__ == "__main__":
     excel_path = r"C:\Users\Administrator\Desktop\ye\LKM\Tools\mcp_testbed\testmcp\mcpclient\app\mockup_data\RDB.xlsx"
-    
+
     # PostgreSQL 연결 정보 수정 필요
     success = excel_to_postgresql(
         excel_path=excel_path,
@@ -84,10 +252,12 @@ if __name__ == "__main__":
         host='localhost',
         port='5432',
         user='postgres',
-        password='your_password'  # 실제 비밀번호로 변경 필요
+        password='your_password',  # 실제 비밀번호로 변경 필요
+        mode='upsert',
+        key_column='MNRO',
     )
-    
+
     if success:
         print("PostgreSQL 변환 완료")
     else:
-        print("PostgreSQL 변환 실패")
\ No newline at end of file
+        print("PostgreSQL 변환 실패")